@@ -0,0 +1,82 @@
+import { OpenAPIRoute } from "chanfana";
+import { type AppContext, CleanedName, CleanedNames, Name, NameBatch } from "../types";
+
+// Same rules as ai_name_correction/index.js, so both workers give the same answers
+export function cleanName(name: string): string {
+	return name
+		.trim()
+		.replace(/[^a-zA-Z\s]/g, "") // remove numbers/symbols
+		.replace(/\s+/g, " ") // fix spacing
+		.toLowerCase()
+		.replace(/\b\w/g, (c) => c.toUpperCase()); // capitalize each word
+}
+
+export class NameClean extends OpenAPIRoute {
+	schema = {
+		tags: ["Names"],
+		summary: "Clean one name",
+		request: {
+			body: {
+				content: {
+					"application/json": {
+						schema: Name,
+					},
+				},
+			},
+		},
+		responses: {
+			"200": {
+				description: "Returns the cleaned name",
+				content: {
+					"application/json": {
+						schema: CleanedName,
+					},
+				},
+			},
+		},
+	};
+
+	async handle(c: AppContext) {
+		// Get validated data
+		const data = await this.getValidatedData<typeof this.schema>();
+
+		return {
+			cleaned_name: cleanName(data.body.name),
+		};
+	}
+}
+
+export class NameCleanBatch extends OpenAPIRoute {
+	schema = {
+		tags: ["Names"],
+		summary: "Clean many names in one request",
+		request: {
+			body: {
+				content: {
+					"application/json": {
+						schema: NameBatch,
+					},
+				},
+			},
+		},
+		responses: {
+			"200": {
+				description: "Returns the cleaned names in request order",
+				content: {
+					"application/json": {
+						schema: CleanedNames,
+					},
+				},
+			},
+		},
+	};
+
+	async handle(c: AppContext) {
+		// Get validated data
+		const data = await this.getValidatedData<typeof this.schema>();
+
+		return {
+			cleaned_names: data.body.names.map(cleanName),
+		};
+	}
+}
@@ -11,3 +11,21 @@ export const Task = z.object({
 	completed: z.boolean().default(false),
 	due_date: DateTime(),
 });
+
+export const MAX_BATCH = 1000;
+
+export const Name = z.object({
+	name: z.string(),
+});
+
+export const CleanedName = z.object({
+	cleaned_name: z.string(),
+});
+
+export const NameBatch = z.object({
+	names: z.array(z.string()).max(MAX_BATCH),
+});
+
+export const CleanedNames = z.object({
+	cleaned_names: z.array(z.string()),
+});
@@ -1,39 +1,123 @@
-from fastapi import FastAPI, UploadFile, File
+import os
+from functools import partial
+
+from fastapi import FastAPI, UploadFile, File, HTTPException
 import pandas as pd
-from io import BytesIO
-from fastapi.responses import JSONResponse
-from sentence_transformers import SentenceTransformer, util
-from fuzzywuzzy import process
-import pycountry, geonamescache, torch
+from fastapi.responses import JSONResponse, StreamingResponse
+import metrics
+import resources
+from config import WARMUP_RESOURCES
+from data_io import MEDIA_TYPES, detect_format, iter_table_chunks, read_table, stream_table
+from data_sources import get_entity_candidate_index
+from jobs import JobQueue, job_router, output_name, public_status, table_handler
+from parallel import map_column
 
 app = FastAPI(title="CleanChain AI Correction Engine")
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+
+@app.on_event("startup")
+def warm_up_resources():
+    """Load shared models/reference data before the first request (see CLEANCHAIN_WARMUP)."""
+    if WARMUP_RESOURCES:
+        timings = resources.warm_up(*WARMUP_RESOURCES)
+        print("🔥 Warmed up:", timings)
+
+
+@app.on_event("startup")
+def start_jobs():
+    """Background workers for /jobs submissions."""
+    jobs.start()
+
+
+@app.on_event("shutdown")
+def stop_jobs():
+    jobs.stop()
+
 
 @app.get("/")
 def root():
     return {"message": "AI Correction Engine is running!"}
 
+def build_reference_indexes():
+    """Candidate indexes for the country and city columns (built once per process)."""
+    return {"country": get_entity_candidate_index("country"), "city": get_entity_candidate_index("city")}
+
+
+def correct_name(name, ref_index):
+    matches = ref_index.extract_one(name)
+    if matches and matches[1] > 80:
+        return matches[0]
+    return name
+
+
+def correct_entity_name(name, entity):
+    """correct_name against an entity's shared candidate index (picklable for process pools)."""
+    return correct_name(name, get_entity_candidate_index(entity))
+
+
+def correct_frame(df, indexes, workers=None):
+    """
+    Correct the country/city columns of a DataFrame (or chunk) in place.
+    Distinct values are matched once each, sharded across `workers` processes.
+    """
+    for column in indexes:
+        if column in df.columns:
+            values = df[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(str)
+            with metrics.stage("correct", column=column):
+                df[column] = map_column(partial(correct_entity_name, entity=column), values, workers)
+    return df
+
+
+def correct_transform(params):
+    indexes = build_reference_indexes()
+    return lambda chunk: correct_frame(chunk, indexes, params.get("workers"))
+
+
+jobs = JobQueue({"correct_file": table_handler(correct_transform)})
+app.include_router(job_router(jobs))
+app.include_router(metrics.metrics_router())
+
+
+@app.post("/jobs/correct_file", status_code=202)
+def submit_correct_file(file: UploadFile = File(...), workers: int = None, output_format: str = "csv",
+                        profile: bool = False):
+    """
+    Queue a CSV/Parquet/Arrow/Excel file for correction; poll the returned status URL, then download.
+    `profile` adds a sampling profile of the job to its result.
+    """
+    stem = os.path.splitext(os.path.basename(file.filename or "upload"))[0]
+    name = output_name(f"corrected_{stem}", output_format)
+    job_id = jobs.submit("correct_file", file.file, file.filename, {"workers": workers, "profile": profile}, name)
+    return public_status(jobs.store.get(job_id))
+
+
 @app.post("/correct_file")
-async def correct_file(file: UploadFile = File(...)):
-    df = pd.read_excel(BytesIO(await file.read())) if file.filename.endswith(".xlsx") else pd.read_csv(file.file)
-
-    countries = [c.name for c in pycountry.countries]
-    gc = geonamescache.GeonamesCache()
-    cities = [c["name"] for c in gc.get_cities().values()]
-
-    def correct_name(name, ref_list):
-        matches = process.extractOne(name, ref_list)
-        if matches and matches[1] > 80:
-            return matches[0]
-        return name
-
-    if "country" in df.columns:
-        df["country"] = df["country"].apply(lambda x: correct_name(str(x), countries))
-    if "city" in df.columns:
-        df["city"] = df["city"].apply(lambda x: correct_name(str(x), cities))
-
-    output = BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-    return JSONResponse({"message": "File corrected", "rows": len(df)})
+def correct_file(file: UploadFile = File(...), workers: int = None, profile: bool = False):
+    with metrics.job("correct_file", profile=profile or None) as trace:
+        with metrics.stage("read"):
+            df = read_table(file.file, file.filename)
+        df = correct_frame(df, build_reference_indexes(), workers)
+    body = {"message": "File corrected", "rows": len(df), "timings": trace.timings()}
+    if trace.profile is not None:
+        body["profile"] = trace.profile
+    return JSONResponse(body)
+
+
+@app.post("/correct_file/stream")
+def correct_file_stream(file: UploadFile = File(...), workers: int = None, output_format: str = "csv"):
+    """Correct a CSV/Parquet/Arrow file chunk by chunk and stream the corrected file back."""
+    if detect_format(file.filename, default=None) not in ("csv", "parquet", "arrow"):
+        raise HTTPException(status_code=400, detail="Streaming mode only supports CSV, Parquet and Arrow uploads")
+    stem = os.path.splitext(os.path.basename(file.filename))[0]
+    name = output_name(f"corrected_{stem}", output_format)
+
+    indexes = build_reference_indexes()
+    body = stream_table(iter_table_chunks(file.file, file.filename),
+                        lambda chunk: correct_frame(chunk, indexes, workers), output_format)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
@@ -1,7 +1,17 @@
-import requests
+from config import WORKER_URL
+from correction_cache import get_correction_cache
+from resources import resource
+from worker_client import WorkerClient, WorkerUnavailable
+
+# 🌐 Your Cloudflare Worker: set CLEANCHAIN_WORKER_URL (see config.py)
+WORKER_ENGINE, WORKER_VERSION = "cloudflare-worker", "1"  # bump the version when the worker logic changes
+
+
+@resource("worker_client")
+def get_worker_client():
+    """Pooled keep-alive client for the Cloudflare AI Worker, shared by every caller in the process."""
+    return WorkerClient(WORKER_URL)
 
-# 🌐 Your Cloudflare Worker URL
-WORKER_URL = "https://ai-name-corrector.YOUR-NAME.workers.dev/clean"  # <-- REPLACE this with your actual URL
 
 def correct_entity(name: str, entity_type: str = "name"):
     """
@@ -10,15 +20,44 @@ def correct_entity(name: str, entity_type: str = "name"):
     if not isinstance(name, str) or not name.strip():
         return name, 1.0  # skip empty values
 
+    cache = get_correction_cache()
+    cached = cache.get(entity_type, name, WORKER_ENGINE, WORKER_VERSION)
+    if cached is not None:
+        return cached, 0.98
+
     try:
-        response = requests.post(WORKER_URL, json={"name": name})
-        if response.status_code == 200:
-            data = response.json()
-            corrected = data.get("cleaned_name", name)
-            return corrected, 0.98  # assume high confidence
-        else:
-            print("⚠️ Worker Error:", response.text)
-            return name, 0.5
-    except Exception as e:
+        corrected = get_worker_client().clean(name)
+        cache.set(entity_type, name, WORKER_ENGINE, WORKER_VERSION, corrected)
+        return corrected, 0.98  # assume high confidence
+    except WorkerUnavailable as e:
         print("❌ Connection error:", e)
         return name, 0.5
+    except Exception as e:
+        print("⚠️ Worker Error:", e)
+        return name, 0.5
+
+
+def correct_entities(names, entity_type: str = "name"):
+    """
+    correct_entity for many names: cached ones are answered locally, the rest go to the
+    worker in concurrent /clean/batch requests. Returns {name: (corrected, confidence)}.
+    """
+    names = list(dict.fromkeys(names))
+    results = {n: (n, 1.0) for n in names if not isinstance(n, str) or not n.strip()}
+    pending = [n for n in names if n not in results]
+
+    cache = get_correction_cache()
+    cached = cache.get_many(entity_type, pending, WORKER_ENGINE, WORKER_VERSION)
+    misses = []
+    for name in pending:
+        hit = cached.get(cache.normalize(name))
+        if hit is None:
+            misses.append(name)
+        else:
+            results[name] = (hit, 0.98)
+
+    corrected = get_worker_client().clean_many(misses) if misses else {}
+    cache.set_many(entity_type, corrected, WORKER_ENGINE, WORKER_VERSION)
+    for name in misses:
+        results[name] = (corrected[name], 0.98) if name in corrected else (name, 0.5)
+    return results
@@ -1,3 +1,22 @@
+const MAX_BATCH = 1000; // names per /clean/batch request
+
+// Simple cleaning logic
+function cleanName(name) {
+  return String(name)
+    .trim()
+    .replace(/[^a-zA-Z\s]/g, "") // remove numbers/symbols
+    .replace(/\s+/g, " ") // fix spacing
+    .toLowerCase()
+    .replace(/\b\w/g, (c) => c.toUpperCase()); // capitalize each word
+}
+
+function json(body, status = 200) {
+  return new Response(JSON.stringify(body), {
+    status,
+    headers: { "Content-Type": "application/json" },
+  });
+}
+
 export default {
   async fetch(request) {
     const url = new URL(request.url);
@@ -6,24 +25,27 @@ export default {
     if (url.pathname === "/clean" && request.method === "POST") {
       try {
         const { name } = await request.json();
+        return json({ cleaned_name: cleanName(name) });
+      } catch (err) {
+        return json({ error: "Invalid request format" }, 400);
+      }
+    }
 
-        // Simple cleaning logic
-        const cleanedName = name
-          .trim()
-          .replace(/[^a-zA-Z\s]/g, "") // remove numbers/symbols
-          .replace(/\s+/g, " ") // fix spacing
-          .toLowerCase()
-          .replace(/\b\w/g, (c) => c.toUpperCase()); // capitalize each word
-
-        return new Response(JSON.stringify({ cleaned_name: cleanedName }), {
-          headers: { "Content-Type": "application/json" },
-        });
+    // Handle POST requests to /clean/batch: { names: [...] } -> { cleaned_names: [...] }, same order
+    if (url.pathname === "/clean/batch" && request.method === "POST") {
+      let names;
+      try {
+        ({ names } = await request.json());
       } catch (err) {
-        return new Response(
-          JSON.stringify({ error: "Invalid request format" }),
-          { status: 400, headers: { "Content-Type": "application/json" } }
-        );
+        return json({ error: "Invalid request format" }, 400);
+      }
+      if (!Array.isArray(names)) {
+        return json({ error: "Expected { names: [...] }" }, 400);
+      }
+      if (names.length > MAX_BATCH) {
+        return json({ error: `At most ${MAX_BATCH} names per batch` }, 413);
       }
+      return json({ cleaned_names: names.map(cleanName) });
     }
 
     // Default route
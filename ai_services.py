@@ -1,32 +1,26 @@
 # ai_services.py
-try:
-    import pkg_resources
-except ImportError:
-    pkg_resources = None
+import numpy as np
+import pandas as pd
+from symspellpy import Verbosity
 
-from symspellpy import SymSpell, Verbosity
-import os
+from resources import resource
+from symspell_index import load_default_index
 
-# Load SymSpell model safely
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
 
-# Try to find dictionary path (fallback if pkg_resources missing)
-if pkg_resources:
-    dictionary_path = pkg_resources.resource_filename("symspellpy", "frequency_dictionary_en_82_765.txt")
-else:
-    import symspellpy
-    base_dir = os.path.dirname(symspellpy.__file__)
-    dictionary_path = os.path.join(base_dir, "frequency_dictionary_en_82_765.txt")
-
-sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
+@resource("symspell")
+def get_sym_spell():
+    """
+    English + domain (cities, countries, companies) SymSpell index, memory-mapped
+    from the cache dir; built there on first use (see symspell_index).
+    """
+    return load_default_index()
 
 
-# Load the SymSpell model
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+def _suggest(text: str):
+    # The dictionary is lower-case; callers get title-cased terms back
+    suggestions = get_sym_spell().lookup(text.lower(), Verbosity.CLOSEST, max_edit_distance=2)
+    return suggestions[0] if suggestions else None
 
-# Add an English frequency dictionary (bundled with the package)
-dictionary_path = pkg_resources.resource_filename("symspellpy", "frequency_dictionary_en_82_765.txt")
-sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
 
 def correct_text_with_ai(text):
     """
@@ -37,8 +31,65 @@ def correct_text_with_ai(text):
         return text
 
     text = text.strip().title()
-    suggestions = sym_spell.lookup(text, Verbosity.CLOSEST, max_edit_distance=2)
+    best = _suggest(text)
 
-    if suggestions:
-        return suggestions[0].term.title()
+    if best:
+        return best.term.title()
     return text
+
+
+def correct_text_with_confidence(text):
+    """
+    Same lookup as correct_text_with_ai, plus a confidence score:
+    1.0 for a known word, shrinking with the edit distance relative to the word length.
+    """
+    if not isinstance(text, str) or text.strip() == "":
+        return text, 0.0
+
+    text = text.strip().title()
+    best = _suggest(text)
+
+    if best:
+        return best.term.title(), max(0.0, 1.0 - best.distance / max(len(text), 1))
+    return text, 0.0
+
+
+def correct_texts_with_confidence(values):
+    """{value: (correction, confidence)} for many values, looking up each distinct word once."""
+    values = list(dict.fromkeys(values))
+    words = {v: v.strip().title() for v in values if isinstance(v, str) and v.strip()}
+    best = get_sym_spell().lookup_many(w.lower() for w in words.values())
+
+    results = {}
+    for value in values:
+        word = words.get(value)
+        if word is None:
+            results[value] = (value, 0.0)
+            continue
+        found = best[word.lower()]
+        if found is None:
+            results[value] = (word, 0.0)
+        else:
+            results[value] = (found.term.title(), max(0.0, 1.0 - found.distance / max(len(word), 1)))
+    return results
+
+
+def correct_column_with_ai(series: pd.Series) -> pd.Series:
+    """
+    correct_text_with_ai over a column: each distinct string is corrected once and mapped
+    back. Other cells are copied from the input (factorize treats True, 1 and 1.0 as one).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        corrected = correct_texts_with_confidence(categories)
+        return series.map({c: corrected[c][0] for c in categories})
+    codes, uniques = pd.factorize(series)
+    uniques = np.asarray(uniques, dtype=object)
+    text = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+    corrected = correct_texts_with_confidence(uniques[text])
+    mapped = uniques.copy()
+    mapped[text] = [corrected[u][0] for u in uniques[text]]
+    rows = text.take(codes.clip(min=0)) & (codes >= 0)
+    values = series.to_numpy(dtype=object, copy=True)
+    values[rows] = mapped[codes[rows]]
+    return pd.Series(values, index=series.index, name=series.name)
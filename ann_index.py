@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+
+# 🌍 Try importing optional ANN libraries
+try:
+    import hnswlib
+    HNSW_AVAILABLE = True
+except ImportError:
+    HNSW_AVAILABLE = False
+
+
+def _top_k(sims, k):
+    """Indices and scores of the k largest values in each row, best first."""
+    k = min(k, sims.shape[1])
+    if k == 1:
+        idx = np.argmax(sims, axis=1)[:, None]
+    else:
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(sims, idx, axis=1), axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+    return np.take_along_axis(sims, idx, axis=1), idx
+
+
+# -----------------------------------------
+# 🎯 1️⃣ Exact scan (pure NumPy, always available)
+# -----------------------------------------
+class ExactSearch:
+    """Brute-force inner-product search over normalized embeddings."""
+
+    name = "exact"
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    @classmethod
+    def build(cls, embeddings, path=None, **params):
+        return cls(embeddings)
+
+    def search(self, query_vectors, k: int = 1):
+        return _top_k(np.atleast_2d(query_vectors) @ self.embeddings.T, k)
+
+
+# -----------------------------------------
+# 🗂️ 2️⃣ Inverted-file index (pure NumPy k-means coarse quantizer)
+# -----------------------------------------
+class IVFSearch:
+    """
+    IVF-flat index: references are bucketed by their nearest k-means centroid and a
+    query only scans the `nprobe` closest buckets.
+    Knobs: nlist (number of buckets), nprobe (buckets scanned; higher = better recall, slower).
+    """
+
+    name = "ivf"
+
+    def __init__(self, embeddings, centroids, order, offsets, nprobe: int = 8):
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @staticmethod
+    def _train(embeddings, nlist, n_iter, seed, max_train_points):
+        rng = np.random.default_rng(seed)
+        n = embeddings.shape[0]
+        sample = rng.choice(n, size=min(n, max_train_points), replace=False)
+        train = np.asarray(embeddings[np.sort(sample)], dtype=np.float32)
+        centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty buckets with random training points
+                sums[empty] = train[rng.choice(len(train), size=int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+        return centroids.astype(np.float32)
+
+    @classmethod
+    def build(cls, embeddings, path=None, nlist: int = None, nprobe: int = 8,
+              n_iter: int = 20, seed: int = 0, max_train_points: int = 100_000, chunk_size: int = 65_536):
+        """Train (or load from `path`) the coarse quantizer and bucket all references."""
+        n = embeddings.shape[0]
+        nlist = max(1, min(n, nlist or int(4 * np.sqrt(n))))
+
+        if path and os.path.exists(path):
+            data = np.load(path)
+            if data["offsets"][-1] == n and len(data["centroids"]) == nlist:
+                return cls(embeddings, data["centroids"], data["order"], data["offsets"], nprobe)
+
+        centroids = cls._train(embeddings, nlist, n_iter, seed, max_train_points)
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, chunk_size):
+            block = np.asarray(embeddings[start:start + chunk_size])
+            assign[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, centroids=centroids, order=order, offsets=offsets)
+            os.replace(tmp_path, path)
+        return cls(embeddings, centroids, order, offsets, nprobe)
+
+    def search(self, query_vectors, k: int = 1):
+        query_vectors = np.atleast_2d(query_vectors)
+        nprobe = min(self.nprobe, len(self.centroids))
+        _, probes = _top_k(query_vectors @ self.centroids.T, nprobe)
+
+        scores = np.full((len(query_vectors), k), -np.inf, dtype=np.float32)
+        indices = np.zeros((len(query_vectors), k), dtype=np.int64)
+        for row, (query, buckets) in enumerate(zip(query_vectors, probes)):
+            candidates = np.sort(np.concatenate([self.order[self.offsets[b]:self.offsets[b + 1]] for b in buckets]))
+            if len(candidates) == 0:
+                continue
+            sims = np.asarray(self.embeddings[candidates]) @ query
+            top_scores, top_idx = _top_k(sims[None, :], k)
+            found = top_idx.shape[1]
+            scores[row, :found] = top_scores[0]
+            indices[row, :found] = candidates[top_idx[0]]
+        return scores, indices
+
+
+# -----------------------------------------
+# 🕸️ 3️⃣ HNSW graph (optional, needs hnswlib)
+# -----------------------------------------
+class HNSWSearch:
+    """
+    HNSW graph index via hnswlib.
+    Knobs: M and ef_construction (build quality), ef (query-time recall/latency trade-off).
+    """
+
+    name = "hnsw"
+
+    def __init__(self, graph, ef: int = 64):
+        self.graph = graph
+        self.graph.set_ef(ef)
+
+    @classmethod
+    def build(cls, embeddings, path=None, M: int = 16, ef_construction: int = 200, ef: int = 64, seed: int = 0):
+        if not HNSW_AVAILABLE:
+            raise ImportError("hnswlib is not installed; use the 'exact' or 'ivf' backend")
+
+        n, dim = embeddings.shape
+        graph = hnswlib.Index(space="ip", dim=dim)
+        if path and os.path.exists(path):
+            graph.load_index(path, max_elements=n)
+            if graph.get_current_count() == n:
+                return cls(graph, ef)
+
+        graph.init_index(max_elements=n, ef_construction=ef_construction, M=M, random_seed=seed)
+        graph.add_items(np.asarray(embeddings), np.arange(n))
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            graph.save_index(path)
+        return cls(graph, ef)
+
+    def search(self, query_vectors, k: int = 1):
+        labels, distances = self.graph.knn_query(np.atleast_2d(query_vectors), k=k)
+        # hnswlib's inner-product distance is 1 - similarity
+        return (1.0 - distances).astype(np.float32), labels.astype(np.int64)
+
+
+BACKENDS = {
+    ExactSearch.name: ExactSearch,
+    IVFSearch.name: IVFSearch,
+    HNSWSearch.name: HNSWSearch,
+}
+
+
+def build_backend(name: str, embeddings, path=None, **params):
+    """
+    Build a search backend by name ('exact', 'ivf', 'hnsw').
+    Falls back to the exact NumPy scan if the requested backend can't be built.
+    """
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown ANN backend {name!r}; choose from {sorted(BACKENDS)}")
+    try:
+        return backend.build(embeddings, path=path, **params)
+    except ImportError as e:
+        print("⚠️ ANN backend unavailable, using exact search:", e)
+        return ExactSearch(embeddings)
@@ -1,51 +1,50 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from openai import OpenAI
-import concurrent.futures
+from openai import AsyncOpenAI, OpenAI
 import re
-import tiktoken  # for accurate token estimation
+
+from config import OPENAI_BUDGET_USD, OPENAI_MAX_CONCURRENCY, OPENAI_RPM, OPENAI_TIMEOUT, OPENAI_TPM
+from correction_cache import get_correction_cache
+from correction_pipeline import CorrectionPipeline, default_tiers, llm_tier
+from data_io import EXTENSIONS, MEDIA_TYPES, read_table, to_bytes
+from dedup import DEFAULT_THRESHOLD, drop_near_duplicates
+from llm_correction import CELL_PROMPT_VERSION, LLM_MODEL, correct_value, count_tokens
+from llm_dispatch import LLMDispatcher
+from local_cleaning import clean_frame, locally_clean_header, text_columns
+import metrics
+from usage import BudgetExceeded, UsageMeter
 
 # ==================== 🧠 OpenAI Setup ====================
 client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
-# Token cost rates (USD per 1M tokens)
-COST_INPUT = 0.15 / 1_000_000  # gpt-4o-mini input
-COST_OUTPUT = 0.60 / 1_000_000  # gpt-4o-mini output
-
+# Async dispatch for bulk cell correction; retries are handled by the dispatcher, not the SDK
+dispatcher = LLMDispatcher(
+    client_factory=lambda: AsyncOpenAI(api_key=st.secrets["OPENAI_API_KEY"], max_retries=0),
+    requests_per_minute=OPENAI_RPM,
+    tokens_per_minute=OPENAI_TPM,
+    timeout=OPENAI_TIMEOUT,
+    max_concurrency=OPENAI_MAX_CONCURRENCY,
+)
 
-# ==================== ⚙️ Helper: Token Estimation ====================
-def estimate_tokens(text):
-    """Estimate token count for pricing."""
-    enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+# Correction cache keys: bump the version whenever a prompt changes
+HEADER_ENGINE, HEADER_PROMPT_VERSION = f"openai-header:{LLM_MODEL}", "1"
+CELL_ENGINE = f"openai-cell:{LLM_MODEL}"
 
 
-# ==================== ⚙️ Local Header Cleaning ====================
-def locally_clean_header(name: str):
-    """Perform fast local cleaning before using GPT."""
-    if not isinstance(name, str):
-        return name
-    name = name.strip().lower()
-    name = re.sub(r'[_\-]+', ' ', name)  # replace _ or - with space
-    name = re.sub(r'\s+', ' ', name)  # remove double spaces
-    name = name.replace('.', '').strip()
-    common_corrections = {
-        "fname": "first name",
-        "lname": "last name",
-        "phn": "phone",
-        "phn no": "phone number",
-        "rollno": "roll no",
-        "rool no": "roll no",
-        "empname": "employee name",
-        "emp id": "employee id",
-        "counntry": "country"
-    }
-    return common_corrections.get(name, name)
+# ==================== 💰 Cost Forecast ====================
+@st.cache_data(show_spinner=False)
+def forecast_cost(upload_key, _df):
+    """
+    Upper-bound GPT cost of cleaning `_df`, before anything is sent: distinct text
+    values after local cleaning that the correction cache can't already answer.
+    Computed once per upload (`upload_key`), not on every rerun.
+    """
+    frame = clean_frame(_df.rename(columns=locally_clean_header))
+    return llm_tier(dispatcher).cost({col: list(frame[col].dropna().unique()) for col in text_columns(frame)})
 
 
 # ==================== 🧠 GPT Header Correction ====================
-def correct_column_name(name: str):
+def correct_column_name(name: str, usage: UsageMeter = None):
     """Use GPT only if local cleaning didn't fix it."""
     if not isinstance(name, str) or not name.strip():
         return name
@@ -55,6 +54,11 @@ def correct_column_name(name: str):
     if re.match(r'^[a-z ]+$', local) and len(local) > 2:
         return local
 
+    cache = get_correction_cache()
+    cached = cache.get("header", name, HEADER_ENGINE, HEADER_PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
     try:
         prompt = f"""
 You are a data cleaning assistant. Correct any spelling, spacing, or casing mistakes in this column name.
@@ -69,44 +73,47 @@ Input: phn no → Output: phone number
 Now correct this:
 "{name}"
 """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=10,
-            temperature=0
-        )
-        return response.choices[0].message.content.strip().lower()
+        reservation = usage.reserve(LLM_MODEL, count_tokens(prompt), 10) if usage is not None else 0.0
+        try:
+            response = client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=10,
+                temperature=0
+            )
+        except Exception:
+            if usage is not None:
+                usage.release(reservation)
+            raise
+        if usage is not None:
+            usage.record(LLM_MODEL, response.usage, reservation)
+        corrected = response.choices[0].message.content.strip().lower()
+        cache.set("header", name, HEADER_ENGINE, HEADER_PROMPT_VERSION, corrected)
+        return corrected
+    except BudgetExceeded:
+        return local
     except Exception as e:
         print("⚠️ Column correction error:", e)
         return local
 
 
 # ==================== 🧹 AI Cell Correction ====================
-def correct_entity_openai(value: str, column_name: str = ""):
+def correct_entity_openai(value: str, column_name: str = "", usage: UsageMeter = None):
     """Use GPT to correct names, cities, or countries intelligently."""
     if not isinstance(value, str) or not value.strip():
         return value
-    try:
-        prompt = f"""
-You are a data cleaner AI. Correct any spelling mistakes, spacing issues, or capitalization in this {column_name} value.
-Return only the corrected text. Do not add explanations or extra words.
 
-Examples:
-Input: Imndfia → Output: India
-Input: mahendrasingh → Output: Mahendra Singh
-Input: pune → Output: Pune
+    cache = get_correction_cache()
+    cached = cache.get(column_name, value, CELL_ENGINE, CELL_PROMPT_VERSION)
+    if cached is not None:
+        return cached
 
-Now correct this:
-"{value}"
-"""
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=20,
-            temperature=0
-        )
-
-        return response.choices[0].message.content.strip()
+    try:
+        corrected = correct_value(client, value, column_name, usage=usage)
+        cache.set(column_name, value, CELL_ENGINE, CELL_PROMPT_VERSION, corrected)
+        return corrected
+    except BudgetExceeded:
+        return value
     except Exception as e:
         print("⚠️ OpenAI error:", e)
         return value
@@ -139,89 +146,103 @@ st.title("✨ CleanChain AI — Smart Data Cleaner")
 st.caption("🚀 Instantly clean, correct & format your data using OpenAI GPT")
 
 # ==================== 📤 File Upload ====================
-uploaded_file = st.file_uploader("📤 Upload CSV or Excel file", type=["csv", "xlsx", "xls"])
+uploaded_file = st.file_uploader("📤 Upload CSV, Excel, Parquet or Arrow file",
+                                 type=["csv", "xlsx", "xls", "parquet", "arrow", "feather"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith(".csv") else pd.read_excel(uploaded_file)
+    df = read_table(uploaded_file, uploaded_file.name)
     st.write("### 🧾 Original Data Preview")
     st.dataframe(df.head(), use_container_width=True)
 
+    merge_near_duplicates = st.checkbox("🧬 Merge near-duplicate rows (typos, casing, punctuation)")
+    dedupe_threshold = st.slider("Similarity threshold", 0.5, 1.0, DEFAULT_THRESHOLD, 0.05,
+                                 disabled=not merge_near_duplicates)
+
+    forecast = forecast_cost((uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None)), df)
+    st.markdown(f"💰 *Forecast OpenAI cost (at most): ${forecast:.4f} USD — cached values are free*")
+    budget = st.number_input("💵 Budget for this run (USD, 0 = unlimited)", min_value=0.0,
+                             value=OPENAI_BUDGET_USD, step=0.05, format="%.2f")
+    profile_run = st.checkbox("🔬 Profile this run (stage timings are always shown)")
+
     if st.button("✨ Clean & Correct Data"):
         progress = st.progress(0)
+        usage = UsageMeter(budget)
         with st.spinner("AI is cleaning your data... ⏳"):
 
-            # Step 1️⃣ — Correct Column Headers (Local + GPT fallback)
-            st.write("🧭 Correcting column headers...")
-            new_columns = []
-            for col in df.columns:
-                corrected = correct_column_name(col)
-                new_columns.append(corrected)
-            df.columns = new_columns  # ✅ actually updates DataFrame headers
-
-            # Step 2️⃣ — Local Cleaning
-            progress.progress(25)
-            df = df.applymap(lambda x: x.strip().title() if isinstance(x, str) else x)
-            df = df.drop_duplicates()
-
-            # Step 3️⃣ — GPT Cleaning for Text Columns
-            progress.progress(50)
-            cache = {}
-            text_columns = df.select_dtypes(include=["object"]).columns
-            total_input_tokens, total_output_tokens = 0, 0
-
-            # Process in parallel
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = []
-                for col in text_columns:
-                    st.write(f"🧹 Cleaning column: {col}")
-                    for i, val in enumerate(df[col]):
-                        key = (col, str(val).strip().lower())
-                        if key not in cache:
-                            futures.append(executor.submit(correct_entity_openai, val, col))
-                results = [f.result() for f in futures]
-
-            # Step 4️⃣ — Apply Results Back
-            idx = 0
-            for col in text_columns:
-                new_col = []
-                for val in df[col]:
-                    key = (col, str(val).strip().lower())
-                    if key not in cache:
-                        cache[key] = results[idx]
-                        idx += 1
-                    new_col.append(cache[key])
-                df[col] = new_col
-
-            # Step 5️⃣ — Cost Estimation
-            progress.progress(90)
-            for col in text_columns:
-                for val in df[col]:
-                    total_input_tokens += estimate_tokens(str(val))
-                    total_output_tokens += estimate_tokens(str(val))
-            estimated_cost = (total_input_tokens * COST_INPUT) + (total_output_tokens * COST_OUTPUT)
-
-            # Step 6️⃣ — Display & Download
+            with metrics.job("streamlit", profile=profile_run) as trace:
+                # Step 1️⃣ — Correct Column Headers (Local + GPT fallback)
+                st.write("🧭 Correcting column headers...")
+                with metrics.stage("header_correction"):
+                    new_columns = []
+                    for col in df.columns:
+                        corrected = correct_column_name(col, usage)
+                        new_columns.append(corrected)
+                    df.columns = new_columns  # ✅ actually updates DataFrame headers
+
+                # Step 2️⃣ — Local Cleaning
+                progress.progress(25)
+                with metrics.stage("local_clean"):
+                    df = clean_frame(df)
+                with metrics.stage("dedupe"):
+                    df = df.drop_duplicates()
+                    merge_report = None
+                    if merge_near_duplicates:
+                        df, merge_report = drop_near_duplicates(df, threshold=dedupe_threshold)
+
+                # Step 3️⃣ — Tiered Cleaning for Text Columns
+                # exact → dictionary → fuzzy → embedding → GPT: each distinct value stops at the
+                # first tier confident enough, so only the leftovers cost API calls.
+                progress.progress(50)
+                cache = get_correction_cache()
+                columns = text_columns(df)
+
+                st.write(f"🧹 Cleaning columns: {', '.join(map(str, columns))}")
+                pipeline = CorrectionPipeline(default_tiers(dispatcher, usage=usage))
+                corrections = pipeline.run({col: df[col].unique() for col in columns})
+
+                # Step 4️⃣ — Apply Results Back (categorical columns only map their categories)
+                progress.progress(90)
+                with metrics.stage("apply"):
+                    for col in columns:
+                        mapping = corrections[col]
+                        df[col] = df[col].map(lambda val: mapping.get(val, val) if isinstance(val, str) else val)
+
+            # Step 5️⃣ — Display
             progress.progress(100)
             st.success("✅ AI Cleaning Complete!")
             st.balloons()
 
             st.write("### 🧼 Cleaned Data Preview")
             st.dataframe(df.head(), use_container_width=True)
-            st.markdown(f"### 💰 *Estimated OpenAI Cost: ${estimated_cost:.4f} USD*")
-
-            csv_data = df.to_csv(index=False).encode("utf-8")
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-                df.to_excel(writer, index=False, sheet_name="CleanedData")
-            excel_data = excel_buffer.getvalue()
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.download_button("⬇️ Download CSV", csv_data, "cleaned_data.csv", "text/csv")
-            with col2:
-                st.download_button(
-                    "📊 Download Excel",
-                    excel_data,
-                    "cleaned_data.xlsx",
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+            spent = usage.summary()
+            st.markdown(f"### 💰 *OpenAI Cost: ${spent['cost_usd']:.4f} USD*")
+            st.caption(f"🔢 {spent['requests']} requests · {spent['prompt_tokens']:,} input + "
+                       f"{spent['completion_tokens']:,} output tokens (forecast was ${forecast:.4f})")
+            if usage.exhausted:
+                st.warning(f"💵 Budget of ${budget:.2f} reached: {spent['blocked_requests']} requests were not "
+                           f"sent and those values were left as they were.")
+            cell_stats = cache.stats().get(CELL_ENGINE, {})
+            st.caption(f"🗃️ Correction cache hit rate: {cell_stats.get('hit_rate', 0.0):.0%}")
+            if merge_report is not None:
+                st.write(f"### 🧬 Merged Near-Duplicates ({len(merge_report)} rows)")
+                st.dataframe(merge_report, use_container_width=True)
+            st.write("### 🪜 Correction Tiers")
+            st.dataframe(pd.DataFrame(pipeline.report()), use_container_width=True)
+            st.write("### ⏱️ Stage Timings")
+            st.dataframe(pd.DataFrame(list(trace.timings().items()), columns=["stage", "seconds"]),
+                         use_container_width=True)
+            if trace.profile:
+                st.write("### 🔬 Profile (share of wall time)")
+                st.dataframe(pd.DataFrame(trace.profile), use_container_width=True)
+            st.session_state["cleaned"] = (uploaded_file.name, df)
+
+    # Step 6️⃣ — Download: kept across reruns; only the chosen format is serialized
+    cleaned = st.session_state.get("cleaned")
+    if cleaned is not None and cleaned[0] == uploaded_file.name:
+        formats = {"CSV": "csv", "Excel": "excel", "Parquet": "parquet", "Arrow": "arrow"}
+        choice = st.radio("Download format", list(formats), horizontal=True)
+        fmt = formats[choice]
+        with metrics.stage("export"):
+            data = to_bytes(cleaned[1], fmt)
+        st.download_button(f"⬇️ Download {choice}", data,
+                           f"cleaned_data{EXTENSIONS[fmt]}", MEDIA_TYPES[fmt])
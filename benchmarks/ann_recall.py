@@ -0,0 +1,93 @@
+"""
+Recall@1 and latency of the ANN backends against the exact scan on cities.csv.
+
+Usage:
+    python -m benchmarks.ann_recall --queries 2000 --nprobe 1 4 8 16
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from ann_index import HNSW_AVAILABLE, ExactSearch, build_backend
+from config import BASE_DIR, CACHE_DIR, MODEL_NAME
+from data_sources import get_model
+from reference_index import ReferenceIndex
+
+
+def make_typo(text: str, rng: random.Random) -> str:
+    """Inject one random edit (drop, swap, duplicate) so queries aren't exact references."""
+    if len(text) < 3:
+        return text
+    i = rng.randrange(len(text) - 1)
+    op = rng.choice(("drop", "swap", "dup"))
+    if op == "drop":
+        return text[:i] + text[i + 1:]
+    if op == "swap":
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + text[i] + text[i:]
+
+
+def timed_search(searcher, queries, k=1):
+    start = time.perf_counter()
+    _, idx = searcher.search(queries, k=k)
+    return idx[:, 0], (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def run(n_queries: int, nprobes, efs, seed: int, cache_dir: str):
+    cities = pd.read_csv(os.path.join(BASE_DIR, "cities.csv"), keep_default_na=False).iloc[:, 0]
+    names = list(dict.fromkeys(str(c).strip() for c in cities if str(c).strip()))
+
+    model = get_model()
+    index = ReferenceIndex.build(names, model, MODEL_NAME, cache_dir=cache_dir, backend="exact")
+
+    rng = random.Random(seed)
+    queries = [make_typo(rng.choice(names), rng) for _ in range(n_queries)]
+    vectors = index.encode_queries(model, queries)
+
+    truth, exact_us = timed_search(ExactSearch(index.embeddings), vectors)
+    results = [{"backend": "exact", "params": {}, "recall@1": 1.0, "us_per_query": round(exact_us, 1)}]
+
+    base_path = ReferenceIndex.cache_path(MODEL_NAME, index.checksum, cache_dir)[:-4]
+    for nprobe in nprobes:
+        searcher = build_backend("ivf", index.embeddings, path=f"{base_path}.ivf", nprobe=nprobe)
+        found, us = timed_search(searcher, vectors)
+        results.append({"backend": "ivf", "params": {"nprobe": nprobe, "nlist": len(searcher.centroids)},
+                        "recall@1": float(np.mean(found == truth)), "us_per_query": round(us, 1)})
+
+    if HNSW_AVAILABLE:
+        for ef in efs:
+            searcher = build_backend("hnsw", index.embeddings, path=f"{base_path}.hnsw", ef=ef)
+            found, us = timed_search(searcher, vectors)
+            results.append({"backend": "hnsw", "params": {"ef": ef},
+                            "recall@1": float(np.mean(found == truth)), "us_per_query": round(us, 1)})
+
+    return {"references": len(names), "queries": n_queries, "model": MODEL_NAME, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    report = run(args.queries, args.nprobe, args.ef, args.seed, args.cache_dir)
+    print(f"📊 {report['queries']} typo queries against {report['references']} cities ({report['model']})")
+    for r in report["results"]:
+        print(f"  {r['backend']:<6} {str(r['params']):<28} recall@1={r['recall@1']:.3f}  {r['us_per_query']:>9.1f} µs/query")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Throughput, p50/p99 latency, peak memory and accuracy of the correction engines on
+synthetic dirty data (see benchmarks.dirty_data).
+
+Each engine runs in a fresh process, so its peak RSS and resource loading are its
+own, against an empty correction cache. Resource loading is timed separately and not
+counted in throughput. "value" engines are timed per value; "batch" engines per call
+of --batch values. The LLM and worker engines talk to the local stubs in stubs/,
+started on a free port, so they measure the dispatch path rather than correction quality.
+
+Usage:
+    python -m benchmarks.correction_bench run --rows 20000 --cardinality 2000 --json bench.json
+    python -m benchmarks.correction_bench run --engines header symspell_column fuzzy_column
+    python -m benchmarks.correction_bench compare baseline.json bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.dirty_data import ENTITY_FILES, make_dataset, make_headers
+
+ENTITIES = tuple(ENTITY_FILES)
+Engine = namedtuple("Engine", "name kind columns setup")
+ENGINES = {}
+
+
+def engine(name: str, kind: str, columns=ENTITIES):
+    """Register setup(options) -> fn; fn(value, column) for 'value' engines, fn(values, column) for 'batch' ones."""
+    def decorator(setup):
+        ENGINES[name] = Engine(name, kind, tuple(columns), setup)
+        return setup
+    return decorator
+
+
+def serve(app_path: str) -> str:
+    """Start a stub ASGI app on a free local port in a background thread; returns its base URL."""
+    import uvicorn
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app_path, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+# ==================== 🏁 Engines ====================
+@engine("header", "value", ("header",))
+def header_engine(options):
+    from local_cleaning import locally_clean_header
+    locally_clean_header.cache_clear()
+    return lambda value, column: locally_clean_header(value)
+
+
+@engine("symspell", "value")
+def symspell_engine(options):
+    from ai_services import correct_text_with_ai, get_sym_spell
+    get_sym_spell()
+    return lambda value, column: correct_text_with_ai(value)
+
+
+@engine("symspell_column", "batch")
+def symspell_column_engine(options):
+    from ai_services import correct_column_with_ai, get_sym_spell
+    get_sym_spell()
+    return lambda values, column: correct_column_with_ai(pd.Series(values, dtype=object)).tolist()
+
+
+@engine("fuzzy", "value", ("country", "city"))
+def fuzzy_engine(options):
+    from ai_correction_api import build_reference_indexes, correct_entity_name
+    build_reference_indexes()
+    return lambda value, column: correct_entity_name(value, column)
+
+
+@engine("fuzzy_column", "batch", ("country", "city"))
+def fuzzy_column_engine(options):
+    # The fuzzy path of /correct_file
+    from ai_correction_api import build_reference_indexes, correct_frame
+    indexes = build_reference_indexes()
+    workers = options.get("workers")
+    return lambda values, column: correct_frame(pd.DataFrame({column: values}), {column: indexes[column]},
+                                                workers)[column].tolist()
+
+
+@engine("embedding", "value")
+def embedding_engine(options):
+    from data_sources import ai_correct_name, get_model, get_reference_index
+    get_model()
+    get_reference_index()
+    return lambda value, column: ai_correct_name(value)[0]
+
+
+@engine("embedding_column", "batch")
+def embedding_column_engine(options):
+    from data_sources import correct_column, get_entity_reference_index, get_model
+    get_model()
+    for entity in ENTITIES:
+        get_entity_reference_index(entity)
+    return lambda values, column: correct_column(pd.Series(values, dtype=object), column)[0].tolist()
+
+
+@engine("llm", "batch")
+def llm_engine(options):
+    from openai import AsyncOpenAI
+    from llm_correction import correct_columns_batched
+    from llm_dispatch import LLMDispatcher
+
+    base_url = serve("stubs.openai_stub:app")
+    clients = []  # kept alive: a client collected after its event loop closed logs a spurious error
+
+    def client_factory():
+        clients.append(AsyncOpenAI(base_url=f"{base_url}/v1", api_key="stub", max_retries=0))
+        return clients[-1]
+    dispatcher = LLMDispatcher(client_factory=client_factory)
+
+    def run(values, column):
+        found = correct_columns_batched(dispatcher, {column: values})[column]
+        return [found.get(v, v) for v in values]
+    return run
+
+
+@engine("worker", "batch")
+def worker_engine(options):
+    from worker_client import WorkerClient
+
+    client = WorkerClient(serve("stubs.worker_stub:app"))
+
+    def run(values, column):
+        found = client.clean_many(values)
+        return [found.get(v, v) for v in values]
+    return run
+
+
+# ==================== ⏱️ Measurement ====================
+def _same(a, b) -> bool:
+    """Accuracy ignores case and whitespace, which every engine normalizes differently."""
+    return " ".join(str(a).split()).casefold() == " ".join(str(b).split()).casefold()
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run_engine(name: str, data: dict, options: dict):
+    """Run one engine over every column it supports (meant for a fresh process)."""
+    spec = ENGINES[name]
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    fn = spec.setup(options)
+    setup_seconds = time.perf_counter() - start
+
+    latencies, correct, already_correct, total = [], 0, 0, 0
+    batch = options.get("batch", 1000)
+    for column in spec.columns:
+        if column not in data:
+            continue
+        values, truth = data[column]
+        if spec.kind == "value":
+            out = []
+            for value in values:
+                t = time.perf_counter()
+                out.append(fn(value, column))
+                latencies.append(time.perf_counter() - t)
+        else:
+            out = []
+            for i in range(0, len(values), batch):
+                t = time.perf_counter()
+                out.extend(fn(values[i:i + batch], column))
+                latencies.append(time.perf_counter() - t)
+        correct += sum(_same(o, e) for o, e in zip(out, truth))
+        already_correct += sum(_same(v, e) for v, e in zip(values, truth))
+        total += len(values)
+
+    seconds = float(np.sum(latencies)) if latencies else 0.0
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "engine": name,
+        "kind": spec.kind,
+        "columns": [c for c in spec.columns if c in data],
+        "values": total,
+        "setup_seconds": round(setup_seconds, 4),
+        "seconds": round(seconds, 4),
+        "values_per_second": round(total / seconds, 1) if seconds else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4) if latencies else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        "accuracy": round(correct / total, 4) if total else None,
+        "baseline_accuracy": round(already_correct / total, 4) if total else None,
+    }
+
+
+def run(engines, rows: int, cardinality: int, noise: float, max_edits: int, headers: int, seed: int,
+        batch: int, workers: int = None):
+    dirty, truth = make_dataset(rows, cardinality, noise, max_edits, seed=seed)
+    data = {c: (dirty[c].tolist(), truth[c].tolist()) for c in dirty.columns}
+    data["header"] = make_headers(headers, noise, seed)
+    options = {"batch": batch, "workers": workers}
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cleanchain-bench-") as tmp:
+        for name in engines:
+            # Every engine starts from an empty correction cache (read by config at import in the child)
+            os.environ["CLEANCHAIN_CORRECTION_CACHE"] = os.path.join(tmp, f"{name}.sqlite")
+            try:
+                with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(run_engine, name, data, options).result()
+            except Exception as e:
+                print(f"⚠️ {name} failed:", e)
+                result = {"engine": name, "error": str(e)}
+            results.append(result)
+        os.environ.pop("CLEANCHAIN_CORRECTION_CACHE", None)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "dataset": {"rows": rows, "cardinality": cardinality, "noise": noise, "max_edits": max_edits,
+                    "headers": headers, "seed": seed, "batch": batch},
+        "results": results,
+    }
+
+
+# ==================== 🔍 Regression check ====================
+# metric -> direction that is better
+METRICS = {"values_per_second": "higher", "p50_ms": "lower", "p99_ms": "lower", "peak_rss_mb": "lower",
+           "accuracy": "higher"}
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.25, accuracy_tolerance: float = 0.01):
+    """
+    Per engine and metric: (engine, metric, before, after, relative change, regressed).
+    Timing and memory regress when they get worse by more than `tolerance` (relative);
+    accuracy when it drops by more than `accuracy_tolerance` (absolute).
+    """
+    before = {r["engine"]: r for r in baseline["results"] if "error" not in r}
+    rows = []
+    for result in current["results"]:
+        old = before.get(result["engine"])
+        if old is None or "error" in result:
+            continue
+        for metric, better in METRICS.items():
+            a, b = old.get(metric), result.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            if metric == "accuracy":
+                regressed = a - b > accuracy_tolerance
+            else:
+                worse = -change if better == "higher" else change
+                regressed = worse > tolerance
+            rows.append((result["engine"], metric, a, b, change, regressed))
+    return rows
+
+
+def print_report(report: dict):
+    d = report["dataset"]
+    print(f"📊 {d['rows']:,} rows x {d['cardinality']:,} distinct values, noise {d['noise']}, "
+          f"{d['headers']:,} headers")
+    print(f"  {'engine':<17}{'values/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'setup s':>9}{'peak MB':>9}"
+          f"{'accuracy':>10}{'(before)':>10}")
+    for r in report["results"]:
+        if "error" in r:
+            print(f"  {r['engine']:<17}⚠️ {r['error']}")
+            continue
+        print(f"  {r['engine']:<17}{r['values_per_second'] or 0:>12,.0f}{r['p50_ms'] or 0:>10.3f}"
+              f"{r['p99_ms'] or 0:>10.3f}{r['setup_seconds']:>9.2f}{r['peak_rss_mb']:>9.0f}"
+              f"{r['accuracy'] or 0:>10.3f}{r['baseline_accuracy'] or 0:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser("run", help="benchmark the engines")
+    bench.add_argument("--engines", nargs="+", default=[e for e in ENGINES if not e.startswith("embedding")],
+                       choices=list(ENGINES), help="default: all but the embedding engines (they need the model)")
+    bench.add_argument("--rows", type=int, default=10_000)
+    bench.add_argument("--cardinality", type=int, default=1_000)
+    bench.add_argument("--noise", type=float, default=0.5)
+    bench.add_argument("--max-edits", type=int, default=1)
+    bench.add_argument("--headers", type=int, default=1_000)
+    bench.add_argument("--batch", type=int, default=1_000, help="values per call for batch engines")
+    bench.add_argument("--workers", type=int, help="process pool size for fuzzy_column")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--json", help="Write the results to this file")
+
+    diff = commands.add_parser("compare", help="compare two result files and flag regressions")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown / memory growth allowed")
+    diff.add_argument("--accuracy-tolerance", type=float, default=0.01, help="absolute accuracy drop allowed")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args.engines, args.rows, args.cardinality, args.noise, args.max_edits, args.headers,
+                     args.seed, args.batch, args.workers)
+        print_report(report)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["dataset"] != current["dataset"]:
+        print("⚠️ The runs used different datasets; differences may not be regressions")
+    rows = compare(baseline, current, args.tolerance, args.accuracy_tolerance)
+    for engine_name, metric, a, b, change, regressed in rows:
+        print(f"  {'❌' if regressed else '✅'} {engine_name:<17}{metric:<19}{a:>12,.4g} → {b:<12,.4g}{change:+.1%}")
+    regressions = sum(r[-1] for r in rows)
+    print(f"{regressions} regression(s)" if regressions else "No regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
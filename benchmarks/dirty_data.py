@@ -0,0 +1,150 @@
+"""
+Synthetic dirty data for the correction benchmarks.
+
+Clean values are sampled from the bundled cities.csv / countries.csv / companies.csv
+and each row is dirtied with probability `noise` by one or more of: keyboard typos,
+transpositions, dropped or doubled letters, casing and spacing noise. The clean value
+is kept next to each dirty one as ground truth.
+
+Usage:
+    python -m benchmarks.dirty_data --rows 100000 --cardinality 2000 --out dirty.csv
+"""
+import argparse
+import os
+import random
+
+import pandas as pd
+
+from config import BASE_DIR
+from local_cleaning import COMMON_HEADER_CORRECTIONS
+
+ENTITY_FILES = {"country": "countries.csv", "city": "cities.csv", "company": "companies.csv"}
+KEYBOARD_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+NEIGHBOURS = {
+    key: row[max(i - 1, 0):i] + row[i + 1:i + 2]
+    for row in KEYBOARD_ROWS for i, key in enumerate(row)
+}
+HEADERS = sorted(set(COMMON_HEADER_CORRECTIONS.values()) | {
+    "city", "country", "company", "email", "address", "date of birth", "salary", "department",
+})
+
+
+# ==================== 🔀 Noise ====================
+def typo(text: str, rng: random.Random) -> str:
+    """Replace one letter with a keyboard neighbour."""
+    letters = [i for i, c in enumerate(text) if c.lower() in NEIGHBOURS]
+    if not letters:
+        return text
+    i = rng.choice(letters)
+    replacement = rng.choice(NEIGHBOURS[text[i].lower()])
+    return text[:i] + (replacement.upper() if text[i].isupper() else replacement) + text[i + 1:]
+
+
+def transpose(text: str, rng: random.Random) -> str:
+    if len(text) < 2:
+        return text
+    i = rng.randrange(len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def drop(text: str, rng: random.Random) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(len(text))
+    return text[:i] + text[i + 1:]
+
+
+def double(text: str, rng: random.Random) -> str:
+    if not text:
+        return text
+    i = rng.randrange(len(text))
+    return text[:i] + text[i] + text[i:]
+
+
+def casing(text: str, rng: random.Random) -> str:
+    return rng.choice((str.lower, str.upper, str.swapcase))(text)
+
+
+def spacing(text: str, rng: random.Random) -> str:
+    text = text.replace(" ", rng.choice(("  ", " ", "   ")))
+    return rng.choice(("", " ", "  ")) + text + rng.choice(("", " ", "\t"))
+
+
+EDITS = (typo, transpose, drop, double)  # change the spelling
+COSMETIC = (casing, spacing)  # change only case or whitespace
+
+
+def dirty(text: str, rng: random.Random, max_edits: int = 1) -> str:
+    """One or more spelling edits (up to `max_edits`), plus cosmetic noise half the time."""
+    for _ in range(rng.randint(1, max_edits)):
+        text = rng.choice(EDITS)(text, rng)
+    if rng.random() < 0.5:
+        text = rng.choice(COSMETIC)(text, rng)
+    return text
+
+
+# ==================== 🧪 Datasets ====================
+def clean_values(entity: str):
+    column = pd.read_csv(os.path.join(BASE_DIR, ENTITY_FILES[entity]), keep_default_na=False).iloc[:, 0]
+    return list(dict.fromkeys(str(v).strip() for v in column if str(v).strip()))
+
+
+def make_dataset(rows: int = 10_000, cardinality: int = 1_000, noise: float = 0.5, max_edits: int = 1,
+                 entities=tuple(ENTITY_FILES), seed: int = 0):
+    """
+    (dirty, truth) DataFrames with one column per entity. Each column draws its rows from
+    `cardinality` distinct clean values (fewer if the file has fewer), so repeated values
+    appear as they do in real uploads; each row is dirtied with probability `noise`.
+    """
+    rng = random.Random(seed)
+    dirty_columns, truth_columns = {}, {}
+    for entity in entities:
+        pool = clean_values(entity)
+        pool = rng.sample(pool, min(cardinality, len(pool)))
+        truth = [rng.choice(pool) for _ in range(rows)]
+        truth_columns[entity] = truth
+        dirty_columns[entity] = [dirty(v, rng, max_edits) if rng.random() < noise else v for v in truth]
+    return pd.DataFrame(dirty_columns), pd.DataFrame(truth_columns)
+
+
+def make_headers(count: int = 1_000, noise: float = 0.5, seed: int = 0):
+    """
+    (dirty, truth) header names: separators and casing as spreadsheets produce them
+    ('First_Name', 'EMP-ID'), known abbreviations ('fname'), and spelling noise.
+    """
+    rng = random.Random(seed)
+    abbreviations = {}
+    for short, full in COMMON_HEADER_CORRECTIONS.items():
+        abbreviations.setdefault(full, []).append(short)
+    dirty_headers, truth = [], []
+    for _ in range(count):
+        header = rng.choice(HEADERS)
+        text = rng.choice(abbreviations.get(header, [header]) + [header])
+        text = text.replace(" ", rng.choice((" ", "_", "-", ".")))
+        text = rng.choice((str.lower, str.title, str.upper))(text)
+        if rng.random() < noise:
+            text = dirty(text, rng)
+        dirty_headers.append(text)
+        truth.append(header)
+    return dirty_headers, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--cardinality", type=int, default=1_000, help="distinct clean values per column")
+    parser.add_argument("--noise", type=float, default=0.5, help="share of rows that get dirtied")
+    parser.add_argument("--max-edits", type=int, default=1, help="spelling edits per dirtied value")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="dirty.csv", help="dirty CSV; the truth goes next to it as *_truth.csv")
+    args = parser.parse_args()
+
+    dirty_df, truth_df = make_dataset(args.rows, args.cardinality, args.noise, args.max_edits, seed=args.seed)
+    dirty_df.to_csv(args.out, index=False)
+    truth_path = os.path.splitext(args.out)[0] + "_truth.csv"
+    truth_df.to_csv(truth_path, index=False)
+    print(f"🧪 {len(dirty_df):,} rows → {args.out} (truth: {truth_path})")
+
+
+if __name__ == "__main__":
+    main()
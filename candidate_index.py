@@ -0,0 +1,162 @@
+from collections import defaultdict
+
+import numpy as np
+from fuzzywuzzy import process
+from fuzzywuzzy.utils import full_process
+
+
+# -----------------------------------------
+# 🔤 Key helpers
+# -----------------------------------------
+def ngrams(text: str, n: int = 3):
+    """Character n-grams of a processed string, padded so short words still get grams."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+_SOUNDEX_CODES = {c: d for letters, d in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                                          ("l", "4"), ("mn", "5"), ("r", "6")) for c in letters}
+
+
+def soundex(word: str) -> str:
+    """Classic 4-character Soundex code ('' for words without letters)."""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code, last = letters[0].upper(), _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != last:
+            code += digit
+        if c not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def phonetic_key(text: str) -> str:
+    """Soundex of every token, so 'New Yrok' and 'New York' share a key."""
+    return " ".join(filter(None, (soundex(t) for t in text.split())))
+
+
+def deletes(text: str, max_distance: int = 1, prefix_length: int = 7):
+    """SymSpell-style delete variants of the prefix, up to max_distance deletions."""
+    text = text[:prefix_length]
+    variants = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def substrings(text: str, max_length: int):
+    """Every substring of text up to max_length characters."""
+    return {text[i:i + n] for n in range(1, max_length + 1) for i in range(len(text) - n + 1)}
+
+
+# -----------------------------------------
+# 🧱 Candidate index
+# -----------------------------------------
+class CandidateIndex:
+    """
+    Narrows a query to a few dozen likely references before exact fuzzy scoring.
+    Candidates come from a trigram inverted index, Soundex keys and a SymSpell-style
+    deletion index; only they are scored with fuzzywuzzy's WRatio, so the usual
+    `score > 80` threshold keeps its meaning while per-value cost stays flat.
+    WRatio also accepts partial-ratio hits that share no trigrams with the query: a short
+    name inside the query ('Kanungi' → 'Un') or a short query inside a name ('Xq' →
+    'Huixquilucan'). Short names are keyed by their whole text and short queries by the
+    infixes of every name, so those come back without scanning the list.
+    """
+
+    def __init__(self, names, limit: int = 50, max_distance: int = 1, prefix_length: int = 7,
+                 posting_budget: int = 20_000, short_length: int = 9, infix_length: int = 3):
+        self.names = list(names)
+        self.limit = limit
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.posting_budget = posting_budget
+        self.short_length = short_length
+        self.infix_length = infix_length
+
+        grams, phonetic, deleted = defaultdict(list), defaultdict(list), defaultdict(list)
+        short, infixes = defaultdict(list), defaultdict(list)
+        for i, name in enumerate(self.names):
+            processed = full_process(str(name))
+            if not processed:
+                continue
+            for g in ngrams(processed):
+                grams[g].append(i)
+            phonetic[phonetic_key(processed)].append(i)
+            for d in deletes(processed, max_distance, prefix_length):
+                deleted[d].append(i)
+
+            # WRatio's partial-ratio keys, on the ASCII-folded text WRatio itself scores
+            folded = full_process(str(name), force_ascii=True)
+            if 0 < len(folded) <= short_length:
+                short[folded].append(i)
+            for sub in substrings(folded, infix_length):
+                if 1.5 * len(sub) < len(folded) <= 8 * len(sub) and len(infixes[sub]) < limit:
+                    infixes[sub].append(i)
+
+        self.grams = {g: np.asarray(ids, dtype=np.int32) for g, ids in grams.items()}
+        self.phonetic = {k: np.asarray(ids, dtype=np.int32) for k, ids in phonetic.items()}
+        self.deleted = {k: np.asarray(ids, dtype=np.int32) for k, ids in deleted.items()}
+        self.short = {k: np.asarray(ids, dtype=np.int32) for k, ids in short.items()}
+        self.infixes = {k: np.asarray(ids, dtype=np.int32) for k, ids in infixes.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _gram_candidates(self, processed: str):
+        # Rarest grams first; stop once the posting budget is spent so common grams
+        # ('an', ' sa') don't turn every lookup back into a full scan.
+        postings = sorted((self.grams[g] for g in ngrams(processed) if g in self.grams), key=len)
+        selected, total = [], 0
+        for ids in postings:
+            if selected and total + len(ids) > self.posting_budget:
+                break
+            selected.append(ids)
+            total += len(ids)
+        if not selected:
+            return np.empty(0, dtype=np.int32)
+
+        ids, counts = np.unique(np.concatenate(selected), return_counts=True)
+        if len(ids) > self.limit:
+            ids = ids[np.argpartition(-counts, self.limit - 1)[:self.limit]]
+        return ids
+
+    def candidates(self, query: str):
+        """Candidate reference names for a query (order not meaningful)."""
+        processed = full_process(str(query))
+        if not processed:
+            return []
+
+        found = [self._gram_candidates(processed)]
+        key = phonetic_key(processed)
+        if key in self.phonetic:
+            found.append(self.phonetic[key][:self.limit])
+        for d in deletes(processed, self.max_distance, self.prefix_length):
+            if d in self.deleted:
+                found.append(self.deleted[d][:self.limit])
+
+        folded = full_process(str(query), force_ascii=True)
+        for sub in substrings(folded, self.short_length):
+            if sub in self.short:
+                found.append(self.short[sub][:self.limit])
+        if len(folded) <= self.infix_length and folded in self.infixes:
+            found.append(self.infixes[folded])
+
+        ids = np.unique(np.concatenate(found))
+        return [self.names[i] for i in ids]
+
+    def _extract(self, query: str, choices, score_cutoff: int, scorer):
+        if not choices:
+            return None
+        if scorer is None:
+            return process.extractOne(query, choices, score_cutoff=score_cutoff)
+        return process.extractOne(query, choices, scorer=scorer, score_cutoff=score_cutoff)
+
+    def extract_one(self, query: str, score_cutoff: int = 0, scorer=None):
+        """Drop-in for process.extractOne(query, names), scoring only the candidates."""
+        return self._extract(query, self.candidates(query), score_cutoff, scorer)
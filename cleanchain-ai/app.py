@@ -1,26 +1,40 @@
+import os
+import sys
+
 import streamlit as st
-import pandas as pd
+
+# Shared cleaning code lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_io import read_table, to_bytes  # noqa: E402
+from dedup import drop_near_duplicates  # noqa: E402
+from local_cleaning import clean_frame  # noqa: E402
 
 st.set_page_config(page_title="CleanChain AI", page_icon="✨")
 
 st.title("✨ CleanChain AI — Smart B2B Data Cleaner")
 
-uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
+uploaded_file = st.file_uploader("Upload your CSV file", type=["csv", "parquet", "arrow"])
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    df = read_table(uploaded_file, uploaded_file.name)
     st.write("### Original Data")
     st.dataframe(df.head())
 
+    merge_near_duplicates = st.checkbox("Also merge near-duplicate rows")
+
     if st.button("Clean My Data"):
         with st.spinner("Cleaning your data..."):
             # Simple cleaning logic
-            df = df.applymap(lambda x: x.strip().title() if isinstance(x, str) else x)
+            df = clean_frame(df)
             df = df.drop_duplicates()
+            if merge_near_duplicates:
+                df, merge_report = drop_near_duplicates(df)
+                st.write(f"Merged {len(merge_report)} near-duplicate rows")
+                st.dataframe(merge_report)
 
             st.success("✅ Data cleaned successfully!")
             st.write("### Cleaned Data")
             st.dataframe(df.head())
 
-            csv = df.to_csv(index=False).encode("utf-8")
+            csv = to_bytes(df, "csv")
             st.download_button("⬇️ Download Cleaned CSV", data=csv, file_name="cleaned_data.csv")
@@ -0,0 +1,72 @@
+import os
+
+# 📁 Bundled reference data lives next to this file; derived artifacts go to the cache dir
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("CLEANCHAIN_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# 🧠 Sentence embedding model used for reference matching
+MODEL_NAME = os.getenv("CLEANCHAIN_MODEL", "all-MiniLM-L6-v2")
+
+# 🔎 Reference search backend: 'exact' (NumPy scan), 'ivf' (NumPy IVF) or 'hnsw' (needs hnswlib)
+ANN_BACKEND = os.getenv("CLEANCHAIN_ANN_BACKEND", "exact")
+ANN_PARAMS = {
+    "ivf": {"nprobe": int(os.getenv("CLEANCHAIN_IVF_NPROBE", "8"))},
+    "hnsw": {"ef": int(os.getenv("CLEANCHAIN_HNSW_EF", "64"))},
+}
+
+# 🌊 Rows per chunk when streaming uploads through the API
+STREAM_CHUNK_ROWS = int(os.getenv("CLEANCHAIN_STREAM_CHUNK_ROWS", "50000"))
+
+# 🏹 Bytes per block for PyArrow's multithreaded CSV parser (blocks are parsed in parallel)
+ARROW_BLOCK_SIZE = int(os.getenv("CLEANCHAIN_ARROW_BLOCK_SIZE", str(4 * 1024 * 1024)))
+
+# 🔥 Resources loaded at API startup: comma-separated names, "all", or empty for fully lazy
+WARMUP_RESOURCES = [n.strip() for n in os.getenv("CLEANCHAIN_WARMUP", "").split(",") if n.strip()]
+
+# 🗃️ Persistent correction cache (SQLite/WAL + in-process LRU)
+CORRECTION_CACHE_PATH = os.getenv("CLEANCHAIN_CORRECTION_CACHE", os.path.join(CACHE_DIR, "corrections.sqlite"))
+CORRECTION_CACHE_LRU_SIZE = int(os.getenv("CLEANCHAIN_CORRECTION_CACHE_LRU", "100000"))
+CORRECTION_CACHE_TTL = float(os.getenv("CLEANCHAIN_CORRECTION_CACHE_TTL", str(30 * 24 * 3600)))  # seconds, 0 = never
+CORRECTION_CACHE_MAX_ENTRIES = int(os.getenv("CLEANCHAIN_CORRECTION_CACHE_MAX", "5000000"))
+
+# 🚦 OpenAI account limits for the async LLM dispatcher
+OPENAI_RPM = float(os.getenv("CLEANCHAIN_OPENAI_RPM", "500"))
+OPENAI_TPM = float(os.getenv("CLEANCHAIN_OPENAI_TPM", "200000"))
+OPENAI_TIMEOUT = float(os.getenv("CLEANCHAIN_OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("CLEANCHAIN_OPENAI_MAX_CONCURRENCY", "64"))
+OPENAI_BUDGET_USD = float(os.getenv("CLEANCHAIN_OPENAI_BUDGET", "0"))  # per job, 0 = unlimited
+
+# 🧵 Process pool for CPU-bound correction stages (fuzzy matching, spell checking, global cleaning),
+# one per API process: gunicorn.conf.py splits the CPUs between its workers
+PARALLEL_WORKERS = int(os.getenv("CLEANCHAIN_POOL_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_VALUES = int(os.getenv("CLEANCHAIN_PARALLEL_MIN_VALUES", "2000"))  # fewer distinct values run in-process
+
+# 💱 Date-versioned FX rate table (CSV or Parquet); refresh with `python -m fx_rates snapshot ...`
+FX_RATES_PATH = os.getenv("CLEANCHAIN_FX_RATES", os.path.join(CACHE_DIR, "fx_rates.csv"))
+
+# 🌐 Translation backend for global cleaning: 'google' (deep_translator) or 'stub' (offline, for tests)
+TRANSLATION_BACKEND = os.getenv("CLEANCHAIN_TRANSLATION_BACKEND", "google")
+
+# 📬 Background jobs for large files: SQLite job records + one directory per job
+JOBS_DB_PATH = os.getenv("CLEANCHAIN_JOBS_DB", os.path.join(CACHE_DIR, "jobs.sqlite"))
+JOBS_DIR = os.getenv("CLEANCHAIN_JOBS_DIR", os.path.join(CACHE_DIR, "jobs"))
+JOBS_CONCURRENCY = int(os.getenv("CLEANCHAIN_JOBS_CONCURRENCY", "2"))  # running jobs per process
+JOBS_TTL = float(os.getenv("CLEANCHAIN_JOBS_TTL", str(7 * 24 * 3600)))  # seconds finished jobs are kept, 0 = forever
+JOBS_MAX_ATTEMPTS = int(os.getenv("CLEANCHAIN_JOBS_MAX_ATTEMPTS", "3"))  # runs a job gets before a crashing one fails
+
+# ☁️ Cloudflare correction worker (ai_name_correction): pooled keep-alive client with batching and a circuit breaker
+WORKER_URL = os.getenv("CLEANCHAIN_WORKER_URL", "https://ai-name-corrector.YOUR-NAME.workers.dev")  # <-- your worker
+WORKER_TIMEOUT = float(os.getenv("CLEANCHAIN_WORKER_TIMEOUT", "10"))  # seconds per request
+WORKER_MAX_RETRIES = int(os.getenv("CLEANCHAIN_WORKER_MAX_RETRIES", "3"))
+WORKER_BATCH_SIZE = int(os.getenv("CLEANCHAIN_WORKER_BATCH_SIZE", "200"))  # names per /clean/batch request
+WORKER_CONCURRENCY = int(os.getenv("CLEANCHAIN_WORKER_CONCURRENCY", "8"))  # requests in flight / pooled connections
+WORKER_BREAKER_FAILURES = int(os.getenv("CLEANCHAIN_WORKER_BREAKER_FAILURES", "5"))  # consecutive failures to open
+WORKER_BREAKER_RESET = float(os.getenv("CLEANCHAIN_WORKER_BREAKER_RESET", "30"))  # seconds before a trial request
+
+# 📈 Instrumentation: stage timings and counters (/metrics), JSON job logs, opt-in sampling profiler
+METRICS_LOG_DIR = os.getenv("CLEANCHAIN_METRICS_LOG_DIR", os.path.join(BASE_DIR, "logs"))  # empty = no log files
+PROFILE_JOBS = os.getenv("CLEANCHAIN_PROFILE", "0") == "1"  # profile every job, not only those that ask
+PROFILE_INTERVAL = float(os.getenv("CLEANCHAIN_PROFILE_INTERVAL", "0.005"))  # seconds between stack samples
+# Shared by every process serving /metrics (e.g. gunicorn workers); empty = this process's counts only
+METRICS_DIR = os.getenv("CLEANCHAIN_METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("CLEANCHAIN_METRICS_FLUSH_INTERVAL", "5"))  # seconds
@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import metrics
+from config import CORRECTION_CACHE_LRU_SIZE, CORRECTION_CACHE_MAX_ENTRIES, CORRECTION_CACHE_PATH, CORRECTION_CACHE_TTL
+from resources import resource
+
+_MISSING = object()
+_SPACES = re.compile(r"\s+")
+
+
+class CorrectionCache:
+    """
+    Persistent correction cache shared across runs, processes and services.
+    Keyed by (scope, normalized value, engine, engine version); scope is the entity type
+    or column name. Backed by SQLite in WAL mode with an in-process LRU in front,
+    TTL + size-based eviction, and hit/miss counters per engine.
+    """
+
+    def __init__(self, path: str = CORRECTION_CACHE_PATH, lru_size: int = CORRECTION_CACHE_LRU_SIZE,
+                 ttl: float = CORRECTION_CACHE_TTL, max_entries: int = CORRECTION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.lru_size = lru_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru = OrderedDict()
+        self.counters = Counter()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+        self._writes_since_evict = 0
+
+    # ---------- storage ----------
+    def _connection(self):
+        # Reconnect after fork: SQLite connections must not cross process boundaries
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS corrections (
+                    scope TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    engine TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (scope, value, engine, version)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS corrections_created ON corrections (created)")
+            self._conn, self._pid = conn, os.getpid()
+            self.lru.clear()
+        return self._conn
+
+    @staticmethod
+    def normalize(value) -> str:
+        """Cache key form of a value: trimmed, single-spaced, case-folded."""
+        return _SPACES.sub(" ", str(value).strip()).casefold()
+
+    def key(self, value, exact: bool = False) -> str:
+        """The form `value` is stored under: normalized, or as-is with `exact`."""
+        return str(value) if exact else self.normalize(value)
+
+    def _remember(self, key, result):
+        self.lru[key] = result
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    # ---------- lookups ----------
+    def get(self, scope: str, value, engine: str, version: str = "", default=None, exact: bool = False):
+        """Cached result for one value, or `default` on a miss."""
+        return self.get_many(scope, [value], engine, version, exact=exact).get(self.key(value, exact), default)
+
+    def get_many(self, scope: str, values, engine: str, version: str = "", count: bool = True,
+                 exact: bool = False):
+        """
+        Cached results for many values as {normalized value: result}; misses are left out.
+        `count=False` peeks (e.g. for a cost forecast) without touching the hit/miss counters.
+        `exact` keys values as they are, for engines whose output depends on case or spacing.
+        """
+        keys = list(dict.fromkeys(self.key(v, exact) for v in values))
+        found, pending = {}, []
+        with self._lock:
+            for norm in keys:
+                result = self.lru.get((scope, norm, engine, version), _MISSING)
+                if result is _MISSING:
+                    pending.append(norm)
+                else:
+                    self.lru.move_to_end((scope, norm, engine, version))
+                    found[norm] = result
+            memory_hits = len(found)
+            if count:
+                self.counters[f"{engine}.memory_hits"] += memory_hits
+
+            conn = self._connection()
+            for start in range(0, len(pending), 500):  # stay under SQLite's variable limit
+                batch = pending[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT value, result, created FROM corrections WHERE scope = ? AND engine = ? AND version = ? "
+                    f"AND value IN ({','.join('?' * len(batch))})",
+                    [scope, engine, version, *batch],
+                ).fetchall()
+                for norm, result, created in rows:
+                    if self._expired(created):
+                        continue
+                    found[norm] = json.loads(result)
+                    self._remember((scope, norm, engine, version), found[norm])
+                    if count:
+                        self.counters[f"{engine}.disk_hits"] += 1
+
+            if count:
+                self.counters[f"{engine}.misses"] += len(keys) - len(found)
+        if count:
+            metrics.inc("cleanchain_cache_lookups_total", memory_hits, engine=engine, result="memory_hit")
+            metrics.inc("cleanchain_cache_lookups_total", len(found) - memory_hits, engine=engine, result="disk_hit")
+            metrics.inc("cleanchain_cache_lookups_total", len(keys) - len(found), engine=engine, result="miss")
+        return found
+
+    # ---------- writes ----------
+    def set(self, scope: str, value, engine: str, version: str, result, exact: bool = False):
+        self.set_many(scope, {value: result}, engine, version, exact=exact)
+
+    def set_many(self, scope: str, results: dict, engine: str, version: str = "", exact: bool = False):
+        """Store {value: result} pairs; results must be JSON-serializable."""
+        now = time.time()
+        rows = [(scope, self.key(v, exact), engine, version, json.dumps(r), now) for v, r in results.items()]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO corrections VALUES (?, ?, ?, ?, ?, ?)", rows)
+            for _, norm, _, _, payload, _ in rows:
+                # Round-trip through JSON so memory and disk hits look the same (lists, not tuples)
+                self._remember((scope, norm, engine, version), json.loads(payload))
+            self.counters[f"{engine}.writes"] += len(rows)
+            metrics.inc("cleanchain_cache_writes_total", len(rows), engine=engine)
+            self._writes_since_evict += len(rows)
+            if self._writes_since_evict >= 10_000:
+                self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if self.ttl:
+                    conn.execute("DELETE FROM corrections WHERE created < ?", (time.time() - self.ttl,))
+                if self.max_entries:
+                    (count,) = conn.execute("SELECT COUNT(*) FROM corrections").fetchone()
+                    if count > self.max_entries:
+                        conn.execute(
+                            "DELETE FROM corrections WHERE (scope, value, engine, version) IN "
+                            "(SELECT scope, value, engine, version FROM corrections ORDER BY created LIMIT ?)",
+                            (count - self.max_entries,),
+                        )
+            self._writes_since_evict = 0
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM corrections")
+            self.lru.clear()
+
+    # ---------- stats ----------
+    def stats(self):
+        """Hit/miss counters per engine plus overall hit rate."""
+        per_engine = {}
+        for key, count in self.counters.items():
+            engine, counter = key.rsplit(".", 1)
+            per_engine.setdefault(engine, Counter())[counter] += count
+        report = {}
+        for engine, c in per_engine.items():
+            hits = c["memory_hits"] + c["disk_hits"]
+            lookups = hits + c["misses"]
+            report[engine] = {**c, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+        return report
+
+
+@resource("correction_cache")
+def get_correction_cache():
+    """Process-wide correction cache."""
+    return CorrectionCache()
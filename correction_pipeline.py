@@ -0,0 +1,239 @@
+import time
+
+from fuzzywuzzy import fuzz
+
+import metrics
+import resources
+from correction_cache import get_correction_cache
+from data_sources import correct_column, entity_key, get_entity_candidate_index, get_references
+from llm_correction import BATCH_PROMPT_VERSION, LLM_MODEL, correct_columns_batched, forecast_batched
+
+DEFAULT_THRESHOLDS = {
+    "exact": 1.0,
+    "dictionary": 0.9,
+    "fuzzy": 0.85,
+    "embedding": 0.75,
+    "llm": 0.0,
+}
+
+
+class Tier:
+    """
+    One correction engine in the cascade.
+    `correct` takes {column: [values]} and returns {column: {value: (corrected, confidence)}};
+    values it can't judge may be left out. Results below `threshold` escalate to the next tier.
+    `cost` optionally forecasts the USD {column: [values]} would cost; `usage` is the
+    UsageMeter the tier records its actual spend on.
+    """
+
+    def __init__(self, name: str, correct, threshold: float = 1.0, cost=None, usage=None):
+        self.name = name
+        self.correct = correct
+        self.threshold = threshold
+        self.cost = cost
+        self.usage = usage
+
+
+def per_column(fn):
+    """Adapt fn(values, column) -> {value: (corrected, confidence)} to the Tier interface."""
+    def correct(values_by_column):
+        return {col: fn(values, col) for col, values in values_by_column.items() if values}
+    return correct
+
+
+# ==================== 🪜 Built-in tiers ====================
+def exact_lookup(values, column):
+    """Case/space-insensitive exact match against the column's reference list."""
+    entity = entity_key(column)
+    if entity is None:
+        return {}
+    lookup = resources.get_or_load(
+        f"exact_lookup:{entity}",
+        lambda: {" ".join(name.split()).casefold(): name for name in get_references(entity)},
+    )
+    found = {}
+    for value in values:
+        match = lookup.get(" ".join(value.split()).casefold())
+        if match is not None:
+            found[value] = (match, 1.0)
+    return found
+
+
+def dictionary_lookup(values, column):
+    """
+    SymSpell word-dictionary correction (ai_services), for columns without a reference
+    list only: on city/country/company columns an English word one edit away from a
+    correct name would otherwise be accepted before the reference tiers see it.
+    Words already spelled right keep their casing.
+    """
+    if entity_key(column) is not None:
+        return {}
+    from ai_services import correct_texts_with_confidence
+    found = {}
+    for value, (corrected, confidence) in correct_texts_with_confidence(values).items():
+        if corrected.casefold() == " ".join(value.split()).casefold():
+            corrected = value
+        found[value] = (corrected, confidence)
+    return found
+
+
+def fuzzy_lookup(values, column):
+    """
+    Candidate-index match against the column's reference list. Scored with plain
+    Levenshtein ratio: WRatio's partial matching rates 'Mumbay' → 'Bay' at 90,
+    which is fine behind `score > 80` but too generous to stop escalation on.
+    """
+    entity = entity_key(column)
+    if entity is None:
+        return {}
+    index = get_entity_candidate_index(entity)
+    found = {}
+    for value in values:
+        match = index.extract_one(value, scorer=fuzz.ratio)
+        if match:
+            found[value] = (match[0], match[1] / 100)
+    return found
+
+
+def embedding_lookup(values, column):
+    """Batched sentence-embedding match against the column's reference list."""
+    entity = entity_key(column)
+    if entity is None:
+        return {}
+    corrected, confidence = correct_column(values, entity)
+    return {v: (c, float(s)) for v, c, s in zip(values, corrected, confidence)}
+
+
+def llm_tier(dispatcher, engine: str = f"openai-cell:{LLM_MODEL}", version: str = BATCH_PROMPT_VERSION,
+             usage=None):
+    """
+    GPT batches via the async dispatcher, answered from the correction cache where possible.
+    Actual token usage goes to `usage` (a UsageMeter), whose budget stops dispatch.
+    """
+    def uncached(values_by_column, count=True):
+        cache = get_correction_cache()
+        hits = {col: cache.get_many(col, values, engine, version, count=count)
+                for col, values in values_by_column.items()}
+        return hits, {col: [v for v in values if cache.normalize(v) not in hits[col]]
+                      for col, values in values_by_column.items()}
+
+    def correct(values_by_column):
+        cache = get_correction_cache()
+        hits, missing = uncached(values_by_column)
+        results = {col: {v: (hits[col][cache.normalize(v)], 1.0) for v in values if cache.normalize(v) in hits[col]}
+                   for col, values in values_by_column.items()}
+
+        for col, fresh in correct_columns_batched(dispatcher, missing, usage=usage).items():
+            cache.set_many(col, fresh, engine, version)
+            results[col].update({v: (c, 1.0) for v, c in fresh.items()})
+        return results
+
+    def cost(values_by_column):
+        # Only values the cache can't answer are sent; peek without counting hits
+        return forecast_batched(uncached(values_by_column, count=False)[1])["cost_usd"]
+
+    return Tier("llm", correct, DEFAULT_THRESHOLDS["llm"], cost, usage)
+
+
+def default_tiers(dispatcher=None, thresholds: dict = None, embeddings: bool = True, usage=None):
+    """
+    exact → dictionary → fuzzy → embedding → LLM (the last two are optional).
+    Reference columns skip the dictionary tier; other columns skip exact/fuzzy/embedding.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    tiers = [
+        Tier("exact", per_column(exact_lookup), thresholds["exact"]),
+        Tier("dictionary", per_column(dictionary_lookup), thresholds["dictionary"]),
+        Tier("fuzzy", per_column(fuzzy_lookup), thresholds["fuzzy"]),
+    ]
+    if embeddings:
+        tiers.append(Tier("embedding", per_column(embedding_lookup), thresholds["embedding"]))
+    if dispatcher is not None:
+        llm = llm_tier(dispatcher, usage=usage)
+        llm.threshold = thresholds["llm"]
+        tiers.append(llm)
+    return tiers
+
+
+# ==================== 🔗 Cascade ====================
+class CorrectionPipeline:
+    """
+    Runs cheap tiers first and only escalates values whose confidence is below the
+    tier's threshold. Keeps per-tier counts of values seen/accepted, wall time,
+    forecast cost and (for tiers with a UsageMeter) actual cost.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.stats = {t.name: {"values": 0, "hits": 0, "escalated": 0, "seconds": 0.0, "forecast_usd": 0.0,
+                               "cost_usd": 0.0}
+                      for t in self.tiers}
+
+    def forecast(self, values_by_column: dict):
+        """
+        Upper-bound USD cost of run() before anything is sent: every distinct value is
+        assumed to escalate all the way (cached ones are free). Returns {tier: USD}.
+        """
+        unique = {
+            col: list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+            for col, values in values_by_column.items()
+        }
+        return {t.name: t.cost(unique) for t in self.tiers if t.cost is not None}
+
+    def run(self, values_by_column: dict):
+        """
+        Correct {column: values}. Each distinct string is handled once per column.
+        Returns {column: {value: corrected}}; values no tier accepted map to themselves.
+        """
+        unique = {
+            col: list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+            for col, values in values_by_column.items()
+        }
+        pending = dict(unique)
+        accepted = {col: {} for col in unique}
+
+        for tier in self.tiers:
+            pending = {col: values for col, values in pending.items() if values}
+            if not pending:
+                break
+            stats = self.stats[tier.name]
+            stats["values"] += sum(len(v) for v in pending.values())
+            if tier.cost is not None:
+                stats["forecast_usd"] += tier.cost(pending)
+
+            spent = tier.usage.cost_usd if tier.usage is not None else 0.0
+            start = time.perf_counter()
+            try:
+                with metrics.stage("correct", tier=tier.name):
+                    results = tier.correct(pending)
+            except Exception as e:
+                print(f"⚠️ {tier.name} tier failed, escalating:", e)
+                results = {}
+            stats["seconds"] += time.perf_counter() - start
+            if tier.usage is not None:
+                stats["cost_usd"] += tier.usage.cost_usd - spent
+
+            escalate = {}
+            for col, values in pending.items():
+                col_results = results.get(col, {})
+                escalate[col] = []
+                for value in values:
+                    corrected, confidence = col_results.get(value, (value, 0.0))
+                    if corrected and confidence >= tier.threshold:
+                        accepted[col][value] = corrected
+                        stats["hits"] += 1
+                    else:
+                        escalate[col].append(value)
+            escalated = sum(len(v) for v in escalate.values())
+            stats["escalated"] += escalated
+            metrics.inc("cleanchain_tier_values_total", escalated, tier=tier.name, outcome="escalated")
+            metrics.inc("cleanchain_tier_values_total", sum(len(v) for v in pending.values()) - escalated,
+                        tier=tier.name, outcome="accepted")
+            pending = escalate
+
+        return {col: {v: accepted[col].get(v, v) for v in values} for col, values in unique.items()}
+
+    def report(self):
+        """Per-tier stats as a list of rows (tier order)."""
+        return [{"tier": name, **{k: round(v, 6) if isinstance(v, float) else v for k, v in s.items()}}
+                for name, s in self.stats.items()]
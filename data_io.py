@@ -0,0 +1,330 @@
+"""
+Table I/O for every entry point: CSV, Parquet, Arrow IPC and Excel in, the same out.
+
+CSV is parsed with PyArrow's multithreaded reader and text columns come back
+dictionary-encoded (pandas categoricals), so cleaning and correction work on each
+distinct value once and the frame holds every string only once. Without pyarrow,
+CSV and Excel fall back to pandas.
+"""
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from config import ARROW_BLOCK_SIZE, STREAM_CHUNK_ROWS
+from streaming import iter_csv_chunks, stream_csv
+
+# 🏹 Optional columnar backend
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+FORMATS = {
+    ".csv": "csv", ".txt": "csv",
+    ".parquet": "parquet", ".pq": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+    ".xlsx": "excel", ".xls": "excel",
+}
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow", "excel": ".xlsx"}
+STREAMABLE = ("csv", "parquet", "arrow")  # formats stream_table can write chunk by chunk
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def detect_format(filename: str, default: str = "csv") -> str:
+    """Format name ('csv', 'parquet', 'arrow', 'excel') from a file name's extension."""
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower(), default)
+
+
+def _require_arrow(fmt: str):
+    if not PYARROW_AVAILABLE:
+        raise ImportError(f"pyarrow is required for {fmt} files")
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+# ==================== 📥 Reading ====================
+def _csv_options(column_types=None):
+    read = pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE)
+    # Match pandas: empty / NA-like cells are missing, dates stay text
+    convert = pa_csv.ConvertOptions(column_types=column_types or {}, strings_can_be_null=True,
+                                    auto_dict_encode=True, auto_dict_max_cardinality=2 ** 31 - 1,
+                                    timestamp_parsers=[])
+    return read, convert
+
+
+def _as_text(field_type) -> bool:
+    return (pa.types.is_string(field_type) or pa.types.is_large_string(field_type) or pa.types.is_null(field_type)
+            or pa.types.is_dictionary(field_type) or pa.types.is_temporal(field_type))
+
+
+def _dates_as_text(table):
+    # Dates Arrow inferred from CSV go back to their text, as pandas would read them
+    for i, field in enumerate(table.schema):
+        if pa.types.is_temporal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()).dictionary_encode())
+    return table
+
+
+def _to_pandas(table) -> pd.DataFrame:
+    table = table.unify_dictionaries()
+    # Free Arrow buffers column by column while converting instead of holding both copies
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_table(source, filename: str = None, fmt: str = None) -> pd.DataFrame:
+    """Read a whole file (path or file object) into a DataFrame; text columns are categoricals."""
+    fmt = fmt or detect_format(filename or (source if isinstance(source, str) else ""))
+    if fmt == "excel":
+        return pd.read_excel(source)
+    if fmt == "csv" and not PYARROW_AVAILABLE:
+        return pd.read_csv(source)
+    _require_arrow(fmt)
+    if fmt == "csv":
+        read, convert = _csv_options()
+        table = _dates_as_text(pa_csv.read_csv(source, read_options=read, convert_options=convert))
+    elif fmt == "parquet":
+        table = _parquet_file(source).read()
+    else:
+        table = _dictionary_encode_text(_read_ipc(source).read_all())
+    return _to_pandas(table)
+
+
+def _read_ipc(source):
+    """Arrow IPC reader for either the file or the streaming format."""
+    try:
+        return pa_ipc.open_file(source)
+    except pa.ArrowInvalid:
+        return pa_ipc.open_stream(_rewind(source))
+
+
+def _ipc_batches(source):
+    reader = _read_ipc(source)
+    if isinstance(reader, pa_ipc.RecordBatchFileReader):
+        return (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return reader
+
+
+def _parquet_file(source):
+    # Text columns are decoded straight into dictionary arrays, never as plain strings
+    schema = pq.read_schema(source)
+    text = [f.name for f in schema if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)]
+    return pq.ParquetFile(_rewind(source), read_dictionary=text)
+
+
+def _dictionary_encode_text(table):
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+    return table
+
+
+class InputError(ValueError):
+    """A file that can't be read as a table (corrupt, empty or not in its format)."""
+
+
+def iter_table_chunks(source, filename: str = None, fmt: str = None, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """
+    DataFrame chunks of about `chunk_rows` rows from a file (path or file object),
+    so the whole file is never in memory. Excel has no streaming reader and comes
+    back as one chunk. Read failures are raised as InputError.
+    """
+    chunks = _table_chunks(source, filename, fmt, chunk_rows)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except (ImportError, MemoryError):
+            raise  # our problem, not the file's
+        except Exception as e:
+            raise InputError(f"Could not read {os.path.basename(str(filename or 'the file'))}: {e}") from e
+        yield chunk
+
+
+def _table_chunks(source, filename: str = None, fmt: str = None, chunk_rows: int = STREAM_CHUNK_ROWS):
+    if isinstance(source, str):
+        # Arrow buffers a whole file opened by path; a file object keeps reads to the current block
+        with open(source, "rb") as f:
+            yield from _table_chunks(f, filename or source, fmt, chunk_rows)
+        return
+    fmt = fmt or detect_format(filename)
+    if fmt == "excel":
+        yield pd.read_excel(source)
+        return
+    if fmt == "csv" and not PYARROW_AVAILABLE:
+        yield from iter_csv_chunks(source, chunk_rows)
+        return
+    _require_arrow(fmt)
+    casts = {}
+    if fmt == "csv":
+        batches, casts = _csv_batches(source, chunk_rows)
+    elif fmt == "parquet":
+        batches = _parquet_file(source).iter_batches(batch_size=chunk_rows)
+    else:
+        batches = (_dictionary_encode_text(pa.Table.from_batches([b])) for b in _ipc_batches(source))
+
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch]))
+        rows += batch.num_rows
+        if rows >= chunk_rows:
+            yield _to_pandas(_cast_columns(pa.concat_tables(pending), casts))
+            pending, rows = [], 0
+    if pending:
+        yield _to_pandas(_cast_columns(pa.concat_tables(pending), casts))
+
+
+def _csv_batches(source, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """
+    Arrow's streaming CSV reader with column types fixed from a probe of the first
+    block: text-like columns are read dictionary-encoded, the others as plain text
+    plus the type to cast them to chunk by chunk (see _cast_columns). A stray word in
+    a numeric column then only turns that chunk's column into text, as pandas'
+    chunked reader does, instead of failing the whole stream. Parse blocks are sized
+    from the probe to hold about `chunk_rows` rows, so memory follows the chunk size.
+    Returns (record batches, {column: type}).
+    """
+    head = source.read(ARROW_BLOCK_SIZE)
+    _rewind(source)
+    head = head[:head.rfind(b"\n") + 1] or head  # whole rows only
+
+    read, convert = _csv_options()
+    schema = pa_csv.read_csv(io.BytesIO(head), read_options=read, convert_options=convert).schema
+    text = pa.dictionary(pa.int32(), pa.string())
+    column_types = {f.name: text if _as_text(f.type) else pa.string() for f in schema}
+    casts = {f.name: f.type for f in schema if not _as_text(f.type)}
+
+    read, convert = _csv_options(column_types)
+    read.block_size = max(64 * 1024, min(ARROW_BLOCK_SIZE, len(head) * chunk_rows * 11 // 10 // max(head.count(b"\n"), 1)))
+    return pa_csv.open_csv(source, read_options=read, convert_options=convert), casts
+
+
+def _cast_columns(table, casts: dict):
+    """Cast text columns to their probed types; a column whose chunk doesn't fit stays (dictionary) text."""
+    for name, target in casts.items():
+        i = table.schema.get_field_index(name)
+        column = table.column(i)
+        try:
+            column = pc.cast(pc.utf8_trim_whitespace(column), target)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            column = column.dictionary_encode()
+        table = table.set_column(i, name, column)
+    return table
+
+
+# ==================== 📤 Writing ====================
+def to_bytes(df: pd.DataFrame, fmt: str = "csv") -> bytes:
+    """Serialize a whole DataFrame; call it only for the format actually requested."""
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    buffer = io.BytesIO()
+    if fmt == "excel":
+        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="CleanedData")
+        return buffer.getvalue()
+    _require_arrow(fmt)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        pq.write_table(table, buffer)
+    else:
+        with pa_ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+    return buffer.getvalue()
+
+
+def stream_table(chunks, transform, fmt: str = "csv", spill_dir: str = None):
+    """
+    Like streaming.stream_csv, for any streamable format: transform each chunk and
+    yield the output bytes (text for CSV). Parquet and Arrow files need one schema,
+    and a later chunk can still change a column's type (a stray word turns a numeric
+    column into text, see _cast_columns), so their chunks are first spilled to Arrow
+    files in `spill_dir` and written out once every chunk's types are known: drifting
+    columns are widened (int to float) or written as strings, categoricals as plain
+    strings, and all-null columns as strings. Memory stays at about one chunk.
+    """
+    if fmt == "csv":
+        yield from stream_csv(chunks, transform)
+        return
+    if fmt == "excel":
+        raise ValueError("Excel output can't be streamed")
+    _require_arrow(fmt)
+
+    with tempfile.TemporaryDirectory(prefix="spill-", dir=spill_dir) as spill:
+        paths, schemas = [], []
+        for chunk in chunks:
+            table = _plain_table(pa.Table.from_pandas(transform(chunk), preserve_index=False))
+            paths.append(os.path.join(spill, f"{len(paths)}.arrow"))
+            with pa_ipc.new_file(paths[-1], table.schema) as spilled:
+                spilled.write_table(table)
+            schemas.append(table.schema)
+        if not paths:
+            return
+
+        schema = _common_schema(schemas)
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa_ipc.new_file(sink, schema)
+        for path in paths:
+            with pa.memory_map(path) as source:
+                table = pa_ipc.open_file(source).read_all()
+            writer.write_table(_conform(table, schema))
+            del table
+            os.remove(path)
+            yield _drain(sink)
+        writer.close()
+        yield _drain(sink)
+
+
+def _plain_table(table):
+    """Decode dictionary columns and type all-null ones as strings, so chunks share one schema."""
+    fields = []
+    for field in table.schema:
+        field_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+        fields.append(field.with_type(pa.string() if pa.types.is_null(field_type) else field_type))
+    schema = pa.schema(fields, metadata=table.schema.metadata)
+    return table if schema.equals(table.schema) else table.cast(schema)
+
+
+def _common_schema(schemas):
+    """The first chunk's schema, with each column whose type differs across chunks promoted or made a string."""
+    fields = []
+    for field in schemas[0]:
+        types = [s.field(field.name).type for s in schemas if s.get_field_index(field.name) >= 0]
+        if any(not t.equals(field.type) for t in types):
+            try:
+                unified = pa.unify_schemas([pa.schema([field.with_type(t)]) for t in types],
+                                           promote_options="permissive")
+                field = unified.field(0)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=schemas[0].metadata)
+
+
+def _conform(table, schema):
+    """Cast a spilled chunk to the output schema."""
+    if table.schema.equals(schema):
+        return table
+    return pa.table([pc.cast(table.column(f.name), f.type) for f in schema], schema=schema)
+
+
+def _drain(sink) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -1,13 +1,22 @@
+import os
+import threading
+from collections import OrderedDict
+
 import pycountry
 import geonamescache
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-import torch
-from functools import lru_cache
-from fuzzywuzzy import process
+
+import resources
+from candidate_index import CandidateIndex
+from config import ANN_BACKEND, BASE_DIR, MODEL_NAME
+from correction_cache import get_correction_cache
+from reference_index import ReferenceIndex, reference_checksum
+from resources import resource
 
 
 # ✅ 1. Countries
+@resource("countries")
 def get_all_countries():
     """Return a sorted list of all country names."""
     countries = [country.name for country in pycountry.countries]
@@ -15,6 +24,7 @@ def get_all_countries():
 
 
 # ✅ 2. Cities
+@resource("cities")
 def get_all_cities():
     """Return a sorted list of world cities using GeoNames."""
     gc = geonamescache.GeonamesCache()
@@ -31,19 +41,142 @@ def get_sample_companies():
     ]
 
 
-# ✅ 4. Cached Model Loader
-@lru_cache(maxsize=1)
+# ✅ 4. Bundled CSV reference lists (cities.csv / countries.csv / companies.csv)
+def get_bundled_references(file_names=("countries.csv", "cities.csv", "companies.csv")):
+    """Return the names from the CSV files shipped with the repo."""
+    names = []
+    for file_name in file_names:
+        path = os.path.join(BASE_DIR, file_name)
+        if os.path.exists(path):
+            column = pd.read_csv(path, keep_default_na=False).iloc[:, 0]
+            names.extend(str(v).strip() for v in column if str(v).strip())
+    return names
+
+
+@resource("references")
+def get_all_references():
+    """Countries, cities, companies and the bundled CSVs as one de-duplicated list."""
+    combined = get_all_countries() + get_all_cities() + get_sample_companies() + get_bundled_references()
+    return list(dict.fromkeys(combined))
+
+
+ENTITY_SOURCES = {
+    "country": (get_all_countries, "countries.csv"),
+    "city": (get_all_cities, "cities.csv"),
+    "company": (get_sample_companies, "companies.csv"),
+}
+ENTITY_ALIASES = {"countries": "country", "cities": "city", "companies": "company"}
+
+
+def entity_key(entity_type: str = None):
+    """Canonical entity name ('country', 'city', 'company') or None for anything else."""
+    key = (entity_type or "").strip().lower()
+    key = ENTITY_ALIASES.get(key, key)
+    return key if key in ENTITY_SOURCES else None
+
+
+def get_references(entity_type: str = None):
+    """Reference list for an entity type ('country', 'city', 'company'); all references otherwise."""
+    key = entity_key(entity_type)
+    if key is None:
+        return get_all_references()
+    loader, file_name = ENTITY_SOURCES[key]
+    return resources.get_or_load(
+        f"references:{key}",
+        lambda: list(dict.fromkeys(loader() + get_bundled_references((file_name,)))),
+    )
+
+
+# ✅ 5. Cached Model Loader
+@resource("model")
 def get_model():
     """Load the sentence transformer model once and reuse it."""
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    from sentence_transformers import SentenceTransformer  # heavy import, only when the model is needed
+    model = SentenceTransformer(MODEL_NAME)
     return model
 
 
-# ✅ 5. Advanced AI Name Correction
-def ai_correct_name(name: str, reference_list: list, min_confidence: float = 0.45):
+# ✅ 6. Persisted Reference Index
+_checksums = OrderedDict()  # (id(list), salt) -> (list, length, checksum)
+_checksums_lock = threading.Lock()
+
+
+def list_checksum(reference_list, salt: str) -> str:
+    """
+    reference_checksum, memoized by list identity: callers pass the same list for every
+    value, and hashing it each time would make every lookup O(len(list)). The list is
+    kept alive by the memo (so its id isn't reused) and is treated as immutable.
+    """
+    key = (id(reference_list), salt)
+    with _checksums_lock:
+        hit = _checksums.get(key)
+        if hit is not None and hit[0] is reference_list and hit[1] == len(reference_list):
+            _checksums.move_to_end(key)
+            return hit[2]
+    checksum = reference_checksum(reference_list, salt)
+    with _checksums_lock:
+        _checksums[key] = (reference_list, len(reference_list), checksum)
+        while len(_checksums) > 64:
+            _checksums.popitem(last=False)
+    return checksum
+
+
+def get_reference_index(reference_list: list = None):
+    """
+    Return the embedding index for a reference list (default: all references).
+    Embeddings are computed once per model + list checksum and memory-mapped from disk.
+    """
+    if reference_list is None:
+        return resources.get("reference_index")
+    key = list_checksum(reference_list, MODEL_NAME)
+    return resources.get_or_load(
+        f"reference_index:{key}",
+        lambda: ReferenceIndex.build(reference_list, get_model(), MODEL_NAME),
+    )
+
+
+def get_candidate_index(reference_list: list = None):
+    """Return the fuzzy candidate-generation index for a reference list (default: all references)."""
+    if reference_list is None:
+        return resources.get("candidate_index")
+    key = list_checksum(reference_list, "candidates")
+    return resources.get_or_load(f"candidate_index:{key}", lambda: CandidateIndex(reference_list))
+
+
+def get_entity_reference_index(entity_type: str = None):
+    """Embedding index for an entity type's reference list ('country', 'city', 'company')."""
+    key = entity_key(entity_type)
+    return resources.get(f"reference_index:{key}" if key else "reference_index")
+
+
+def get_entity_candidate_index(entity_type: str = None):
+    """Candidate index for an entity type's reference list ('country', 'city', 'company')."""
+    key = entity_key(entity_type)
+    return resources.get(f"candidate_index:{key}" if key else "candidate_index")
+
+
+resources.register("reference_index", lambda: ReferenceIndex.build(get_all_references(), get_model(), MODEL_NAME))
+resources.register("candidate_index", lambda: CandidateIndex(get_all_references()))
+for _entity in ENTITY_SOURCES:
+    resources.register(f"reference_index:{_entity}",
+                       lambda e=_entity: ReferenceIndex.build(get_references(e), get_model(), MODEL_NAME))
+    resources.register(f"candidate_index:{_entity}", lambda e=_entity: CandidateIndex(get_references(e)))
+
+
+# ✅ 7. Advanced AI Name Correction
+EMBEDDING_ENGINE = "embedding"
+
+
+def embedding_engine_version(min_confidence: float) -> str:
+    """Cache version for embedding corrections: anything that can change the answer."""
+    return f"{MODEL_NAME}|{ANN_BACKEND}|{min_confidence}"
+
+
+def ai_correct_name(name: str, reference_list: list = None, min_confidence: float = 0.45):
     """
     AI-based correction for names, cities, and countries.
     Uses sentence embeddings first, and fuzzy matching as a backup.
+    When no reference_list is given, all known references are used.
     Example:
         'Imndfia' → 'India'
         'Untied States' → 'United States'
@@ -51,24 +184,91 @@ def ai_correct_name(name: str, reference_list: list, min_confidence: float = 0.4
     if not name or not isinstance(name, str):
         return name, 0.0
 
-    model = get_model()
-    name_embedding = model.encode(name, convert_to_tensor=True)
-    reference_embeddings = model.encode(reference_list, convert_to_tensor=True)
+    index = get_reference_index(reference_list)
+    cache, version = get_correction_cache(), embedding_engine_version(min_confidence)
+    cached = cache.get(index.checksum, name, EMBEDDING_ENGINE, version)
+    if cached is not None:
+        corrected_name, confidence = cached
+        return (name if corrected_name is None else corrected_name), confidence
 
-    # Compute cosine similarity
-    similarities = util.cos_sim(name_embedding, reference_embeddings)[0]
-    best_match_index = torch.argmax(similarities).item()
-    confidence = similarities[best_match_index].item()
-    corrected_name = reference_list[best_match_index]
+    # Cosine similarity against the precomputed, normalized reference matrix
+    name_embedding = index.encode_queries(get_model(), [name])
+    corrected_name, confidence = index.best_match(name_embedding)
 
     # 🧠 Fallback to fuzzy match if confidence too low
     if confidence < min_confidence:
-        match, score = process.extractOne(name, reference_list)
-        if score > 80:
-            return match, score / 100
-        return name, confidence
+        match = get_candidate_index(reference_list).extract_one(name)
+        if match and match[1] > 80:
+            corrected_name, confidence = match[0], match[1] / 100
+        else:
+            corrected_name = None  # no match: keep the input as-is
+
+    cache.set(index.checksum, name, EMBEDDING_ENGINE, version, [corrected_name, confidence])
+    return (name if corrected_name is None else corrected_name), confidence
+
+
+# ✅ 8. Batched Column Correction
+def correct_column(values, entity_type: str = None, min_confidence: float = 0.45,
+                   chunk_size: int = 4096, batch_size: int = 256):
+    """
+    Correct a whole column at once.
+    Unique values are encoded in one batched call, matched with chunked matrix products,
+    and only low-confidence values go through the fuzzy fallback. Values already in the
+    correction cache are skipped.
+    Returns (corrected, confidence) as Series aligned with the input.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+
+    corrected = uniques.copy()
+    confidence = np.zeros(len(uniques), dtype=np.float32)
+
+    valid = np.array([isinstance(v, str) and v != "" for v in uniques], dtype=bool)
+    index = get_entity_reference_index(entity_type) if valid.any() else None
+    if index is not None:
+        cache, version = get_correction_cache(), embedding_engine_version(min_confidence)
+        cached = cache.get_many(index.checksum, uniques[valid], EMBEDDING_ENGINE, version)
+        for i in np.flatnonzero(valid):
+            hit = cached.get(cache.normalize(uniques[i]))
+            if hit is not None:
+                corrected[i] = uniques[i] if hit[0] is None else hit[0]
+                confidence[i] = hit[1]
+                valid[i] = False
+
+    if index is not None and valid.any():
+        queries = uniques[valid].tolist()
+        vectors = index.encode_queries(get_model(), queries, batch_size=batch_size)
+        scores, idx = index.search_chunked(vectors, k=1, chunk_size=chunk_size)
+
+        names = np.asarray(index.names, dtype=object)
+        best_names = names[idx[:, 0]]
+        best_scores = scores[:, 0]
+
+        # 🧠 Fuzzy fallback only for the rows the embeddings weren't sure about
+        low_confidence = np.flatnonzero(best_scores < min_confidence)
+        candidate_index = get_entity_candidate_index(entity_type) if len(low_confidence) else None
+        unmatched = np.zeros(len(queries), dtype=bool)
+        for i in low_confidence:
+            match = candidate_index.extract_one(queries[i])
+            if match and match[1] > 80:
+                best_names[i], best_scores[i] = match[0], match[1] / 100
+            else:
+                best_names[i], unmatched[i] = queries[i], True
+
+        corrected[valid] = best_names
+        confidence[valid] = best_scores
+        cache.set_many(index.checksum, {
+            q: [None if unmatched[i] else best_names[i], float(best_scores[i])] for i, q in enumerate(queries)
+        }, EMBEDDING_ENGINE, version)
 
-    return corrected_name, confidence
+    # Scatter back to the original row order (NaN rows keep their value)
+    present = codes >= 0
+    out_values = values.to_numpy(dtype=object, copy=True)
+    out_conf = np.zeros(len(values), dtype=np.float32)
+    out_values[present] = corrected[codes[present]]
+    out_conf[present] = confidence[codes[present]]
+    return pd.Series(out_values, index=values.index, name=values.name), pd.Series(out_conf, index=values.index)
 
 
 # ✅ Quick self-test
@@ -79,5 +279,5 @@ if __name__ == "__main__":
 
     tests = ["Imndfia", "Untied States", "Mmbai", "Gogle", "Dubia"]
     for t in tests:
-        corrected, score = ai_correct_name(t, get_all_countries() + get_all_cities() + get_sample_companies())
+        corrected, score = ai_correct_name(t)
         print(f"🔍 {t} → {corrected} ({round(score*100,2)}%)")
@@ -0,0 +1,349 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+DEFAULT_THRESHOLD = 0.75
+NUM_PERM = 64
+BANDS = 16
+ROW_BATCH = 100_000
+
+
+# ==================== 🔤 Row normalization ====================
+def _normalize_distinct(values: pd.Series) -> np.ndarray:
+    # Case-fold, drop punctuation and collapse spaces once per distinct value
+    codes, uniques = pd.factorize(values)
+    cleaned = pd.Series(uniques, dtype=object).str.casefold().str.replace(_NON_WORD, " ", regex=True)
+    cleaned = cleaned.str.replace(_SPACES, " ", regex=True).str.strip()
+    return cleaned.to_numpy(dtype=object)[codes]
+
+
+def row_texts(df: pd.DataFrame, columns=None) -> pd.Series:
+    """One normalized string per row: case-folded, punctuation dropped, single-spaced."""
+    columns = list(columns) if columns is not None else list(df.columns)
+    parts = [_normalize_distinct(df[c].astype(str).where(df[c].notna(), "")) for c in columns]
+    if not parts:
+        return pd.Series("", index=df.index)
+    joined = parts[0]
+    for part in parts[1:]:
+        joined = joined + " " + part
+    # Empty columns leave double or edge spaces behind
+    return pd.Series(_normalize_distinct(pd.Series(joined)), index=df.index)
+
+
+# ==================== #️⃣ MinHash ====================
+def _permutations(num_perm: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(texts, num_perm: int = NUM_PERM, seed: int = 1, batch_rows: int = ROW_BATCH):
+    """
+    MinHash signatures (rows x num_perm, uint32) over the byte 3-shingles of each text.
+    Shingles for a whole batch of rows are built from one concatenated buffer and
+    reduced per row with np.minimum.reduceat, so there is no per-row Python loop over
+    shingles. Texts shorter than one shingle get an all-max signature.
+    """
+    texts = list(texts)
+    a, b = _permutations(num_perm, seed)
+    signatures = np.full((len(texts), num_perm), MAX_HASH, dtype=np.uint32)
+
+    for start in range(0, len(texts), batch_rows):
+        batch = [f" {t} ".encode("utf-8") for t in texts[start:start + batch_rows]]
+        lengths = np.fromiter((len(t) for t in batch), dtype=np.int64, count=len(batch))
+        buffer = np.frombuffer(b"".join(batch), dtype=np.uint8).astype(np.uint64)
+        if len(buffer) < 3:
+            continue
+
+        # Shingle i covers bytes i..i+2; keep only those that don't cross a row boundary
+        row_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        shingle_counts = np.maximum(lengths - 2, 0)
+        has_shingles = shingle_counts > 0
+        if not has_shingles.any():
+            continue
+        offset_in_row = np.arange(len(buffer)) - np.repeat(row_starts, lengths)
+        positions = np.flatnonzero(offset_in_row < np.repeat(lengths - 2, lengths))
+        shingles = (buffer[positions] << np.uint64(16)) | (buffer[positions + 1] << np.uint64(8)) | buffer[positions + 2]
+        offsets = np.concatenate(([0], np.cumsum(shingle_counts[has_shingles])[:-1]))
+        rows = start + np.flatnonzero(has_shingles)
+
+        for i in range(num_perm):
+            hashed = ((a[i] * shingles + b[i]) % MERSENNE_PRIME) & MAX_HASH
+            signatures[rows, i] = np.minimum.reduceat(hashed, offsets).astype(np.uint32)
+    return signatures
+
+
+# ==================== 🪣 LSH candidates ====================
+def estimated_similarity(signatures, pairs, chunk: int = 200_000):
+    """Estimated Jaccard similarity (share of equal MinHash slots) for each pair."""
+    out = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), chunk):
+        part = pairs[start:start + chunk]
+        out[start:start + chunk] = (signatures[part[:, 0]] == signatures[part[:, 1]]).mean(axis=1)
+    return out
+
+
+def band_keys(signatures, band: int, bands: int = BANDS) -> np.ndarray:
+    """One uint64 bucket key per row for an LSH band of the signatures."""
+    rows_per_band = signatures.shape[1] // bands
+    chunk = signatures[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+    key = np.zeros(len(signatures), dtype=np.uint64)
+    for col in range(chunk.shape[1]):
+        key = key * np.uint64(1_000_003) ^ chunk[:, col]
+    return key
+
+
+def lsh_candidate_pairs(signatures, bands: int = BANDS, blocks=None, min_similarity: float = 0.0):
+    """
+    Candidate pairs (i < j) sharing at least one LSH band bucket (and block key, if given)
+    whose estimated similarity reaches `min_similarity`.
+    Within a bucket each member is paired with the bucket's first member and its
+    predecessor, so a bucket of n rows yields at most 2n pairs instead of n²; pairs are
+    filtered band by band so memory stays proportional to the matches, not the buckets.
+    """
+    n, num_perm = signatures.shape
+    block_codes = pd.factorize(pd.Series(blocks))[0].astype(np.uint64) if blocks is not None else None
+    found = []
+    for band in range(bands):
+        key = band_keys(signatures, band, bands)
+        if block_codes is not None:
+            key = key * np.uint64(1_000_003) ^ block_codes
+        order = np.argsort(key, kind="stable")
+        sorted_keys = key[order]
+        same_as_prev = np.concatenate(([False], sorted_keys[1:] == sorted_keys[:-1]))
+        if not same_as_prev.any():
+            continue
+        bucket_start = np.maximum.accumulate(np.where(~same_as_prev, np.arange(n), 0))
+        members = np.flatnonzero(same_as_prev)
+        first = bucket_start[members]
+        not_adjacent = first != members - 1
+        pairs = np.concatenate([
+            np.stack([order[members - 1], order[members]], axis=1),
+            np.stack([order[first[not_adjacent]], order[members[not_adjacent]]], axis=1),
+        ]).astype(np.int64)
+        if min_similarity > 0:
+            pairs = pairs[estimated_similarity(signatures, pairs) >= min_similarity]
+        pairs.sort(axis=1)
+        found.append(np.unique(pairs[:, 0] * n + pairs[:, 1]))  # 1-D unique is far cheaper than unique(axis=0)
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    packed = np.unique(np.concatenate(found))
+    return np.stack([packed // n, packed % n], axis=1)
+
+
+# ==================== 🔗 Clustering ====================
+def union_find_groups(n: int, pairs):
+    """Connected components over the accepted pairs; returns a group id (smallest member) per row."""
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in np.asarray(pairs, dtype=np.int64).reshape(-1, 2).tolist():
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Flatten every chain to its root with array pointer jumping
+    parent = np.asarray(parent, dtype=np.int64)
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent
+        parent = grand
+
+
+# ==================== 🧹 Near-duplicate detection ====================
+def find_duplicates(df: pd.DataFrame, columns=None, threshold: float = DEFAULT_THRESHOLD, blocking=None,
+                    num_perm: int = NUM_PERM, bands: int = None, embedding_threshold: float = None, model=None):
+    """
+    Group near-duplicate rows. Returns (group per row, merge report).
+
+    Rows are normalized (see row_texts); identical normalized rows are grouped directly,
+    the distinct ones go through MinHash/LSH over byte 3-shingles. A candidate pair is
+    merged when its estimated Jaccard similarity reaches `threshold`. With
+    `embedding_threshold`, candidates that miss it are also merged when the
+    sentence-embedding cosine of the two rows reaches `embedding_threshold`
+    (embeddings are computed for candidate rows only; LSH then uses narrower bands
+    so weaker candidates surface). `blocking` names columns that must match exactly
+    for rows to be compared.
+
+    The report has one row per merged duplicate: group, kept_row, duplicate_row,
+    similarity, and the kept/duplicate row texts.
+    """
+    if df.empty:
+        return (pd.Series(np.arange(len(df)), index=df.index, name="duplicate_group"),
+                pd.DataFrame(columns=["group", "kept_row", "duplicate_row", "similarity", "kept", "duplicate"]))
+
+    texts = row_texts(df, columns)
+    blocks = row_texts(df, blocking) if blocking else None
+    keys = texts if blocks is None else blocks + "\x1f" + texts
+    codes, uniques = pd.factorize(keys)
+    first_seen = np.unique(codes, return_index=True)[1]
+    unique_texts = texts.to_numpy()[first_seen]
+    unique_blocks = blocks.to_numpy()[first_seen] if blocks is not None else None
+
+    if bands is None:
+        bands = BANDS if embedding_threshold is None else num_perm // 2
+    signatures = minhash_signatures(unique_texts, num_perm)
+    # Without embeddings anything under the threshold is dropped right away; with them,
+    # weaker candidates are kept for the embedding check
+    floor = threshold if embedding_threshold is None else threshold / 2
+    pairs = lsh_candidate_pairs(signatures, bands, unique_blocks, floor)
+    empty = unique_texts == ""
+
+    similarity = np.array([], dtype=float)
+    if len(pairs):
+        pairs = pairs[~(empty[pairs[:, 0]] | empty[pairs[:, 1]])]
+        similarity = estimated_similarity(signatures, pairs).astype(float)
+    accepted = similarity >= threshold
+
+    if embedding_threshold is not None and len(pairs) and not accepted.all():
+        if model is None:
+            from data_sources import get_model
+            model = get_model()
+        rescue = np.flatnonzero(~accepted)
+        involved = np.unique(pairs[rescue])
+        vectors = np.asarray(model.encode(list(unique_texts[involved]), normalize_embeddings=True), dtype=np.float32)
+        position = {row: i for i, row in enumerate(involved)}
+        left = vectors[[position[r] for r in pairs[rescue, 0]]]
+        right = vectors[[position[r] for r in pairs[rescue, 1]]]
+        cosine = (left * right).sum(axis=1)
+        accepted[rescue] = cosine >= embedding_threshold
+        similarity[rescue] = np.maximum(similarity[rescue], cosine)
+
+    unique_groups = union_find_groups(len(unique_texts), pairs[accepted] if len(pairs) else pairs)
+
+    # Back to rows: a group is named after its first row
+    row_groups = unique_groups[codes]
+    first_row = pd.Series(np.arange(len(df))).groupby(row_groups).transform("min").to_numpy()
+
+    duplicate_rows = np.flatnonzero(first_row != np.arange(len(df)))
+    pair_similarity = {}
+    for (i, j), score in zip(pairs[accepted] if len(pairs) else [], similarity[accepted]):
+        pair_similarity[(i, j)] = score
+    kept_codes, dup_codes = codes[first_row[duplicate_rows]], codes[duplicate_rows]
+    scores = [1.0 if k == d else pair_similarity.get((min(k, d), max(k, d)),
+                                                      float((signatures[k] == signatures[d]).mean()))
+              for k, d in zip(kept_codes, dup_codes)]
+    report = pd.DataFrame({
+        "group": first_row[duplicate_rows],
+        "kept_row": df.index[first_row[duplicate_rows]],
+        "duplicate_row": df.index[duplicate_rows],
+        "similarity": np.round(scores, 4),
+        "kept": texts.to_numpy()[first_row[duplicate_rows]],
+        "duplicate": texts.to_numpy()[duplicate_rows],
+    })
+    return pd.Series(first_row, index=df.index, name="duplicate_group"), report
+
+
+def drop_near_duplicates(df: pd.DataFrame, **kwargs):
+    """Keep the first row of every near-duplicate group. Returns (deduplicated df, merge report)."""
+    groups, report = find_duplicates(df, **kwargs)
+    keep = groups.to_numpy() == np.arange(len(df))
+    return df[keep], report
+
+
+# ==================== 🌊 Across chunks ====================
+class NearDuplicateFilter:
+    """
+    drop_near_duplicates for a table read in chunks: each chunk is deduplicated on its
+    own, then rows that near-duplicate a row kept from an earlier chunk are dropped too.
+    Kept rows are remembered by their MinHash signature and sorted LSH band keys (about
+    half a kilobyte per kept row), so a candidate is any earlier row sharing a band.
+    Rows are reported by index label: give chunks globally unique labels (e.g. their
+    input row numbers). `merged` counts every merge; the report keeps the first
+    `report_limit`.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, columns=None, num_perm: int = NUM_PERM,
+                 bands: int = BANDS, report_limit: int = 1000):
+        self.threshold = threshold
+        self.columns = columns
+        self.num_perm = num_perm
+        self.bands = bands
+        self.report_limit = report_limit
+        self.merged = 0
+        self._report = []
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._labels = []
+        self._texts = []  # kept row texts, only needed until the report is full
+        self._keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self._ids = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+
+    def __call__(self, df):
+        if df.empty:
+            return df
+        df, report = drop_near_duplicates(df, columns=self.columns, threshold=self.threshold,
+                                          num_perm=self.num_perm, bands=self.bands)
+        self.merged += len(report)
+        self._add_report(report.assign(group=report["kept_row"]).to_dict("records"))
+
+        texts = row_texts(df, self.columns).to_numpy()
+        signatures = minhash_signatures(texts, self.num_perm)
+        keys = [band_keys(signatures, band, self.bands) for band in range(self.bands)]
+
+        # Candidates: earlier kept rows sharing a band bucket
+        rows, ids = [], []
+        for band, key in enumerate(keys):
+            pos = np.searchsorted(self._keys[band], key)
+            hit = np.flatnonzero(pos < len(self._keys[band]))
+            hit = hit[self._keys[band][pos[hit]] == key[hit]]
+            rows.append(hit)
+            ids.append(self._ids[band][pos[hit]])
+        rows, ids = np.concatenate(rows), np.concatenate(ids)
+        valid = texts[rows] != ""
+        rows, ids = rows[valid], ids[valid]
+
+        duplicate = np.zeros(len(df), dtype=bool)
+        if len(rows):
+            similarity = (signatures[rows] == self._signatures[ids]).mean(axis=1)
+            order = np.lexsort((-similarity, rows))  # best match first within each row
+            rows, ids, similarity = rows[order], ids[order], similarity[order]
+            first = np.concatenate(([True], rows[1:] != rows[:-1]))
+            best = first & (similarity >= self.threshold)
+            duplicate[rows[best]] = True
+            self.merged += int(best.sum())
+            self._add_report([
+                {"group": self._labels[k], "kept_row": self._labels[k], "duplicate_row": df.index[r],
+                 "similarity": round(float(score), 4), "kept": self._texts[k] if self._texts is not None else None,
+                 "duplicate": texts[r]}
+                for r, k, score in zip(rows[best], ids[best], similarity[best])
+            ])
+
+        kept = np.flatnonzero(~duplicate)
+        self._remember(df.index[kept], texts[kept], signatures[kept], [key[kept] for key in keys])
+        return df[~duplicate]
+
+    def _remember(self, labels, texts, signatures, keys):
+        start = len(self._labels)
+        self._labels.extend(labels)
+        if self._texts is not None:
+            self._texts.extend(texts)
+        self._signatures = np.concatenate([self._signatures, signatures])
+        ids = np.arange(start, start + len(labels), dtype=np.int64)
+        for band, key in enumerate(keys):
+            order = np.argsort(key, kind="stable")
+            at = np.searchsorted(self._keys[band], key[order], side="right")  # earlier rows stay first
+            self._keys[band] = np.insert(self._keys[band], at, key[order])
+            self._ids[band] = np.insert(self._ids[band], at, ids[order])
+
+    def _add_report(self, records):
+        self._report.extend(records[:max(0, self.report_limit - len(self._report))])
+        if len(self._report) >= self.report_limit:
+            self._texts = None
+
+    def report(self) -> pd.DataFrame:
+        """The merges so far, in find_duplicates' report format."""
+        return pd.DataFrame(self._report, columns=["group", "kept_row", "duplicate_row", "similarity", "kept",
+                                                   "duplicate"])
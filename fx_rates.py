@@ -0,0 +1,184 @@
+"""
+Currency → USD rates for the cleaning stages.
+
+Rates come from a local, date-versioned table (CSV or Parquet with columns
+date, currency, usd_rate = USD per one unit of currency), so batch nodes never
+need the network. Refresh the table where there is network access:
+
+    python -m fx_rates snapshot EUR GBP INR JPY
+    python -m fx_rates snapshot EUR GBP --date 2025-01-31 --path /data/fx_rates.parquet
+"""
+import argparse
+import os
+from datetime import date as date_type
+
+import numpy as np
+import pandas as pd
+
+from config import FX_RATES_PATH
+from resources import resource
+
+# 🌍 Live rates are optional (forex_python needs network access)
+try:
+    from forex_python.converter import CurrencyRates
+    FOREX_AVAILABLE = True
+except ImportError:
+    FOREX_AVAILABLE = False
+
+COLUMNS = ["date", "currency", "usd_rate"]
+
+
+class RateProvider:
+    """USD per one unit of a currency, optionally as of a date."""
+
+    def rate(self, currency: str, date=None):
+        """Single rate, or None when it isn't available."""
+        raise NotImplementedError
+
+    def rates(self, currencies: pd.Series, dates: pd.Series = None) -> np.ndarray:
+        """Rates aligned with `currencies` (NaN where unavailable); `dates` may contain NaT for 'latest'."""
+        dates = pd.Series(pd.NaT, index=currencies.index) if dates is None else dates
+        lookup = {}
+        out = np.full(len(currencies), np.nan)
+        for i, (currency, when) in enumerate(zip(currencies, dates)):
+            if not isinstance(currency, str):
+                continue
+            key = (currency, None if pd.isna(when) else pd.Timestamp(when).date())
+            if key not in lookup:
+                lookup[key] = 1.0 if currency == "USD" else self.rate(*key)
+            out[i] = np.nan if lookup[key] is None else lookup[key]
+        return out
+
+
+class TableRateProvider(RateProvider):
+    """
+    Rates from a date-versioned snapshot table, held in memory.
+    A dated lookup uses the latest snapshot on or before that date.
+    """
+
+    def __init__(self, path: str = FX_RATES_PATH):
+        self.path = path
+        self.table = load_table(path)
+        self.latest = self.table.groupby("currency")["usd_rate"].last().to_dict()
+
+    def rate(self, currency: str, date=None):
+        if currency == "USD":
+            return 1.0
+        if date is None:
+            return self.latest.get(currency)
+        rows = self.table[(self.table["currency"] == currency) & (self.table["date"] <= pd.Timestamp(date))]
+        return float(rows["usd_rate"].iloc[-1]) if len(rows) else None
+
+    def rates(self, currencies: pd.Series, dates: pd.Series = None) -> np.ndarray:
+        currencies = pd.Series(np.asarray(currencies, dtype=object))
+        out = currencies.map(self.latest).to_numpy(dtype=float, na_value=np.nan)
+
+        if dates is not None and len(self.table):
+            dates = pd.to_datetime(pd.Series(np.asarray(dates, dtype=object)), errors="coerce")
+            dated = dates.notna() & currencies.notna()
+            if dated.any():
+                left = pd.DataFrame({"date": dates[dated], "currency": currencies[dated], "pos": np.flatnonzero(dated)})
+                merged = pd.merge_asof(left.sort_values("date"), self.table, on="date", by="currency",
+                                       direction="backward")
+                out[merged["pos"].to_numpy()] = merged["usd_rate"].to_numpy(dtype=float)
+
+        out[(currencies == "USD").to_numpy()] = 1.0
+        return out
+
+
+class LiveRateProvider(RateProvider):
+    """forex_python rates, fetched once per (currency, date) per process."""
+
+    def __init__(self):
+        if not FOREX_AVAILABLE:
+            raise ImportError("forex_python is not installed")
+        self.client = CurrencyRates()
+        self.cache = {}
+
+    def rate(self, currency: str, date=None):
+        if currency == "USD":
+            return 1.0
+        key = (currency, date)
+        if key not in self.cache:
+            try:
+                when = pd.Timestamp(date).to_pydatetime() if date is not None else None
+                self.cache[key] = float(self.client.get_rate(currency, "USD", when))
+            except Exception as e:
+                print(f"⚠️ Live FX rate unavailable for {currency}:", e)
+                self.cache[key] = None
+        return self.cache[key]
+
+
+def load_table(path: str) -> pd.DataFrame:
+    """Read a rate table (empty if the file doesn't exist), sorted by date."""
+    if not os.path.exists(path):
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "currency": pd.Series(dtype=object),
+                             "usd_rate": pd.Series(dtype=float)})
+    table = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    table = table[COLUMNS].dropna()
+    table["date"] = pd.to_datetime(table["date"]).astype("datetime64[ns]")
+    table["currency"] = table["currency"].str.upper()
+    table["usd_rate"] = table["usd_rate"].astype(float)
+    return table.sort_values(["date", "currency"], kind="stable").reset_index(drop=True)
+
+
+def save_table(table: pd.DataFrame, path: str):
+    """Write a rate table atomically (CSV or Parquet, by extension)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        table.to_parquet(tmp, index=False)
+    else:
+        table.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, path)
+
+
+def snapshot(currencies, date=None, path: str = FX_RATES_PATH, provider: RateProvider = None):
+    """
+    Fetch today's (or `date`'s) rates from a live provider and merge them into the table.
+    Currencies the provider can't price are skipped, never guessed. Returns the new rows.
+    """
+    provider = provider or LiveRateProvider()
+    when = pd.Timestamp(date or date_type.today())
+    rows = []
+    for currency in dict.fromkeys(c.upper() for c in currencies):
+        rate = provider.rate(currency, None if date is None else when)
+        if rate is not None:
+            rows.append({"date": when, "currency": currency, "usd_rate": rate})
+    new = pd.DataFrame(rows, columns=COLUMNS)
+
+    table = pd.concat([load_table(path), new], ignore_index=True)
+    table = table.drop_duplicates(["date", "currency"], keep="last").sort_values(["date", "currency"])
+    save_table(table, path)
+    return new
+
+
+@resource("fx_rates")
+def get_rate_provider():
+    """
+    Process-wide rate provider: the local table when one exists, otherwise live
+    rates if forex_python is installed. Without either, every rate is unavailable.
+    """
+    if os.path.exists(FX_RATES_PATH) or not FOREX_AVAILABLE:
+        if not os.path.exists(FX_RATES_PATH):
+            print(f"⚠️ No FX rate table at {FX_RATES_PATH}; amounts won't be converted")
+        return TableRateProvider(FX_RATES_PATH)
+    return LiveRateProvider()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    snap = commands.add_parser("snapshot", help="fetch live rates into the local table")
+    snap.add_argument("currencies", nargs="+", help="ISO codes, e.g. EUR GBP INR")
+    snap.add_argument("--date", help="historical date (YYYY-MM-DD); default is today's rates")
+    snap.add_argument("--path", default=FX_RATES_PATH)
+    args = parser.parse_args()
+
+    rows = snapshot(args.currencies, args.date, args.path)
+    print(rows.to_string(index=False) if len(rows) else "⚠️ No rates fetched")
+    print(f"💾 {args.path}")
+
+
+if __name__ == "__main__":
+    main()
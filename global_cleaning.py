@@ -1,7 +1,14 @@
 import pandas as pd
+import numpy as np
 import re
 from datetime import datetime
-from forex_python.converter import CurrencyRates
+from functools import lru_cache
+
+from fx_rates import get_rate_provider
+from correction_cache import get_correction_cache
+from parallel import map_column, map_unique
+from resources import resource
+from translation import TRANSLATOR_AVAILABLE, translate_values
 
 # 🌍 Try importing optional libraries
 try:
@@ -11,13 +18,6 @@ try:
 except ImportError:
     POSTAL_AVAILABLE = False
 
-try:
-    from langdetect import detect
-    from deep_translator import GoogleTranslator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
-
 
 # -----------------------------------------
 # 🌐 1️⃣ Language detection and translation
@@ -30,89 +30,313 @@ def detect_and_translate(text, target_lang="en"):
     if not TRANSLATOR_AVAILABLE:
         return text  # fallback if missing dependencies
 
-    try:
-        detected_lang = detect(text)
-        if detected_lang != target_lang:
-            translated = GoogleTranslator(source=detected_lang, target=target_lang).translate(text)
-            return translated
-        return text
-    except Exception:
-        return text
+    return translate_values([text], target_lang).get(text, text)
+
+
+def translate_column(series, target_lang="en", backend=None):
+    """
+    detect_and_translate for a whole column: distinct values only, detected in one
+    pass, translated in per-language batches and cached (see translation.translate_values).
+    """
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series)):
+        return series
+    mapping = translate_values(series.dropna().unique(), target_lang, backend)
+    translated = series.map(mapping)
+    return translated.where(translated.notna(), series)
 
 
 # -----------------------------------------
 # ⏰ 2️⃣ Time normalization
 # -----------------------------------------
+TIME_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%b %d, %Y", "%d %b %Y", "%B %d, %Y", "%d %B %Y")
+_ORDINALS = re.compile(r"(?<=\d)(st|nd|rd|th)\b", re.IGNORECASE)  # 3rd → 3
+
+
+@lru_cache(maxsize=100_000)
+def _parse_time(value):
+    value = _ORDINALS.sub("", value)
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
 def normalize_time(value):
     """Normalize time strings like '3rd Dec 2025' → '2025-12-03'."""
     if not isinstance(value, str):
         return value
 
     value = value.strip()
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%b %d, %Y", "%d %b %Y", "%B %d, %Y"):
-        try:
-            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    return value
+    return _parse_time(value) or value
+
+
+def normalize_time_column(series, sample_size=1000):
+    """
+    normalize_time for a whole column. Distinct values are parsed with the formats
+    that match most of a sample, vectorized via pd.to_datetime(format=...); whatever
+    is left (ordinals, rare formats) goes through the memoized per-value path.
+    The dominant formats also decide ambiguous dates: a column of '12/25/2025'
+    values reads '03/04/2025' as March 4th.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d")
+
+    # Only string cells are parsed; factorize treats True, 1 and 1.0 as one value, so every
+    # other cell is copied from the input rather than broadcast from its unique
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    is_text = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+    if not is_text.any():
+        return series.copy()
+    text = pd.Series(uniques[is_text], dtype=object).str.strip()
+
+    # Rank the known formats by how much of a sample they parse
+    sample = text.sample(min(sample_size, len(text)), random_state=0) if len(text) else text
+    hits = {fmt: pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum() for fmt in TIME_FORMATS}
+    formats = sorted((fmt for fmt in TIME_FORMATS if hits[fmt]), key=lambda fmt: -hits[fmt])
+
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+
+    normalized = parsed.dt.strftime("%Y-%m-%d").astype(object)
+    leftover = parsed.isna()
+    normalized[leftover] = [_parse_time(v) or v for v in text[leftover]]
+
+    cleaned = uniques.copy()
+    cleaned[is_text] = normalized.to_numpy(dtype=object)
+    values = series.to_numpy(dtype=object, copy=True)
+    rows = is_text.take(codes.clip(min=0)) & (codes >= 0)
+    values[rows] = cleaned.take(codes[rows])
+    return pd.Series(values, index=series.index, name=series.name)
 
 
 # -----------------------------------------
 # 💰 3️⃣ Currency conversion
 # -----------------------------------------
-def convert_to_usd(value):
+CURRENCY_SYMBOLS = {"€": "EUR", "£": "GBP", "₹": "INR", "$": "USD", "¥": "JPY"}
+_MONEY = re.compile(r"([€£₹$¥])\s*([\d,.]+)")
+
+
+def convert_to_usd(value, date=None):
     """
-    Detects numeric + currency patterns and converts to USD using forex_python.
+    Detects numeric + currency patterns and converts to USD using the FX rate provider
+    (local rate table, see fx_rates). Amounts without an available rate come back unconverted.
     Example: '€120' → 130.45 (USD)
     """
     if not isinstance(value, str):
         return value
 
-    c = CurrencyRates()
-
     # Extract currency symbol and amount
-    match = re.match(r"([€£₹$¥])\s*([\d,.]+)", value)
+    match = _MONEY.match(value)
     if not match:
         return value
 
     symbol, amount_str = match.groups()
-    amount = float(amount_str.replace(",", ""))
-
-    currency_map = {"€": "EUR", "£": "GBP", "₹": "INR", "$": "USD", "¥": "JPY"}
-    currency = currency_map.get(symbol, "USD")
-
     try:
-        if currency == "USD":
-            return round(amount, 2)
-        usd_value = c.convert(currency, "USD", amount)
-        return round(usd_value, 2)
-    except Exception:
+        amount = float(amount_str.replace(",", ""))
+    except ValueError:
+        return value
+
+    rate = get_rate_provider().rate(CURRENCY_SYMBOLS.get(symbol, "USD"), date)
+    if rate is None:
         return amount
+    return round(amount * rate, 2)
+
+
+def convert_column_to_usd(series, dates=None, provider=None):
+    """
+    convert_to_usd for a whole column: one .str.extract pass over the distinct values
+    for symbol and amount, then array arithmetic against the rate table. Pass a
+    companion date column as `dates` to convert at historical rates (latest snapshot
+    on or before each date).
+    """
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series)):
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    is_text = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+    if not is_text.any():
+        return series.copy()
+
+    provider = provider or get_rate_provider()
+    extracted = pd.Series(uniques[is_text], dtype=object).str.extract("^" + _MONEY.pattern)
+    unique_amounts = np.full(len(uniques), np.nan)
+    unique_amounts[is_text] = pd.to_numeric(extracted[1].str.replace(",", "", regex=False), errors="coerce")
+    unique_currencies = np.full(len(uniques), None, dtype=object)
+    unique_currencies[is_text] = extracted[0].map(CURRENCY_SYMBOLS).to_numpy(dtype=object)
+
+    rows = np.flatnonzero((codes >= 0) & ~np.isnan(unique_amounts[codes.clip(min=0)]))
+    amounts = unique_amounts[codes[rows]]
+    currencies = unique_currencies[codes[rows]]
+
+    if dates is None:
+        rates = provider.rates(pd.Series(currencies))
+    else:
+        dates = normalize_time_column(pd.Series(np.asarray(dates, dtype=object)))
+        rates = provider.rates(pd.Series(currencies), pd.to_datetime(dates.iloc[rows], format="%Y-%m-%d", errors="coerce"))
+
+    converted = np.where(np.isnan(rates), amounts, np.round(amounts * rates, 2))
+    values = series.to_numpy(dtype=object, copy=True)
+    values[rows] = converted
+    return pd.Series(values, index=series.index, name=series.name)
 
 
 # -----------------------------------------
 # 🏠 4️⃣ Address standardization
 # -----------------------------------------
+ADDRESS_ABBREVIATIONS = {
+    "st": "street", "rd": "road", "ave": "avenue", "av": "avenue", "blvd": "boulevard",
+    "dr": "drive", "ln": "lane", "ct": "court", "pl": "place", "sq": "square",
+    "hwy": "highway", "pkwy": "parkway", "cres": "crescent", "ter": "terrace", "cir": "circle",
+    "apt": "apartment", "ste": "suite", "fl": "floor", "bldg": "building", "mt": "mount",
+    "n": "north", "s": "south", "e": "east", "w": "west",
+    "ne": "northeast", "nw": "northwest", "se": "southeast", "sw": "southwest",
+}
+_DIRECTIONS = {"n", "s", "e", "w", "ne", "nw", "se", "sw"}
+_STREET_ONLY = {"ct", "fl", "mt", "ne"}  # also US state codes: expanded in the street part only
+_ADDRESS_WORD = re.compile(r"([A-Za-z]+)\.?")
+_COMMA_SPACING = re.compile(r"\s*,\s*")
+_ZIP = re.compile(r"\d{5}(?:-\d{4})?")
+ADDRESS_CACHE_VERSION = "2"  # 2: exact keys
+
+
+def _state_position(parts, p, words, i) -> bool:
+    """A 2-letter word before a ZIP code, or ending the last part of 'City, ST'."""
+    if i + 1 < len(words):
+        return bool(_ZIP.fullmatch(words[i + 1]))
+    return p == len(parts) - 1 and p > 0
+
+
+def rule_based_address(address):
+    """
+    Pure-Python fallback: expand common street-type/direction abbreviations,
+    tidy spacing and commas. 'St' at the start of a part followed by a name is Saint,
+    a leading 'Dr.' stays a title, and state codes ('CT 06103', 'Helena, MT') are kept.
+    Example: '221B Baker St., London' → '221B Baker Street, London'
+    """
+    parts = _COMMA_SPACING.split(" ".join(address.split()))
+    for p, part in enumerate(parts):
+        words = part.split(" ")
+        for i, word in enumerate(words):
+            match = _ADDRESS_WORD.fullmatch(word)
+            key = match.group(1).lower() if match else None
+            if key not in ADDRESS_ABBREVIATIONS:
+                continue
+            if len(key) == 2 and _state_position(parts, p, words, i):
+                continue
+            if key in _STREET_ONLY and p > 0:
+                continue
+            if key == "st" and i == 0 and len(words) > 1:
+                full = "saint"
+            elif key == "dr" and i == 0 and len(words) > 1:
+                continue  # 'Dr. Ambedkar Road': a title, not Drive
+            elif key in _DIRECTIONS and i == len(words) - 1:
+                continue  # 'Unit E', 'Block N': keep letters that end a part
+            else:
+                full = ADDRESS_ABBREVIATIONS[key]
+            words[i] = full.upper() if match.group(1).isupper() and len(key) > 1 else full.title()
+        parts[p] = " ".join(words)
+    return ", ".join(p for p in parts if p)
+
+
+@resource("libpostal")
+def load_libpostal():
+    """Loads libpostal's models (slow, ~2 GB) by running one expansion."""
+    expand_address("1 Main St")
+    return True
+
+
 def standardize_address(address):
     """
-    Uses libpostal if available, otherwise returns address unchanged.
+    Uses libpostal if available, otherwise the rule-based fallback.
     Example: '221B Baker St, London' → '221 Baker Street, London'
     """
     if not isinstance(address, str) or not address.strip():
         return address
 
     if not POSTAL_AVAILABLE:
-        return address  # graceful fallback
+        return rule_based_address(address)
+    return _libpostal_address(address)[0]
 
+
+def _libpostal_address(address):
+    """libpostal's form of an address, and whether libpostal produced it (not the rule-based fallback)."""
     try:
         expanded = expand_address(address)
         if expanded:
-            return expanded[0]
+            return expanded[0], True
         parsed = parse_address(address)
         normalized = ", ".join([p[0] for p in parsed])
-        return normalized
+        return normalized, True
     except Exception:
-        return address
+        return rule_based_address(address), False
+
+
+def standardize_address_column(series, workers=None):
+    """
+    standardize_address for a whole column. Each distinct address is expanded once,
+    across a process pool whose workers load libpostal at start-up; libpostal results
+    are cached persistently, keyed by the exact address (libpostal's output follows its
+    case and spacing). The rule-based fallback is cheap and deterministic, so it isn't
+    cached, also when it stands in for a libpostal failure.
+    """
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series)):
+        return series
+
+    values = [v for v in series.dropna().unique() if isinstance(v, str) and v.strip()]
+    if not POSTAL_AVAILABLE:
+        mapping = map_unique(rule_based_address, values, workers)
+    else:
+        cache = get_correction_cache()
+        hits = cache.get_many("address", values, "libpostal", ADDRESS_CACHE_VERSION, exact=True)
+        mapping = {v: hits[v] for v in values if v in hits}
+        missing = [v for v in values if v not in mapping]
+        fresh = map_unique(_libpostal_address, missing, workers, init=("libpostal",))
+        cache.set_many("address", {v: r for v, (r, ok) in fresh.items() if ok}, "libpostal", ADDRESS_CACHE_VERSION,
+                       exact=True)
+        mapping.update({v: r for v, (r, ok) in fresh.items()})
+
+    standardized = series.map(mapping)
+    return standardized.where(standardized.notna(), series)
+
+
+# -----------------------------------------
+# 🧵 Whole columns
+# -----------------------------------------
+CELL_CLEANERS = {
+    "translate": detect_and_translate,
+    "time": normalize_time,
+    "currency": convert_to_usd,
+    "address": standardize_address,
+}
+
+
+# Vectorized column versions, used instead of mapping the cell cleaner
+COLUMN_CLEANERS = {
+    "translate": translate_column,
+    "time": normalize_time_column,
+    "currency": convert_column_to_usd,
+}
+
+
+def clean_column(series, kind, workers=None):
+    """
+    Apply one of the cleaners above ('translate', 'time', 'currency', 'address') to a
+    whole column: vectorized where a column version exists, otherwise each distinct
+    value once, sharded across `workers` processes.
+    """
+    if kind == "address":
+        return standardize_address_column(series, workers)
+    if kind in COLUMN_CLEANERS:
+        return COLUMN_CLEANERS[kind](series)
+    return map_column(CELL_CLEANERS[kind], series, workers)
 
 
 # -----------------------------------------
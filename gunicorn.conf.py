@@ -0,0 +1,40 @@
+# gunicorn -c gunicorn.conf.py ai_correction_api:app
+#
+# With preload_app the API module (and the resources named in CLEANCHAIN_WARMUP) are loaded
+# once in the master; workers are forked afterwards and share that memory copy-on-write.
+# Each worker then forks its correction pool (parallel.prestart) before serving, so pool
+# processes share it too; CLEANCHAIN_POOL_WORKERS defaults to the CPUs divided between the
+# CLEANCHAIN_WORKERS gunicorn workers rather than all of them per worker.
+# Every worker writes its metrics to CLEANCHAIN_METRICS_DIR, so /metrics reports the totals
+# of all workers whichever one is scraped (see metrics.py); the directory is emptied at start.
+import os
+import shutil
+
+os.environ.setdefault("CLEANCHAIN_METRICS_DIR", os.path.join(
+    os.getenv("CLEANCHAIN_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")), "metrics"))
+
+workers = int(os.getenv("CLEANCHAIN_WORKERS", "4"))
+os.environ.setdefault("CLEANCHAIN_POOL_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+import resources  # noqa: E402  (config reads CLEANCHAIN_METRICS_DIR and CLEANCHAIN_POOL_WORKERS on import)
+
+bind = os.getenv("CLEANCHAIN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    # Counters restart with the server; workers of the previous run must not be summed in
+    shutil.rmtree(os.environ["CLEANCHAIN_METRICS_DIR"], ignore_errors=True)
+
+
+def when_ready(server):
+    names = [n.strip() for n in os.getenv("CLEANCHAIN_WARMUP", "all").split(",") if n.strip()]
+    timings = resources.preload_for_fork(*names)
+    server.log.info("Preloaded before fork: %s", timings)
+
+
+def post_worker_init(worker):
+    # Still single-threaded here: fork the pool now so it shares the preloaded indexes
+    import parallel
+    parallel.prestart()
@@ -0,0 +1,369 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+import metrics
+from config import JOBS_CONCURRENCY, JOBS_DB_PATH, JOBS_DIR, JOBS_MAX_ATTEMPTS, JOBS_TTL
+from data_io import EXTENSIONS, MEDIA_TYPES, STREAMABLE, detect_format, iter_table_chunks, stream_table
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+# ==================== 🗄️ Job store ====================
+class JobStore:
+    """
+    Job records in SQLite (WAL), shared by every process on the machine.
+    Each job gets its own directory under JOBS_DIR for its input and output files.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH, jobs_dir: str = JOBS_DIR):
+        self.path = path
+        self.jobs_dir = jobs_dir
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread (and per process: the pid check covers forks)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    filename TEXT,
+                    input_path TEXT,
+                    output_path TEXT,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:  # databases from before attempts were counted
+                try:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+                except sqlite3.OperationalError:
+                    pass  # another process added it first
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def create(self, kind: str, upload, filename: str, params: dict = None, output_name: str = None,
+               status: str = QUEUED):
+        """
+        Copy an uploaded file object into a fresh job directory and queue the job. Returns the job ID.
+        With status=RUNNING the job is created already claimed by this process, for running it inline.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        input_path = os.path.join(job_dir, "input" + os.path.splitext(filename or "")[1].lower())
+        with open(input_path, "wb") as dst:
+            shutil.copyfileobj(upload, dst, 1024 * 1024)
+        output_path = os.path.join(job_dir, output_name or "output.csv")
+
+        now = time.time()
+        running = status == RUNNING
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, status, filename, input_path, output_path, params, created, started, "
+            "worker_pid, attempts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, status, filename, input_path, output_path, json.dumps(params or {}), now,
+             now if running else None, os.getpid() if running else None, int(running)),
+        )
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, kinds, job_id: str = None):
+        """Atomically move the oldest queued job of one of `kinds` (or `job_id`) to running."""
+        kinds = list(kinds)
+        where = "id = ?" if job_id else f"kind IN ({','.join('?' * len(kinds))})"
+        args = [job_id] if job_id else kinds
+        row = self._connection().execute(
+            f"UPDATE jobs SET status = ?, started = ?, worker_pid = ?, attempts = attempts + 1 WHERE id = "
+            f"(SELECT id FROM jobs WHERE status = ? AND {where} ORDER BY created LIMIT 1) RETURNING *",
+            [RUNNING, time.time(), os.getpid(), QUEUED, *args],
+        ).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._connection().execute(f"UPDATE jobs SET {columns} WHERE id = ?", [*fields.values(), job_id])
+
+    def requeue_orphans(self, max_attempts: int = JOBS_MAX_ATTEMPTS):
+        """
+        Put running jobs whose worker process is gone back in the queue (e.g. after a crash).
+        A job that has already been started `max_attempts` times is marked failed instead,
+        so an input that kills its worker can't crash-loop the service.
+        """
+        conn = self._connection()
+        rows = conn.execute("SELECT id, worker_pid, attempts FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+        for row in rows:
+            if _pid_alive(row["worker_pid"]):
+                continue
+            if row["attempts"] >= max_attempts:
+                conn.execute("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ? AND status = ?",
+                             (FAILED, f"Worker process died {row['attempts']} times running this job",
+                              time.time(), row["id"], RUNNING))
+            else:
+                conn.execute("UPDATE jobs SET status = ?, progress = 0 WHERE id = ? AND status = ?",
+                             (QUEUED, row["id"], RUNNING))
+
+    def purge(self, older_than: float = JOBS_TTL):
+        """Delete finished jobs (records and files) older than `older_than` seconds."""
+        if not older_than:
+            return
+        conn = self._connection()
+        cutoff = time.time() - older_than
+        for row in conn.execute("SELECT id FROM jobs WHERE status IN (?, ?) AND finished < ?",
+                                (DONE, FAILED, cutoff)).fetchall():
+            shutil.rmtree(os.path.join(self.jobs_dir, row["id"]), ignore_errors=True)
+            conn.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ==================== 🏃 Workers ====================
+class JobQueue:
+    """
+    Runs queued jobs on a bounded pool of background threads (`concurrency` per process).
+    `handlers` maps a job kind to fn(job, progress) -> result dict, where progress(fraction)
+    records how far along the job is. Heavy handlers still hand CPU work to the process pool.
+    Each job runs under metrics.job(): its stage timings (and, with params["profile"],
+    its sampling profile) are added to the result and logged.
+    Finished jobs older than `ttl` are purged at start and every `purge_interval` seconds.
+    Jobs orphaned by a dead process are requeued at start, up to `max_attempts` runs each.
+    """
+
+    def __init__(self, handlers: dict, store: JobStore = None, concurrency: int = JOBS_CONCURRENCY,
+                 poll_interval: float = 1.0, ttl: float = JOBS_TTL, purge_interval: float = 600.0,
+                 max_attempts: int = JOBS_MAX_ATTEMPTS):
+        self.handlers = handlers
+        self.store = store or JobStore()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._purge_lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self.store.requeue_orphans(self.max_attempts)
+        self._purge()
+        self._stop.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, kind: str, upload, filename: str, params: dict = None, output_name: str = None):
+        """Queue a job for an uploaded file object; returns the job ID right away."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        job_id = self.store.create(kind, upload, filename, params, output_name)
+        self._wake.set()
+        return job_id
+
+    def run_now(self, kind: str, upload, filename: str, params: dict = None, output_name: str = None,
+                raise_errors: bool = False):
+        """
+        Create a job and run it in the calling thread. Returns the finished job record.
+        With raise_errors, a failed job's exception is raised once the failure is recorded.
+        """
+        # Created as running, so no idle worker thread can claim it first
+        job_id = self.store.create(kind, upload, filename, params, output_name, status=RUNNING)
+        error = self._run(self.store.get(job_id))
+        if error is not None and raise_errors:
+            raise error
+        return self.store.get(job_id)
+
+    def _purge(self):
+        # One thread purges at a time; the others skip rather than wait
+        if not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self.store.purge(self.ttl)
+            self._last_purge = time.monotonic()
+        except sqlite3.Error as e:
+            print("⚠️ Could not purge old jobs:", e)
+        finally:
+            self._purge_lock.release()
+
+    def _work(self):
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_purge >= self.purge_interval:
+                self._purge()
+            job = self.store.claim(self.handlers)
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        """Run a claimed job and record its outcome; returns the handler's exception, if any."""
+        job["params"] = json.loads(job["params"])
+        job_id = job["id"]
+
+        def progress(fraction: float):
+            self.store.update(job_id, progress=round(max(0.0, min(1.0, fraction)), 4))
+
+        try:
+            with metrics.job(job["kind"], job_id, job["params"].get("profile") or None) as trace:
+                result = self.handlers[job["kind"]](job, progress)
+        except Exception as e:
+            print(f"⚠️ Job {job_id} failed:", e)
+            self.store.update(job_id, status=FAILED, error=str(e), finished=time.time())
+            return e
+        result = {**(result or {}), "timings": trace.timings()}
+        if trace.profile is not None:
+            result["profile"] = trace.profile
+        self.store.update(job_id, status=DONE, progress=1.0, result=result, finished=time.time())
+
+
+# ==================== 📄 File handlers ====================
+def table_handler(make_transform):
+    """
+    Job handler that pushes the input file (CSV, Parquet, Arrow or Excel) through
+    `make_transform(params)` chunk by chunk and writes the job's output path in the
+    format its extension names. A transform with a `summary` function attribute adds
+    what it returns to the job result.
+    """
+    def handler(job, progress):
+        transform = make_transform(job["params"])
+        size = os.path.getsize(job["input_path"]) or 1
+        counts = {"input_rows": 0, "rows": 0}
+
+        with open(job["input_path"], "rb") as src:
+            timed = {"read": 0.0, "transform": 0.0}
+
+            def chunks():
+                reader = iter_table_chunks(src, job["filename"] or job["input_path"])
+                while True:
+                    start = time.perf_counter()
+                    chunk = next(reader, None)
+                    timed["read"] += time.perf_counter() - start
+                    if chunk is None:
+                        return
+                    counts["input_rows"] += len(chunk)
+                    yield chunk
+                    progress(min(src.tell() / size, 0.99))
+
+            def counted(chunk):
+                start = time.perf_counter()
+                out = transform(chunk)
+                timed["transform"] += time.perf_counter() - start
+                counts["rows"] += len(out)
+                return out
+
+            start = time.perf_counter()
+            tmp = f"{job['output_path']}.tmp"
+            with open(tmp, "wb") as dst:
+                for part in stream_table(chunks(), counted, detect_format(job["output_path"]),
+                                         spill_dir=os.path.dirname(job["output_path"])):
+                    dst.write(part.encode("utf-8") if isinstance(part, str) else part)
+            os.replace(tmp, job["output_path"])
+            summary = getattr(transform, "summary", None)  # extra result fields from the transform
+            if summary is not None:
+                counts.update(summary())
+            # stream_table interleaves the three; whatever isn't reading or transforming is export
+            metrics.record("read", timed["read"])
+            metrics.record("transform", timed["transform"])
+            metrics.record("export", time.perf_counter() - start - timed["read"] - timed["transform"])
+        return counts
+    return handler
+
+
+def output_name(stem: str, fmt: str = "csv") -> str:
+    """Output file name for a requested format; 400 for formats that can't be written in chunks."""
+    if fmt not in STREAMABLE:
+        raise HTTPException(status_code=400,
+                            detail=f"Unsupported output format {fmt!r}; use one of {', '.join(STREAMABLE)}")
+    return stem + EXTENSIONS[fmt]
+
+
+# ==================== 🌐 HTTP endpoints ====================
+def public_status(job, prefix: str = "/jobs"):
+    """The fields of a job record that clients see."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "filename": job["filename"],
+        "result": json.loads(job["result"]) if job["result"] else None,
+        "error": job["error"],
+        "created": job["created"],
+        "started": job["started"],
+        "finished": job["finished"],
+        "status_url": f"{prefix}/{job['id']}",
+        "download_url": f"{prefix}/{job['id']}/download" if job["status"] == DONE else None,
+    }
+
+
+def job_router(queue: JobQueue, prefix: str = "/jobs"):
+    """Status polling and download endpoints for a queue's jobs."""
+    router = APIRouter(prefix=prefix)
+
+    @router.get("/{job_id}")
+    def job_status(job_id: str):
+        job = queue.store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        return public_status(job, prefix)
+
+    @router.get("/{job_id}/download")
+    def job_download(job_id: str):
+        job = queue.store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        if job["status"] != DONE:
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+        return FileResponse(job["output_path"], media_type=MEDIA_TYPES[detect_format(job["output_path"])],
+                            filename=os.path.basename(job["output_path"]))
+
+    return router
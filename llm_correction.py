@@ -0,0 +1,256 @@
+import asyncio
+import json
+from functools import lru_cache
+
+import tiktoken
+
+from usage import BudgetExceeded, cost_of
+
+LLM_MODEL = "gpt-4o-mini"
+
+# Bump these whenever the matching prompt changes (they're part of the correction cache key)
+CELL_PROMPT_VERSION = "1"
+BATCH_PROMPT_VERSION = "b1"
+
+BATCH_TOKEN_BUDGET = 2000  # input tokens of packed values per request
+BATCH_MAX_ITEMS = 100
+ITEM_OVERHEAD_TOKENS = 10  # {"id": 12, "value": "..."}, per item
+
+
+# ==================== 🔢 Token counting ====================
+@lru_cache(maxsize=None)
+def get_encoder(model: str = LLM_MODEL):
+    """
+    tiktoken encoder for a model, built once (falls back to cl100k_base).
+    Returns None when no encoding can be loaded (e.g. offline without a tiktoken cache).
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print("⚠️ tiktoken unavailable, estimating tokens from length:", e)
+        return None
+
+
+def count_tokens(text: str, model: str = LLM_MODEL) -> int:
+    encoder = get_encoder(model)
+    if encoder is None:
+        return max(1, len(str(text)) // 4)
+    return len(encoder.encode(str(text)))
+
+
+# ==================== 🧹 Single value ====================
+def cell_prompt(value: str, column_name: str = "") -> str:
+    return f"""
+You are a data cleaner AI. Correct any spelling mistakes, spacing issues, or capitalization in this {column_name} value.
+Return only the corrected text. Do not add explanations or extra words.
+
+Examples:
+Input: Imndfia → Output: India
+Input: mahendrasingh → Output: Mahendra Singh
+Input: pune → Output: Pune
+
+Now correct this:
+"{value}"
+"""
+
+
+def correct_value(client, value: str, column_name: str = "", model: str = LLM_MODEL, usage=None) -> str:
+    """One chat completion for one value. Raises on API errors (and BudgetExceeded with a spent `usage`)."""
+    prompt = cell_prompt(value, column_name)
+    reservation = usage.reserve(model, count_tokens(prompt, model), 20) if usage is not None else 0.0
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=20,
+            temperature=0
+        )
+    except Exception:
+        if usage is not None:
+            usage.release(reservation)
+        raise
+    if usage is not None:
+        usage.record(model, getattr(response, "usage", None), reservation)
+    return response.choices[0].message.content.strip()
+
+
+# ==================== 📦 Batched values ====================
+def batch_messages(batch, column_name: str = ""):
+    """Chat messages asking for all values of a batch as one JSON object."""
+    system = f"""
+You are a data cleaner AI. For every value of the "{column_name}" column, correct any spelling mistakes,
+spacing issues, or capitalization. Do not add explanations or extra words.
+
+Examples:
+Imndfia → India
+mahendrasingh → Mahendra Singh
+pune → Pune
+
+Reply with JSON only, exactly one entry per input id:
+{{"corrections": [{{"id": 0, "value": "<corrected text>"}}]}}
+"""
+    payload = {"column": column_name, "values": [{"id": i, "value": v} for i, v in enumerate(batch)]}
+    return [
+        {"role": "system", "content": system.strip()},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+
+
+def pack_batches(values, token_budget: int = BATCH_TOKEN_BUDGET, max_items: int = BATCH_MAX_ITEMS,
+                 model: str = LLM_MODEL):
+    """Split values into batches whose packed size stays within the token budget."""
+    batches, current, used = [], [], 0
+    for value in values:
+        cost = count_tokens(value, model) + ITEM_OVERHEAD_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(value)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_max_tokens(batch, model: str = LLM_MODEL) -> int:
+    """Output allowance: room for every value to grow a bit, plus the JSON scaffolding."""
+    return 20 + sum(2 * count_tokens(v, model) + ITEM_OVERHEAD_TOKENS for v in batch)
+
+
+def parse_batch_response(content: str, batch):
+    """
+    Validate a batch reply and re-align it to the inputs.
+    Returns {input index: corrected value}; missing, duplicate or malformed ids are left out.
+    """
+    try:
+        items = json.loads(content).get("corrections", [])
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+    aligned = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        idx, value = item.get("id"), item.get("value")
+        if isinstance(idx, int) and 0 <= idx < len(batch) and idx not in aligned \
+                and isinstance(value, str) and value.strip():
+            aligned[idx] = value.strip()
+    return aligned
+
+
+async def correct_batch(dispatcher, batch, column_name: str = "", model: str = LLM_MODEL, usage=None):
+    """One chat completion for a whole batch. Returns {value: corrected} for the valid items."""
+    messages = batch_messages(batch, column_name)
+    max_tokens = batch_max_tokens(batch, model)
+    response = await dispatcher.create(
+        estimated_tokens=sum(count_tokens(m["content"], model) for m in messages) + max_tokens,
+        usage=usage,
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    aligned = parse_batch_response(response.choices[0].message.content, batch)
+    return {batch[i]: corrected for i, corrected in aligned.items()}
+
+
+async def correct_value_async(dispatcher, value: str, column_name: str = "", model: str = LLM_MODEL,
+                              usage=None) -> str:
+    """Single-value prompt through the dispatcher (used to retry items a batch dropped)."""
+    prompt = cell_prompt(value, column_name)
+    response = await dispatcher.create(
+        estimated_tokens=count_tokens(prompt, model) + 20,
+        usage=usage,
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=20,
+        temperature=0
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def correct_values_batched_async(dispatcher, values, column_name: str = "", model: str = LLM_MODEL,
+                                       token_budget: int = BATCH_TOKEN_BUDGET, max_items: int = BATCH_MAX_ITEMS,
+                                       usage=None):
+    """
+    Correct many values of one column with a few batched requests, dispatched concurrently.
+    Items a batch reply drops or garbles are retried one by one; values that still
+    fail, or that the `usage` budget stopped, are left out of the result, so callers
+    keep the original. Returns {value: corrected}.
+    """
+    values = list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+
+    skipped = set()
+
+    async def run(batch):
+        try:
+            return await correct_batch(dispatcher, batch, column_name, model, usage)
+        except BudgetExceeded:
+            skipped.update(batch)  # not worth retrying one by one: that costs more, not less
+            return {}
+        except Exception as e:
+            print("⚠️ OpenAI batch error:", e)
+            return {}
+
+    async def retry(value):
+        try:
+            return value, await correct_value_async(dispatcher, value, column_name, model, usage)
+        except BudgetExceeded:
+            return value, None
+        except Exception as e:
+            print("⚠️ OpenAI error:", e)
+            return value, None
+
+    results = {}
+    for corrected in await asyncio.gather(*(run(b) for b in pack_batches(values, token_budget, max_items, model))):
+        results.update(corrected)
+
+    failed = [v for v in values if v not in results and v not in skipped]
+    for value, corrected in await asyncio.gather(*(retry(v) for v in failed)):
+        if corrected:
+            results[value] = corrected
+    return results
+
+
+def correct_columns_batched(dispatcher, values_by_column: dict, model: str = LLM_MODEL, usage=None):
+    """
+    Run the batched correction for several columns in one event loop.
+    Returns {column: {value: corrected}}.
+    """
+    async def run_all():
+        columns = list(values_by_column)
+        results = await asyncio.gather(*(
+            correct_values_batched_async(dispatcher, values_by_column[col], col, model, usage=usage)
+            for col in columns
+        ))
+        return dict(zip(columns, results))
+
+    result = asyncio.run(run_all())
+    if usage is not None and usage.exhausted:
+        print(f"⚠️ OpenAI budget reached; {usage.blocked} requests were not sent")
+    return result
+
+
+# ==================== 💰 Forecast ====================
+def forecast_batched(values_by_column: dict, model: str = LLM_MODEL, token_budget: int = BATCH_TOKEN_BUDGET,
+                     max_items: int = BATCH_MAX_ITEMS):
+    """
+    Expected requests, tokens and cost of correct_columns_batched for these values
+    (pass only the distinct, uncached ones). Output is estimated as each value coming
+    back about the same size; `max_cost_usd` assumes every batch uses its full max_tokens.
+    """
+    forecast = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "max_cost_usd": 0.0}
+    for col, values in values_by_column.items():
+        values = list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+        for batch in pack_batches(values, token_budget, max_items, model):
+            prompt = sum(count_tokens(m["content"], model) for m in batch_messages(batch, col))
+            completion = 20 + sum(count_tokens(v, model) + ITEM_OVERHEAD_TOKENS for v in batch)
+            forecast["requests"] += 1
+            forecast["prompt_tokens"] += prompt
+            forecast["completion_tokens"] += completion
+            forecast["cost_usd"] += cost_of(model, prompt, completion)
+            forecast["max_cost_usd"] += cost_of(model, prompt, batch_max_tokens(batch, model))
+    return forecast
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import time
+
+import openai
+
+import metrics
+
+# Errors worth retrying; anything else (bad request, auth) fails immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)  # a single oversized request must still go through eventually
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit: +1 after a window of healthy responses (additive increase),
+    halved on a 429, timeout or slow response (multiplicative decrease).
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 64, target_latency: float = 10.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._condition = None
+        self._loop = None
+        self._last_decrease = 0.0
+
+    def _cond(self):
+        # asyncio primitives belong to one event loop; rebuild when used from a new one
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition, self._loop = asyncio.Condition(), loop
+            self.in_flight = 0
+        return self._condition
+
+    async def acquire(self):
+        cond = self._cond()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, ok: bool, latency: float = 0.0):
+        cond = self._cond()
+        async with cond:
+            self.in_flight -= 1
+            if not ok or latency > self.target_latency:
+                # Only back off once per latency window so a burst of 429s doesn't collapse to 1
+                now = time.monotonic()
+                if now - self._last_decrease > max(latency, 1.0):
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            cond.notify_all()
+
+
+class LLMDispatcher:
+    """
+    asyncio dispatch layer around an AsyncOpenAI client.
+    Requests pass an AIMD concurrency limiter and request/token per-minute buckets,
+    get a per-request timeout, and are retried with exponential backoff + full jitter.
+    Pass `client_factory` (e.g. lambda: AsyncOpenAI(max_retries=0)) instead of `client`
+    when the dispatcher is reused across asyncio.run() calls: async clients are tied to
+    the event loop they were first used in.
+    """
+
+    def __init__(self, client=None, client_factory=None, requests_per_minute: float = 500, tokens_per_minute: float = 200_000,
+                 initial_concurrency: int = 4, max_concurrency: int = 64, timeout: float = 30.0,
+                 max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0,
+                 target_latency: float = 10.0):
+        self.client = client
+        self.client_factory = client_factory
+        self._client_loop = None
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.limiter = AIMDLimiter(initial_concurrency, 1, max_concurrency, target_latency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "timeouts": 0, "failures": 0}
+
+    def _get_client(self):
+        if self.client_factory is not None:
+            loop = asyncio.get_running_loop()
+            if self.client is None or self._client_loop is not loop:
+                self.client, self._client_loop = self.client_factory(), loop
+        return self.client
+
+    def _backoff(self, attempt: int, error=None) -> float:
+        retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def create(self, estimated_tokens: int = 0, usage=None, **kwargs):
+        """
+        chat.completions.create with rate limiting, timeout and retries. Raises after the last attempt.
+        With a UsageMeter as `usage`, the request's worst-case cost is reserved up front
+        (BudgetExceeded stops it before dispatch) and the actual response.usage is recorded.
+        """
+        if usage is None:
+            return await self._create(estimated_tokens, **kwargs)
+
+        max_tokens = kwargs.get("max_tokens") or 0
+        model = kwargs.get("model")
+        reservation = usage.reserve(model, max(estimated_tokens - max_tokens, 0), max_tokens)
+        try:
+            response = await self._create(estimated_tokens, **kwargs)
+        except BaseException:
+            usage.release(reservation)
+            raise
+        usage.record(model, getattr(response, "usage", None), reservation)
+        return response
+
+    async def _create(self, estimated_tokens: int = 0, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens or 1)
+            await self.limiter.acquire()
+            start, overloaded = time.monotonic(), False
+            try:
+                self.stats["requests"] += 1
+                response = await asyncio.wait_for(self._get_client().chat.completions.create(**kwargs), self.timeout)
+                metrics.inc("cleanchain_engine_calls_total", engine="openai", outcome="ok")
+                return response
+            except RETRYABLE_ERRORS as e:
+                outcome = "error"
+                if isinstance(e, openai.RateLimitError):
+                    self.stats["rate_limited"] += 1
+                    overloaded, outcome = True, "rate_limited"
+                elif isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError)):
+                    self.stats["timeouts"] += 1
+                    overloaded, outcome = True, "timeout"
+                metrics.inc("cleanchain_engine_calls_total", engine="openai", outcome=outcome)
+                if attempt == self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                delay = self._backoff(attempt, e)
+            finally:
+                await self.limiter.release(not overloaded, time.monotonic() - start)
+            await asyncio.sleep(delay)
@@ -0,0 +1,105 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+COMMON_HEADER_CORRECTIONS = {
+    "fname": "first name",
+    "lname": "last name",
+    "phn": "phone",
+    "phn no": "phone number",
+    "rollno": "roll no",
+    "rool no": "roll no",
+    "empname": "employee name",
+    "emp id": "employee id",
+    "counntry": "country"
+}
+
+_SEPARATORS = re.compile(r"[_\-\s]+")  # _ / - / whitespace runs → one space
+_DROP_DOTS = str.maketrans("", "", ".")
+
+
+# ==================== ⚙️ Local Header Cleaning ====================
+@lru_cache(maxsize=4096)
+def locally_clean_header(name: str):
+    """Perform fast local cleaning before using GPT."""
+    if not isinstance(name, str):
+        return name
+    name = _SEPARATORS.sub(" ", name.strip().lower())
+    name = name.translate(_DROP_DOTS).strip()
+    return COMMON_HEADER_CORRECTIONS.get(name, name)
+
+
+def clean_headers(columns):
+    """locally_clean_header over a whole header row."""
+    return [locally_clean_header(c) for c in columns]
+
+
+# ==================== 🧽 Local Cell Cleaning ====================
+def clean_text_column(series: pd.Series) -> pd.Series:
+    """
+    Same result as series.map(lambda x: x.strip().title() if isinstance(x, str) else x),
+    but each distinct value is cleaned once: factorize to codes, clean the uniques with
+    vectorized .str ops, and broadcast back through the codes. Only string cells are
+    written back; every other cell is copied from the input, since factorize treats
+    True, 1 and 1.0 as one value.
+    Categorical columns keep their dtype: only the categories are cleaned and the
+    codes remapped, so no per-row hashing happens at all.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _clean_categorical(series)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return series
+
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    is_text = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+    if not is_text.any():
+        return series
+    cleaned = uniques.to_numpy(dtype=object, copy=True)
+    cleaned[is_text] = uniques[is_text].str.strip().str.title().to_numpy(dtype=object)
+
+    values = series.to_numpy(dtype=object, copy=True)
+    rows = np.flatnonzero(is_text.take(codes.clip(min=0)) & (codes >= 0))
+    values[rows] = cleaned.take(codes[rows])
+    return pd.Series(values, index=series.index, name=series.name, dtype=series.dtype)
+
+
+def _clean_categorical(series: pd.Series) -> pd.Series:
+    categories = series.cat.categories
+    if not pd.api.types.is_object_dtype(categories) and not pd.api.types.is_string_dtype(categories):
+        return series
+    cleaned = clean_text_column(pd.Series(np.asarray(categories, dtype=object)))
+    # Two categories may clean to the same value ('pune ', 'Pune'): merge them
+    remap, merged = pd.factorize(cleaned, use_na_sentinel=True)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap.take(codes.clip(min=0)), -1)
+    values = pd.Categorical.from_codes(new_codes, categories=pd.Index(merged), ordered=series.cat.ordered)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def is_text_dtype(dtype) -> bool:
+    """Object, string, or categorical (with text categories) columns."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        return pd.api.types.is_object_dtype(categories) or pd.api.types.is_string_dtype(categories)
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+def text_columns(df: pd.DataFrame):
+    """Names of the text columns, including the categoricals the Arrow reader produces."""
+    return [col for col, dtype in df.dtypes.items() if is_text_dtype(dtype)]
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Strip + title-case every text cell (the old applymap step), column by column.
+    Non-text columns are left untouched.
+    """
+    df = df.copy(deep=False)  # cleaned columns are swapped in; the caller's frame is untouched
+    for i, dtype in enumerate(df.dtypes):
+        if is_text_dtype(dtype):
+            df.isetitem(i, clean_text_column(df.iloc[:, i]))
+    return df
@@ -1,26 +1,147 @@
-from fastapi import FastAPI, UploadFile, File
+import itertools
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi.responses import StreamingResponse
 import pandas as pd
 from fuzzywuzzy import fuzz
 from textblob import Word
 
+import metrics
+from data_io import MEDIA_TYPES, InputError, iter_table_chunks, stream_table
+from dedup import DEFAULT_THRESHOLD, NearDuplicateFilter
+from jobs import JobQueue, job_router, output_name, public_status, table_handler
+from local_cleaning import clean_frame, text_columns
+from parallel import map_column
+from streaming import RowDeduplicator
+
 app = FastAPI(title="CleanChain AI", description="B2B Data Cleaning API", version="0.1")
 
+def spell_correct(text):
+    """TextBlob spelling correction for one value."""
+    return str(Word(text).correct())
+
+
+def spell_correct_frame(df, workers=None):
+    """spell_correct over the text columns, once per distinct value, across `workers` processes."""
+    for col in text_columns(df):
+        with metrics.stage("correct", column=col):
+            df[col] = map_column(spell_correct, df[col], workers)
+    return df
+
+
+def clean_transform(params):
+    """
+    clean_chunk with its dedupe state for one upload. With params["near_duplicates"],
+    transform.summary() returns the near-duplicate merge report for the job result.
+    """
+    dedupe = RowDeduplicator()
+    near = NearDuplicateFilter(params.get("threshold") or DEFAULT_THRESHOLD) if params.get("near_duplicates") else None
+    rows = {"seen": 0}
+
+    def transform(chunk):
+        # Input row numbers as labels, so the merge report points at rows of the upload
+        chunk.index = pd.RangeIndex(rows["seen"], rows["seen"] + len(chunk))
+        rows["seen"] += len(chunk)
+        return clean_chunk(chunk, dedupe, params.get("workers"), near)
+
+    if near is not None:
+        transform.summary = lambda: {"near_duplicates": {
+            "threshold": near.threshold, "merged": near.merged, "report": near.report().to_dict("records")}}
+    return transform
+
+
+jobs = JobQueue({"clean": table_handler(clean_transform)})
+app.include_router(job_router(jobs))
+app.include_router(metrics.metrics_router())
+
+
+@app.on_event("startup")
+def start_jobs():
+    """Background workers for /jobs submissions."""
+    jobs.start()
+
+
+@app.on_event("shutdown")
+def stop_jobs():
+    jobs.stop()
+
+
 @app.post("/clean")
-async def clean_data(file: UploadFile = File(...)):
-    df = pd.read_csv(file.file)
+def clean_data(file: UploadFile = File(...), workers: int = None, output_format: str = "csv",
+               profile: bool = False, near_duplicates: bool = False,
+               threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=1)):
+    """
+    Clean a CSV/Parquet/Arrow/Excel file now and keep the result as a finished job, so
+    concurrent requests never share an output file. Use /jobs/clean for large files.
+    `profile` adds a sampling profile of the run to the job result. `near_duplicates`
+    also merges rows whose similarity reaches `threshold` (typos, casing, punctuation;
+    see dedup.NearDuplicateFilter) and returns the merge report.
+    """
+    name = output_name("cleaned_output", output_format)
+    params = {"workers": workers, "profile": profile, "near_duplicates": near_duplicates, "threshold": threshold}
+    try:
+        job = jobs.run_now("clean", file.file, file.filename, params, name, raise_errors=True)
+    except InputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    status = public_status(job)
+    response = {"message": "File cleaned successfully!", "cleaned_rows": status["result"]["rows"],
+                "job_id": job["id"], "download_url": status["download_url"]}
+    if near_duplicates:
+        response["near_duplicates"] = status["result"]["near_duplicates"]
+    return response
+
 
-    # Capitalize and strip whitespace
-    df = df.applymap(lambda x: x.strip().title() if isinstance(x, str) else x)
+@app.post("/jobs/clean", status_code=202)
+def submit_clean(file: UploadFile = File(...), workers: int = None, output_format: str = "csv",
+                 profile: bool = False, near_duplicates: bool = False,
+                 threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=1)):
+    """
+    Queue a file for cleaning; poll the returned status URL, then download the result.
+    With `near_duplicates` the finished job's result holds the merge report.
+    """
+    name = output_name("cleaned_output", output_format)
+    params = {"workers": workers, "profile": profile, "near_duplicates": near_duplicates, "threshold": threshold}
+    job_id = jobs.submit("clean", file.file, file.filename, params, name)
+    return public_status(jobs.store.get(job_id))
 
-    # Remove duplicates
-    df = df.drop_duplicates()
 
-    # Optional: Basic spelling correction
-    for col in df.select_dtypes(include='object').columns:
-        df[col] = df[col].apply(lambda x: str(Word(x).correct()) if isinstance(x, str) else x)
+def clean_chunk(df, dedupe, workers=None, near=None):
+    """
+    Same steps as /clean, applied to one chunk; `dedupe` (and `near`, a
+    NearDuplicateFilter, when near-duplicates are merged) track rows across chunks.
+    """
+    with metrics.stage("local_clean"):
+        df = clean_frame(df)
+    with metrics.stage("dedupe"):
+        df = dedupe(df)
+        if near is not None:
+            df = near(df)
+    return spell_correct_frame(df, workers)
 
-    # Save to new cleaned CSV
-    cleaned_file = "cleaned_output.csv"
-    df.to_csv(cleaned_file, index=False)
 
-    return {"message": "File cleaned successfully!", "cleaned_rows": len(df)}
+@app.post("/clean/stream")
+def clean_data_stream(file: UploadFile = File(...), workers: int = None, output_format: str = "csv",
+                      near_duplicates: bool = False, threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=1)):
+    """
+    Clean a file chunk by chunk and stream the cleaned file back (CSV, Parquet or Arrow).
+    `near_duplicates` drops near-duplicate rows as /clean does, but a streamed response
+    has nowhere to put the merge report: use /clean or /jobs/clean to get it.
+    """
+    name = output_name("cleaned_output", output_format)
+    chunks = iter_table_chunks(file.file, file.filename)
+    try:
+        first = next(chunks)  # read before the response starts, so a bad upload is still a 400
+    except InputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StopIteration:
+        first = None
+    transform = clean_transform({"workers": workers, "near_duplicates": near_duplicates, "threshold": threshold})
+    chunks = chunks if first is None else itertools.chain([first], chunks)
+    body = stream_table(chunks, transform, output_format)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
@@ -0,0 +1,157 @@
+import atexit
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import resources
+from config import PARALLEL_MIN_VALUES, PARALLEL_WORKERS
+
+# workers -> long-lived process pool (started once, reused across requests)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _context():
+    # Forked workers share the parent's loaded reference indexes copy-on-write, but forking
+    # is only safe from a single-threaded process: a pool created lazily inside a threaded
+    # uvicorn/gunicorn worker could fork while another thread holds a lock. Those pools use
+    # forkserver (spawn where it's unavailable), whose workers load what they need themselves;
+    # prestart() forks the default pool early instead.
+    methods = mp.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return mp.get_context("fork")
+    if "forkserver" in methods:
+        context = mp.get_context("forkserver")
+        context.set_forkserver_preload(["parallel"])  # pandas/numpy/resources imported once in the server
+        return context
+    return mp.get_context("spawn")
+
+
+def _init_worker(names):
+    if names:
+        resources.warm_up(*names)
+
+
+def get_executor(workers: int = None, init=()):
+    """
+    Shared process pool with `workers` processes (see _context for how they start).
+    Workers load the `init` resources once each when they start, and anything else
+    lazily unless they inherited it. Memory-mapped resources (the SymSpell index)
+    share their pages through the OS page cache either way.
+    """
+    workers = workers or PARALLEL_WORKERS
+    key = (workers, tuple(init))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(workers, mp_context=_context(), initializer=_init_worker,
+                                       initargs=(tuple(init),))
+            _pools[key] = pool
+        return pool
+
+
+def prestart(workers: int = None, init=()):
+    """
+    Start a pool's processes now. Called from a single-threaded process after
+    resources.preload_for_fork (gunicorn's post_worker_init), every worker is forked at
+    once and shares the preloaded indexes for the life of the pool; requests reuse it.
+    Returns the pool, or None when `workers` is 1.
+    """
+    workers = workers or PARALLEL_WORKERS
+    if workers <= 1:
+        return None
+    pool = get_executor(workers, init)
+    pool.submit(int).result()  # a fork pool starts all of its processes on the first task
+    return pool
+
+
+def shutdown():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown)
+
+
+def _apply_shard(fn, shard):
+    # Counters recorded in a worker are sent back with the results (see metrics.capture)
+    with metrics.capture() as captured:
+        results = [fn(value) for value in shard]
+    return results, captured
+
+
+def map_unique(fn, values, workers: int = None, warm=(), min_parallel: int = PARALLEL_MIN_VALUES, init=()):
+    """
+    Apply `fn` to every distinct value and return {value: fn(value)}.
+    Distinct values are sharded across a process pool; `fn` must be picklable
+    (a module-level function or a functools.partial of one) and should fetch its
+    reference data through `resources`, not take it as an argument.
+    `warm` and `init` name resources each worker loads once when it starts instead of
+    on its first value; `init` ones are never loaded in the parent (state that
+    shouldn't live there, e.g. libpostal's models).
+    Small inputs, or workers=1, run in-process.
+    """
+    unique = list(dict.fromkeys(values))
+    workers = workers or PARALLEL_WORKERS
+    if workers <= 1 or len(unique) < min_parallel:
+        return {value: fn(value) for value in unique}
+
+    init = tuple(dict.fromkeys(tuple(warm) + tuple(init)))
+
+    # A few shards per worker keeps the pool busy when some values are slower than others
+    shard_size = max(1, -(-len(unique) // (workers * 4)))
+    shards = [unique[i:i + shard_size] for i in range(0, len(unique), shard_size)]
+    try:
+        pool = get_executor(workers, init)
+        results = []
+        for shard_results, captured in pool.map(_apply_shard, [fn] * len(shards), shards):
+            results.extend(shard_results)
+            metrics.merge(captured)
+    except BrokenProcessPool as e:
+        print("⚠️ Process pool broke, finishing in-process:", e)
+        with _pools_lock:
+            _pools.pop((workers, tuple(init)), None)
+        return {value: fn(value) for value in unique}
+    return dict(zip(unique, results))
+
+
+def map_column(fn, series: pd.Series, workers: int = None, warm=(), only_strings: bool = True, init=()):
+    """
+    series.map(fn) computed once per distinct value (see map_unique) and broadcast
+    back through factorize codes. With only_strings, non-string cells pass through unchanged.
+    Only string values are broadcast: factorize treats True, 1 and 1.0 as one value,
+    so other cells are copied from (or, without only_strings, mapped from) the input.
+    Categorical columns stay categorical: only the categories are mapped.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) and only_strings:
+        categories = map_column(fn, pd.Series(np.asarray(series.cat.categories, dtype=object)), workers, warm,
+                                only_strings, init)
+        # Two categories may map to the same value: merge them
+        remap, merged = pd.factorize(categories, use_na_sentinel=True)
+        codes = series.cat.codes.to_numpy()
+        new_codes = np.where(codes >= 0, remap.take(codes.clip(min=0)), -1)
+        return pd.Series(pd.Categorical.from_codes(new_codes, categories=pd.Index(merged)),
+                         index=series.index, name=series.name)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    selected = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+
+    mapping = map_unique(fn, uniques[selected], workers, warm, init=init)
+    mapped = uniques.copy()
+    mapped[selected] = [mapping[u] for u in uniques[selected]]
+
+    values = series.to_numpy(dtype=object, copy=True)
+    text = selected.take(codes.clip(min=0)) & (codes >= 0)
+    values[text] = mapped.take(codes[text])
+    if not only_strings:
+        others = np.flatnonzero(~text)
+        values[others] = [fn(v) for v in values[others]]
+    return pd.Series(values, index=series.index, name=series.name)
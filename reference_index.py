@@ -0,0 +1,109 @@
+import hashlib
+import os
+
+import numpy as np
+
+from ann_index import build_backend
+from config import ANN_BACKEND, ANN_PARAMS, CACHE_DIR
+
+
+def reference_checksum(names, model_name: str) -> str:
+    """Stable checksum of a reference list for a given model."""
+    h = hashlib.sha1(model_name.encode("utf-8"))
+    for name in names:
+        h.update(b"\x00")
+        h.update(str(name).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class ReferenceIndex:
+    """
+    Normalized float32 embeddings of a reference list, persisted to disk.
+    The matrix is built once per (model, list checksum) and memory-mapped afterwards,
+    so a lookup costs one query encode plus one matrix-vector product.
+    The search itself is delegated to a pluggable backend (see ann_index.BACKENDS).
+    """
+
+    def __init__(self, names, embeddings, model_name: str, checksum: str = "", searcher=None):
+        self.names = list(names)
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.checksum = checksum
+        self.searcher = searcher or build_backend("exact", embeddings)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def cache_path(model_name: str, checksum: str, cache_dir: str = CACHE_DIR) -> str:
+        safe_model = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+        return os.path.join(cache_dir, f"refindex_{safe_model}_{checksum}.npy")
+
+    @classmethod
+    def build(cls, names, model, model_name: str, cache_dir: str = CACHE_DIR, batch_size: int = 256,
+              backend: str = None, **backend_params):
+        """
+        Load the index from disk (mmap) or embed the names once and save them.
+        backend: 'exact' (default), 'ivf' or 'hnsw'; extra keyword args are backend knobs.
+        """
+        names = list(names)
+        checksum = reference_checksum(names, model_name)
+        path = cls.cache_path(model_name, checksum, cache_dir)
+        backend = backend or ANN_BACKEND
+        backend_params = {**ANN_PARAMS.get(backend, {}), **backend_params}
+
+        def with_backend(embeddings):
+            searcher = build_backend(backend, embeddings, path=f"{path[:-4]}.{backend}", **backend_params)
+            return cls(names, embeddings, model_name, checksum, searcher)
+
+        if os.path.exists(path):
+            embeddings = np.load(path, mmap_mode="r")
+            if embeddings.shape[0] == len(names):
+                return with_backend(embeddings)
+
+        embeddings = model.encode(
+            names,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, path)  # atomic, so concurrent workers never read a partial file
+
+        return with_backend(np.load(path, mmap_mode="r"))
+
+    def encode_queries(self, model, queries, batch_size: int = 256):
+        """Embed query strings the same way the reference list was embedded."""
+        return model.encode(
+            queries,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+    def search(self, query_vectors, k: int = 1):
+        """Return (scores, indices) of the top-k references for each query vector."""
+        return self.searcher.search(np.atleast_2d(query_vectors), k=k)
+
+    def search_chunked(self, query_vectors, k: int = 1, chunk_size: int = 4096):
+        """Top-k search for many queries, bounding the similarity matrix to chunk_size rows."""
+        query_vectors = np.atleast_2d(query_vectors)
+        n = query_vectors.shape[0]
+        k = min(k, len(self.names))
+        scores = np.empty((n, k), dtype=np.float32)
+        indices = np.empty((n, k), dtype=np.int64)
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            scores[start:end], indices[start:end] = self.search(query_vectors[start:end], k=k)
+        return scores, indices
+
+    def best_match(self, query_vector):
+        """Return (reference name, cosine similarity) of the closest reference."""
+        scores, idx = self.search(query_vector, k=1)
+        return self.names[int(idx[0, 0])], float(scores[0, 0])
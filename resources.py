@@ -0,0 +1,102 @@
+import gc
+import threading
+import time
+
+# name -> loader / loaded value
+_loaders = {}
+_values = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, loader):
+    """Register a zero-argument loader under a resource name (nothing is loaded yet)."""
+    with _registry_lock:
+        _loaders[name] = loader
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name: str):
+    """Return the resource, loading it exactly once per process (thread-safe)."""
+    try:
+        return _values[name]
+    except KeyError:
+        pass
+
+    with _registry_lock:
+        if name not in _loaders:
+            raise KeyError(f"Unknown resource {name!r}")
+        lock = _locks[name]
+
+    with lock:
+        if name not in _values:  # another thread may have loaded it while we waited
+            _values[name] = _loaders[name]()
+        return _values[name]
+
+
+def get_or_load(name: str, loader):
+    """Register `loader` under `name` if needed and return the loaded resource."""
+    if name not in _values:
+        with _registry_lock:
+            if name not in _loaders:
+                _loaders[name] = loader
+                _locks[name] = threading.Lock()
+    return get(name)
+
+
+def resource(name: str):
+    """
+    Decorator turning a loader into a lazy, load-once getter.
+    Example:
+        @resource("model")
+        def get_model(): return SentenceTransformer(...)
+    """
+    def decorator(loader):
+        register(name, loader)
+
+        def getter():
+            return get(name)
+
+        getter.__name__ = loader.__name__
+        getter.__doc__ = loader.__doc__
+        getter.resource_name = name
+        return getter
+    return decorator
+
+
+def is_loaded(name: str) -> bool:
+    return name in _values
+
+
+def registered():
+    return sorted(_loaders)
+
+
+def warm_up(*names):
+    """
+    Load resources ahead of the first request (all registered ones if no names or "all" are given).
+    Returns {name: seconds spent loading}.
+    """
+    if not names or "all" in names:
+        names = registered()
+    timings = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            get(name)
+        except Exception as e:
+            print(f"⚠️ Warm-up failed for {name}:", e)
+            continue
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+def preload_for_fork(*names):
+    """
+    Warm up in the master process, then freeze the GC so forked workers share the
+    loaded objects copy-on-write instead of touching (and copying) their pages.
+    """
+    timings = warm_up(*names)
+    gc.collect()
+    gc.freeze()
+    return timings
@@ -0,0 +1,85 @@
+"""
+Chunk helpers for the streaming endpoints.
+
+iter_csv_chunks and stream_csv are the pandas CSV path behind
+data_io.iter_table_chunks / data_io.stream_table; call those for any format.
+"""
+import numpy as np
+import pandas as pd
+
+from config import STREAM_CHUNK_ROWS
+
+
+def iter_csv_chunks(file, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """Read a CSV file object in fixed-size row chunks instead of all at once."""
+    yield from pd.read_csv(file, chunksize=chunk_rows)
+
+
+def stream_csv(chunks, transform):
+    """
+    Apply `transform` to each DataFrame chunk and yield it as CSV text.
+    The header is written once, so the concatenated output is a single valid CSV.
+    """
+    header = True
+    for chunk in chunks:
+        cleaned = transform(chunk)
+        if cleaned.empty and not header:
+            continue
+        yield cleaned.to_csv(index=False, header=header)
+        header = False
+
+
+_MISSING = "\x00<NA>"
+
+
+def _text(value) -> str:
+    """A cell as text, with integral floats written as ints (1.0 and 1 are the same value)."""
+    if isinstance(value, (float, np.floating)) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _normalized(df):
+    """
+    Every column as text, so a row hashes the same whichever dtype its chunk was parsed
+    as (int64 in one chunk, float64 or object in the next). Each distinct value is
+    converted once.
+    """
+    columns = {}
+    for i in range(df.shape[1]):
+        codes, uniques = pd.factorize(df.iloc[:, i], use_na_sentinel=True)
+        text = np.array([_text(v) for v in uniques] + [_MISSING], dtype=object)
+        columns[i] = text.take(codes)  # the -1 sentinel picks _MISSING
+    return pd.DataFrame(columns, index=df.index)
+
+
+class RowDeduplicator:
+    """
+    Drops rows already seen in this or earlier chunks.
+    Only a sorted uint64 array of row hashes is kept (8 bytes per distinct row); each
+    chunk is checked with a binary search and merged in. With 64-bit hashes the chance
+    of any collision stays below 1e-6 up to about six million distinct rows.
+    """
+
+    def __init__(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.seen)
+
+    def __call__(self, df):
+        if df.empty:
+            return df
+        hashes = pd.util.hash_pandas_object(_normalized(df), index=False).to_numpy()
+
+        first = np.zeros(len(hashes), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+        pos = np.searchsorted(self.seen, hashes)
+        seen = np.zeros(len(hashes), dtype=bool)
+        inside = pos < len(self.seen)
+        seen[inside] = self.seen[pos[inside]] == hashes[inside]
+
+        keep = first & ~seen
+        new = np.sort(hashes[keep])
+        self.seen = np.insert(self.seen, np.searchsorted(self.seen, new), new)  # linear merge
+        return df[keep]
@@ -0,0 +1,97 @@
+"""
+Local stand-in for the OpenAI chat completions API, for exercising the LLM tiers offline.
+
+    uvicorn stubs.openai_stub:app --port 8089
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub streamlit run app.py
+
+"Corrections" are deterministic: whitespace is collapsed and the text title-cased.
+Rate-limit behaviour is injected with environment variables:
+    STUB_RPM           requests per minute before answering 429 (0 = unlimited)
+    STUB_429_RATE      probability of a random 429 (0..1)
+    STUB_LATENCY       seconds of artificial latency per request
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="OpenAI stub")
+
+STUB_RPM = int(os.getenv("STUB_RPM", "0"))
+STUB_429_RATE = float(os.getenv("STUB_429_RATE", "0"))
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0"))
+recent_requests = deque()
+counters = {"requests": 0, "rate_limited": 0}
+
+
+def rate_limited():
+    """429 response if the stub's simulated account limits are exceeded, else None."""
+    now = time.monotonic()
+    while recent_requests and now - recent_requests[0] > 60:
+        recent_requests.popleft()
+    over_rpm = STUB_RPM and len(recent_requests) >= STUB_RPM
+    if over_rpm or random.random() < STUB_429_RATE:
+        counters["rate_limited"] += 1
+        retry_after = 60 - (now - recent_requests[0]) if over_rpm else 0.2
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after": f"{max(retry_after, 0.1):.2f}"},
+        )
+    recent_requests.append(now)
+    return None
+
+
+def fake_correct(value: str) -> str:
+    return " ".join(str(value).split()).title()
+
+
+def completion(content: str, prompt: str, model: str):
+    prompt_tokens, completion_tokens = max(1, len(prompt) // 4), max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-stub-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    counters["requests"] += 1
+    limited = rate_limited()
+    if limited is not None:
+        return limited
+    if STUB_LATENCY:
+        await asyncio.sleep(STUB_LATENCY)
+
+    body = await request.json()
+    messages = body.get("messages", [])
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    last = str(messages[-1].get("content", "")) if messages else ""
+
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        payload = json.loads(last)
+        content = json.dumps({"corrections": [
+            {"id": item["id"], "value": fake_correct(item["value"])} for item in payload.get("values", [])
+        ]})
+    else:
+        quoted = re.findall(r'"([^"]*)"', last)
+        content = fake_correct(quoted[-1] if quoted else last)
+
+    return completion(content, prompt, body.get("model", "stub"))
+
+
+@app.get("/stats")
+def stats():
+    return counters
@@ -0,0 +1,82 @@
+"""
+Local stand-in for the Cloudflare name-correction worker (ai_name_correction/index.js).
+
+    uvicorn stubs.worker_stub:app --port 8787
+    CLEANCHAIN_WORKER_URL=http://127.0.0.1:8787 streamlit run app.py
+
+Cleaning follows the worker's rules. Failures are injected with environment variables:
+    STUB_LATENCY       seconds of artificial latency per request
+    STUB_FAIL_RATE     probability of answering 503 (0..1)
+    STUB_DOWN          1 = answer every request with 503 (to trip the circuit breaker)
+GET /stats reports requests, failures and the number of distinct client connections,
+which shows whether callers reuse keep-alive connections.
+"""
+import asyncio
+import os
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Correction worker stub")
+
+MAX_BATCH = 1000
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0"))
+STUB_FAIL_RATE = float(os.getenv("STUB_FAIL_RATE", "0"))
+STUB_DOWN = os.getenv("STUB_DOWN", "0") == "1"
+counters = {"requests": 0, "batch_requests": 0, "names": 0, "failures": 0}
+connections = set()
+
+
+def clean_name(name) -> str:
+    name = re.sub(r"[^a-zA-Z\s]", "", str(name).strip())
+    return re.sub(r"\b\w", lambda m: m.group().upper(), re.sub(r"\s+", " ", name).lower())
+
+
+async def simulate(request: Request):
+    """503 response if the stub is set to fail this request, else None."""
+    counters["requests"] += 1
+    connections.add((request.client.host, request.client.port) if request.client else None)
+    if STUB_LATENCY:
+        await asyncio.sleep(STUB_LATENCY)
+    if STUB_DOWN or random.random() < STUB_FAIL_RATE:
+        counters["failures"] += 1
+        return JSONResponse({"error": "Worker unavailable (stub)"}, status_code=503)
+    return None
+
+
+@app.post("/clean")
+async def clean(request: Request):
+    failed = await simulate(request)
+    if failed is not None:
+        return failed
+    try:
+        name = (await request.json())["name"]
+    except Exception:
+        return JSONResponse({"error": "Invalid request format"}, status_code=400)
+    counters["names"] += 1
+    return {"cleaned_name": clean_name(name)}
+
+
+@app.post("/clean/batch")
+async def clean_batch(request: Request):
+    failed = await simulate(request)
+    if failed is not None:
+        return failed
+    try:
+        names = (await request.json())["names"]
+    except Exception:
+        return JSONResponse({"error": "Invalid request format"}, status_code=400)
+    if not isinstance(names, list):
+        return JSONResponse({"error": "Expected { names: [...] }"}, status_code=400)
+    if len(names) > MAX_BATCH:
+        return JSONResponse({"error": f"At most {MAX_BATCH} names per batch"}, status_code=413)
+    counters["batch_requests"] += 1
+    counters["names"] += len(names)
+    return {"cleaned_names": [clean_name(n) for n in names]}
+
+
+@app.get("/stats")
+def stats():
+    return {**counters, "connections": len(connections)}
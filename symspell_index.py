@@ -0,0 +1,281 @@
+"""
+Compact, disk-backed SymSpell index.
+
+The dictionary (terms, counts) and its symmetric-delete index are flat NumPy arrays
+saved once to the cache dir and memory-mapped afterwards, so every worker process
+starts in milliseconds and shares the same pages instead of building its own
+SymSpell object. Deletes are stored as sorted 64-bit hashes; a lookup is one
+searchsorted over them plus an edit-distance check of the few candidate terms.
+
+The default index holds symspellpy's English frequency dictionary plus a domain
+dictionary of the bundled cities.csv / countries.csv / companies.csv. Prebuild it
+(e.g. in a Docker layer) with:
+
+    python -m symspell_index build
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from symspellpy import Verbosity
+from symspellpy.suggest_item import SuggestItem
+from symspellpy.editdistance import DistanceAlgorithm, EditDistance
+
+from config import BASE_DIR, CACHE_DIR
+
+# ⚡ symspellpy's C++ edit distance, when its editdistpy backend is installed
+try:
+    import editdistpy  # noqa: F401
+    DISTANCE_ALGORITHM = DistanceAlgorithm.DAMERAU_OSA_FAST
+except ImportError:
+    DISTANCE_ALGORITHM = DistanceAlgorithm.DAMERAU_OSA
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+DOMAIN_FILES = ("cities.csv", "countries.csv", "companies.csv")
+DOMAIN_COUNT = 1_000_000  # frequency given to domain terms: about that of a common English word
+FORMAT_VERSION = "1"  # bump when the on-disk layout changes
+PARTS = ("terms", "offsets", "lengths", "counts", "term_hashes", "term_ids", "delete_hashes", "delete_ids")
+
+
+def _hash(text: str) -> int:
+    """Stable 64-bit hash (Python's hash() differs between processes)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _hashes(texts) -> np.ndarray:
+    return np.fromiter((_hash(t) for t in texts), dtype=np.uint64)
+
+
+def delete_levels(word: str, max_distance: int = MAX_EDIT_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+    """[{prefix}, {prefix minus 1 char}, {prefix minus 2 chars}, ...] down to max_distance deletes."""
+    levels = [{word[:prefix_length]}]
+    for _ in range(max_distance):
+        levels.append({w[:i] + w[i + 1:] for w in levels[-1] for i in range(len(w))} - set().union(*levels))
+    return levels
+
+
+def prefix_deletes(word: str, max_distance: int = MAX_EDIT_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+    """The word's prefix and every variant of it with up to max_distance characters deleted."""
+    return set().union(*delete_levels(word, max_distance, prefix_length))
+
+
+# ==================== 📚 Dictionary sources ====================
+def english_dictionary_path() -> str:
+    """symspellpy's bundled English frequency dictionary."""
+    import symspellpy
+    return os.path.join(os.path.dirname(symspellpy.__file__), "frequency_dictionary_en_82_765.txt")
+
+
+def english_terms(path: str = None):
+    """(term, count) pairs from a SymSpell frequency file ('term count' per line)."""
+    with open(path or english_dictionary_path(), encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                yield parts[0], int(parts[1])
+
+
+def domain_paths(file_names=DOMAIN_FILES):
+    return [p for p in (os.path.join(BASE_DIR, name) for name in file_names) if os.path.exists(p)]
+
+
+def domain_terms(paths=None, count: int = DOMAIN_COUNT):
+    """(lower-cased name, count) for every entry of the bundled reference CSVs."""
+    for path in domain_paths() if paths is None else paths:
+        column = pd.read_csv(path, keep_default_na=False).iloc[:, 0]
+        for value in column:
+            name = str(value).strip().lower()
+            if name:
+                yield name, count
+
+
+# ==================== 🗂️ Index ====================
+class SymSpellIndex:
+    """
+    Read-only SymSpell dictionary over flat (usually memory-mapped) arrays.
+    `lookup` mirrors symspellpy's SymSpell.lookup and returns SuggestItems;
+    `lookup_many` finds the best suggestion for many words in one pass.
+    """
+
+    def __init__(self, arrays: dict, max_edit_distance: int = MAX_EDIT_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH):
+        for name in PARTS:
+            # Plain ndarray views of the maps: np.memmap's per-slice overhead dominates small lookups
+            setattr(self, name, np.asarray(arrays[name]).view(np.ndarray))
+        self._blob = memoryview(self.terms)
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self._distance = EditDistance(DISTANCE_ALGORITHM)
+
+    def __len__(self):
+        return len(self.counts)
+
+    @classmethod
+    def build(cls, terms, path: str = None, max_edit_distance: int = MAX_EDIT_DISTANCE,
+              prefix_length: int = PREFIX_LENGTH):
+        """
+        Index (term, count) pairs (a term seen twice keeps its highest count).
+        With `path`, the arrays are written to that directory and memory-mapped back.
+        """
+        best = {}
+        for term, count in terms:
+            if count > best.get(term, -1):
+                best[term] = count
+        words = list(best)
+
+        encoded = [w.encode("utf-8") for w in words]
+        offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        term_hashes = _hashes(words)
+        term_order = np.argsort(term_hashes, kind="stable")
+
+        delete_keys, delete_ids = [], []
+        for i, word in enumerate(words):
+            variants = prefix_deletes(word, max_edit_distance, prefix_length)
+            delete_keys.extend(variants)
+            delete_ids.extend([i] * len(variants))
+        delete_hashes = _hashes(delete_keys)
+        delete_order = np.argsort(delete_hashes, kind="stable")
+
+        arrays = {
+            "terms": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "offsets": offsets,
+            "lengths": np.fromiter((len(w) for w in words), dtype=np.int32, count=len(words)),
+            "counts": np.fromiter(best.values(), dtype=np.int64, count=len(words)),
+            "term_hashes": term_hashes[term_order],
+            "term_ids": term_order.astype(np.int32),
+            "delete_hashes": delete_hashes[delete_order],
+            "delete_ids": np.asarray(delete_ids, dtype=np.int32)[delete_order],
+        }
+        if path is None:
+            return cls(arrays, max_edit_distance, prefix_length)
+
+        # Write to a temp dir and rename it into place, so concurrent workers never see a partial index
+        tmp = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"max_edit_distance": max_edit_distance, "prefix_length": prefix_length,
+                       "terms": len(words), "format": FORMAT_VERSION}, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:  # another process finished first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a saved index."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in PARTS}
+        return cls(arrays, meta["max_edit_distance"], meta["prefix_length"])
+
+    @classmethod
+    def cached(cls, name: str, sources: dict, cache_dir: str = CACHE_DIR, **params):
+        """
+        Load index `name` from the cache dir, building it first if its sources changed.
+        `sources` maps a file path to a function returning its (term, count) pairs;
+        the cache key covers the files' size and mtime and the index parameters.
+        """
+        key = hashlib.sha1(f"{FORMAT_VERSION}:{sorted(params.items())}".encode("utf-8"))
+        for path in sorted(sources):
+            stat = os.stat(path)
+            key.update(f"\x00{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        path = os.path.join(cache_dir, f"symspell_{name}_{key.hexdigest()[:16]}")
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return cls.load(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        terms = (pair for source, read in sources.items() for pair in read(source))
+        return cls.build(terms, path, **params)
+
+    # ---------- lookups ----------
+    def term(self, i: int) -> str:
+        return bytes(self._blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def _find(self, sorted_hashes, ids, hashes):
+        """Ids stored under any of `hashes` (one searchsorted for all of them)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        left = np.searchsorted(sorted_hashes, hashes, side="left")
+        right = np.searchsorted(sorted_hashes, hashes, side="right")
+        if not (right > left).any():
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([ids[a:b] for a, b in zip(left, right) if b > a])
+
+    def _exact(self, word: str):
+        for i in self._find(self.term_hashes, self.term_ids, [_hash(word)]):
+            if self.term(i) == word:
+                return int(i)
+        return None
+
+    def lookup(self, phrase: str, verbosity: Verbosity = Verbosity.CLOSEST, max_edit_distance: int = None):
+        """Suggestions for one word, ordered like symspellpy's (distance, then count)."""
+        max_distance = self.max_edit_distance if max_edit_distance is None else max_edit_distance
+        exact = self._exact(phrase)
+        if exact is not None and verbosity != Verbosity.ALL:
+            return [SuggestItem(phrase, 0, int(self.counts[exact]))]
+        if max_distance == 0:
+            return [] if exact is None else [SuggestItem(phrase, 0, int(self.counts[exact]))]
+
+        # A term within distance d shares a delete that is at most d deletes away from the
+        # phrase, so once TOP / CLOSEST have a match at distance d deeper levels are skipped
+        suggestions, seen, bound = [], set(), max_distance
+        for depth, keys in enumerate(delete_levels(phrase, max_distance, self.prefix_length)):
+            if depth > bound:
+                break
+            candidates = np.unique(self._find(self.delete_hashes, self.delete_ids, _hashes(keys)))
+            candidates = candidates[np.abs(self.lengths[candidates] - len(phrase)) <= bound]
+            for i in candidates.tolist():
+                if i in seen:
+                    continue
+                seen.add(i)
+                term = self.term(i)
+                distance = 0 if term == phrase else self._distance.compare(phrase, term, bound)
+                if 0 <= distance <= bound:
+                    suggestions.append(SuggestItem(term, distance, int(self.counts[i])))
+                    if verbosity != Verbosity.ALL:
+                        bound = distance
+        if not suggestions:
+            return []
+
+        suggestions.sort(key=lambda s: (s.distance, -s.count))
+        if verbosity == Verbosity.TOP:
+            return suggestions[:1]
+        if verbosity == Verbosity.CLOSEST:
+            return [s for s in suggestions if s.distance == suggestions[0].distance]
+        return suggestions
+
+    def lookup_many(self, phrases, max_edit_distance: int = None):
+        """{phrase: best SuggestItem or None} for distinct phrases."""
+        return {phrase: next(iter(self.lookup(phrase, Verbosity.TOP, max_edit_distance)), None)
+                for phrase in dict.fromkeys(phrases)}
+
+
+def default_sources():
+    """English frequency dictionary plus the bundled domain CSVs."""
+    return {english_dictionary_path(): english_terms, **{p: lambda path: domain_terms([path]) for p in domain_paths()}}
+
+
+def load_default_index(cache_dir: str = CACHE_DIR):
+    return SymSpellIndex.cached("default", default_sources(), cache_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the default English + domain index into the cache dir")
+    build.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    index = load_default_index(args.cache_dir)
+    print(f"📚 {len(index):,} terms, {len(index.delete_hashes):,} deletes in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
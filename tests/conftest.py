@@ -0,0 +1,26 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Set before any repo module imports config: caches, job records and metrics logs go to a
+# throwaway directory, never into the working tree
+_SESSION_DIR = tempfile.mkdtemp(prefix="cleanchain-tests-")
+os.environ["CLEANCHAIN_CACHE_DIR"] = os.path.join(_SESSION_DIR, "cache")
+os.environ["CLEANCHAIN_METRICS_LOG_DIR"] = os.path.join(_SESSION_DIR, "logs")
+os.environ.pop("CLEANCHAIN_METRICS_DIR", None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SESSION_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def isolated_dirs(tmp_path, monkeypatch):
+    """Per-test cache and log directories (also for subprocesses the test starts)."""
+    monkeypatch.setenv("CLEANCHAIN_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CLEANCHAIN_METRICS_LOG_DIR", str(tmp_path / "logs"))
+    import metrics
+    monkeypatch.setattr(metrics, "METRICS_LOG_DIR", str(tmp_path / "logs"))
+    return tmp_path
@@ -0,0 +1,22 @@
+import pandas as pd
+
+import ai_services
+
+
+def fake_dictionary(values):
+    return {v: (v.strip().title(), 1.0) for v in values}
+
+
+def test_column_keeps_non_string_cells(monkeypatch):
+    monkeypatch.setattr(ai_services, "correct_texts_with_confidence", fake_dictionary)
+    series = pd.Series([1, 1.0, True, "pune", 0, False, None, "pune"], dtype=object, index=range(10, 18))
+    result = ai_services.correct_column_with_ai(series)
+    assert [type(v) for v in result] == [int, float, bool, str, int, bool, type(None), str]
+    assert result.tolist() == [1, 1.0, True, "Pune", 0, False, None, "Pune"]
+    assert result.index.equals(series.index)
+
+
+def test_categorical_column(monkeypatch):
+    monkeypatch.setattr(ai_services, "correct_texts_with_confidence", fake_dictionary)
+    result = ai_services.correct_column_with_ai(pd.Series(["goa", "goa", None], dtype="category"))
+    assert result.tolist()[:2] == ["Goa", "Goa"]
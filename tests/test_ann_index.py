@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from ann_index import HNSW_AVAILABLE, build_backend
+
+
+def normalized(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def toy_index():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(40, 32))
+    embeddings = normalized(centers[rng.integers(0, 40, 4000)] + 0.3 * rng.normal(size=(4000, 32)))
+    queries = normalized(embeddings[rng.choice(4000, 200, replace=False)] + 0.1 * rng.normal(size=(200, 32)))
+    return embeddings, queries
+
+
+def recall(backend, exact, queries, k=10):
+    _, found = backend.search(queries, k=k)
+    _, truth = exact.search(queries, k=k)
+    return np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+
+
+def test_ivf_recall_against_exact(toy_index, tmp_path):
+    embeddings, queries = toy_index
+    exact = build_backend("exact", embeddings)
+    ivf = build_backend("ivf", embeddings, path=str(tmp_path / "toy.ivf.npz"), nprobe=8)
+    assert recall(ivf, exact, queries) >= 0.9
+
+    # Probing every list is an exhaustive search; the loaded index gives the same answers.
+    ivf.nprobe = len(ivf.centroids)
+    assert recall(ivf, exact, queries) == 1.0
+    loaded = build_backend("ivf", embeddings, path=str(tmp_path / "toy.ivf.npz"), nprobe=8)
+    assert np.array_equal(loaded.order, ivf.order)
+
+
+@pytest.mark.skipif(not HNSW_AVAILABLE, reason="hnswlib is not installed")
+def test_hnsw_recall_against_exact(toy_index, tmp_path):
+    embeddings, queries = toy_index
+    exact = build_backend("exact", embeddings)
+    hnsw = build_backend("hnsw", embeddings, path=str(tmp_path / "toy.hnsw"), ef=64)
+    assert recall(hnsw, exact, queries) >= 0.95
+
+
+def test_unavailable_backend_falls_back_to_exact(toy_index, monkeypatch):
+    import ann_index
+    embeddings, queries = toy_index
+    monkeypatch.setattr(ann_index, "HNSW_AVAILABLE", False)
+    backend = build_backend("hnsw", embeddings)
+    assert backend.name == "exact"
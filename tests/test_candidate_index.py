@@ -0,0 +1,52 @@
+import random
+
+import pytest
+from fuzzywuzzy import process
+
+from benchmarks.dirty_data import clean_values, dirty
+from candidate_index import CandidateIndex
+
+
+@pytest.fixture(scope="module")
+def cities():
+    return clean_values("city")
+
+
+@pytest.fixture(scope="module")
+def index(cities):
+    return CandidateIndex(cities)
+
+
+def test_exact_names_come_back(index, cities):
+    for name in cities[:200:20]:
+        assert index.extract_one(name)[0] == name
+
+
+def test_accepts_exactly_when_full_extract_one_does(index, cities):
+    # Callers keep a match when `score > 80`; the index must accept the same values as
+    # the full scan (it may prefer a candidate to a partial-ratio hit on a 2-3 character
+    # city, e.g. 'Kanungi' → 'Kanungu' rather than 'Un').
+    rng = random.Random(0)
+    queries = [dirty(name, rng, 2) for name in rng.sample(cities, 15)]
+    queries += ["Suvorqv", "Mskuyuni", "Xq", "Mumbay", "Sao Paolo", "qqqqzzzz"]
+    for query in queries:
+        found, full = index.extract_one(query), process.extractOne(query, cities)
+        assert (found is not None and found[1] > 80) == (full[1] > 80), query
+
+
+def test_partial_ratio_hits_without_full_scan(index, cities):
+    # A short query inside a name, and short names inside the query, share no trigrams
+    # with it; the substring keys still find what the full scan finds.
+    for query in ("Xq", "Bzzzzt", "Kanungi"):
+        assert index.extract_one(query) == process.extractOne(query, cities)
+        assert len(index.candidates(query)) <= 3 * index.limit
+
+
+def test_candidates_stay_bounded(index, cities):
+    rng = random.Random(1)
+    for name in rng.sample(cities, 50):
+        assert len(index.candidates(dirty(name, rng, 2))) <= 3 * index.limit
+
+
+def test_empty_query(index):
+    assert index.extract_one("  ") is None
@@ -0,0 +1,26 @@
+import ai_services
+from correction_pipeline import CorrectionPipeline, Tier, dictionary_lookup, per_column
+
+
+def fake_dictionary(values):
+    table = {"teh": ("The", 0.67), "iPhone": ("Iphone", 1.0), "Mumbay": ("Mumba", 0.95)}
+    return {v: table.get(v, (v.title(), 0.0)) for v in values}
+
+
+def test_dictionary_skips_reference_columns(monkeypatch):
+    monkeypatch.setattr(ai_services, "correct_texts_with_confidence", fake_dictionary)
+    assert dictionary_lookup(["Mumbay"], "city") == {}
+    assert dictionary_lookup(["Mumbay"], "notes") == {"Mumbay": ("Mumba", 0.95)}
+
+
+def test_dictionary_keeps_casing_of_correct_words(monkeypatch):
+    monkeypatch.setattr(ai_services, "correct_texts_with_confidence", fake_dictionary)
+    assert dictionary_lookup(["iPhone", "teh"], "product") == {"iPhone": ("iPhone", 1.0), "teh": ("The", 0.67)}
+
+
+def test_pipeline_escalates_low_confidence():
+    first = Tier("first", per_column(lambda values, col: {v: (v.upper(), 0.5) for v in values}), 0.9)
+    second = Tier("second", per_column(lambda values, col: {v: (v + "!", 1.0) for v in values}), 0.9)
+    pipeline = CorrectionPipeline([first, second])
+    assert pipeline.run({"c": ["a", "a", None, "b"]}) == {"c": {"a": "a!", "b": "b!"}}
+    assert [row["escalated"] for row in pipeline.report()] == [2, 0]
@@ -0,0 +1,77 @@
+import io
+
+import pandas as pd
+import pytest
+
+import data_io
+from data_io import iter_table_chunks, read_table, stream_table, to_bytes
+
+pytest.importorskip("pyarrow")
+
+
+def round_trip(chunks, fmt, transform=lambda chunk: chunk):
+    data = b"".join(part.encode("utf-8") if isinstance(part, str) else part
+                    for part in stream_table(iter(chunks), transform, fmt))
+    return read_table(io.BytesIO(data), fmt=fmt)
+
+
+def plain(df):
+    """Categoricals as object columns, missing cells as None."""
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.fixture
+def csv_bytes():
+    cities = ["Pune", "Delhi", "Goa", "Kochi", "Agra", "Surat"]
+    rows = [f"{cities[i % 6] if i < 60_000 else cities[i % 5] + ' North'},{i}" for i in range(120_000)]
+    return ("city,n\n" + "\n".join(rows) + "\n").encode()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_multi_chunk_csv_round_trip(csv_bytes, fmt):
+    chunks = list(iter_table_chunks(io.BytesIO(csv_bytes), "in.csv", chunk_rows=50_000))
+    assert len(chunks) > 1
+    result = round_trip(chunks, fmt)
+    expected = read_table(io.BytesIO(csv_bytes), "in.csv")
+    pd.testing.assert_frame_equal(plain(result), plain(expected), check_dtype=False)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_categoricals_with_different_categories(fmt):
+    chunks = [pd.DataFrame({"city": pd.Categorical(["Pune", "Goa"])}),
+              pd.DataFrame({"city": pd.Categorical(["Delhi", "Pune", None])})]
+    assert plain(round_trip(chunks, fmt))["city"].tolist() == ["Pune", "Goa", "Delhi", "Pune", None]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_column_empty_in_the_first_chunk(fmt):
+    chunks = [pd.DataFrame({"note": [None, None], "n": [1, 2]}),
+              pd.DataFrame({"note": ["late", None], "n": [3, 4]})]
+    result = plain(round_trip(chunks, fmt))
+    assert result["note"].tolist() == [None, None, "late", None]
+    assert result["n"].tolist() == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_column_turning_to_text_in_a_later_chunk(monkeypatch, fmt):
+    # The probe block only sees ints; the chunk holding 'unknown' comes back as text
+    monkeypatch.setattr(data_io, "ARROW_BLOCK_SIZE", 64 * 1024)
+    values = [str(i) for i in range(60_000)] + ["unknown"] + [str(i) for i in range(100)]
+    chunks = list(iter_table_chunks(io.BytesIO(("n\n" + "\n".join(values) + "\n").encode()),
+                                    "in.csv", chunk_rows=10_000))
+    assert str(chunks[0]["n"].dtype) == "int64" and str(chunks[-1]["n"].dtype) == "category"
+    assert plain(round_trip(chunks, fmt))["n"].tolist() == values
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_ints_widen_to_floats_across_chunks(fmt):
+    chunks = [pd.DataFrame({"n": [1, 2]}), pd.DataFrame({"n": [2.5, None]})]
+    result = round_trip(chunks, fmt)
+    assert result["n"].dtype == "float64" and result["n"].tolist()[:3] == [1.0, 2.0, 2.5]
+
+
+def test_csv_stream_matches_to_bytes():
+    df = pd.DataFrame({"city": ["Pune", "Goa"], "n": [1, 2]})
+    streamed = "".join(stream_table(iter([df.iloc[:1], df.iloc[1:]]), lambda chunk: chunk, "csv"))
+    assert streamed.encode() == to_bytes(df, "csv")
@@ -0,0 +1,74 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_sources
+from candidate_index import CandidateIndex
+from correction_cache import CorrectionCache
+from reference_index import ReferenceIndex
+
+
+def test_reference_checksum_is_memoized_per_list(monkeypatch):
+    calls = []
+
+    def counting_checksum(names, salt):
+        calls.append(salt)
+        return f"test-{len(names)}-{salt}"
+
+    monkeypatch.setattr(data_sources, "reference_checksum", counting_checksum)
+    names = ["Acme Corp", "Globex", "Initech"]
+    first = data_sources.get_candidate_index(names)
+    for _ in range(100):
+        assert data_sources.get_candidate_index(names) is first
+    assert calls == ["candidates"]
+
+    # A different (even equal) list is hashed again and maps to the same index.
+    assert data_sources.get_candidate_index(list(names)) is first
+    assert len(calls) == 2
+
+
+class FakeModel:
+    """Bag of character trigrams hashed into a small vector, normalized like SentenceTransformer."""
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            padded = f"  {text.lower()} "
+            for i in range(len(padded) - 2):
+                vectors[row, zlib.crc32(padded[i:i + 3].encode()) % 64] += 1
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def fake_references(tmp_path, monkeypatch):
+    names = ["India", "United States", "Germany", "Brazil"]
+    model = FakeModel()
+    index = ReferenceIndex.build(names, model, "fake-model", cache_dir=str(tmp_path), backend="exact")
+    cache = CorrectionCache(str(tmp_path / "corrections.db"))
+    monkeypatch.setattr(data_sources, "get_model", lambda: model)
+    monkeypatch.setattr(data_sources, "get_entity_reference_index", lambda entity_type=None: index)
+    monkeypatch.setattr(data_sources, "get_entity_candidate_index", lambda entity_type=None: CandidateIndex(names))
+    monkeypatch.setattr(data_sources, "get_correction_cache", lambda: cache)
+    return cache
+
+
+def test_correct_column_round_trip(fake_references, monkeypatch):
+    values = pd.Series(["Indai", "Germany", None, "Indai", "", "Brazil"], index=[10, 11, 12, 13, 14, 15], name="country")
+    corrected, confidence = data_sources.correct_column(values, "country")
+    assert corrected.tolist() == ["India", "Germany", None, "India", "", "Brazil"]
+    assert corrected.index.tolist() == values.index.tolist() and corrected.name == "country"
+    assert confidence[11] == pytest.approx(1.0) and confidence[12] == 0 and confidence[14] == 0
+    assert confidence[10] == confidence[13] > 0.45
+
+    # Second run is served from the correction cache, without encoding anything.
+    monkeypatch.setattr(data_sources, "get_model", None)
+    again, again_conf = data_sources.correct_column(values, "country")
+    assert again.tolist() == corrected.tolist()
+    assert np.allclose(again_conf, confidence)
+
+
+def test_correct_column_keeps_unmatched_values(fake_references):
+    corrected, confidence = data_sources.correct_column(["Qwxz"], "country", min_confidence=0.99)
+    assert corrected.tolist() == ["Qwxz"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from dedup import NearDuplicateFilter, drop_near_duplicates, find_duplicates, union_find_groups
+
+
+def test_empty_frame():
+    groups, report = find_duplicates(pd.DataFrame({"a": []}))
+    assert len(groups) == 0 and report.empty
+    deduped, _ = drop_near_duplicates(pd.DataFrame({"a": []}))
+    assert deduped.empty
+
+
+def test_union_find_groups():
+    assert union_find_groups(0, np.empty((0, 2))).tolist() == []
+    groups = union_find_groups(5, np.array([[3, 4], [1, 3]]))
+    assert groups.dtype.kind == "i"
+    assert groups.tolist() == [0, 1, 2, 1, 1]
+
+
+def test_groups_near_duplicates():
+    df = pd.DataFrame({
+        "name": ["Anvi Singh", "anvi  singh.", "Rahul Verma", "ANVI SINGH", "Priya Nair"],
+        "city": ["Pune", "pune", "Delhi", "Pune", "Kochi"],
+    }, index=[10, 11, 12, 13, 14])
+    groups, report = find_duplicates(df)
+    assert groups.tolist() == [0, 0, 2, 0, 4]
+    assert report["duplicate_row"].tolist() == [11, 13]
+    assert (report["kept_row"] == 10).all()
+
+
+def test_blocking_keeps_blocks_apart():
+    df = pd.DataFrame({"name": ["Anvi Singh", "Anvi Singh"], "city": ["Pune", "Delhi"]})
+    groups, _ = find_duplicates(df, columns=["name"], blocking=["city"])
+    assert groups.tolist() == [0, 1]
+
+
+def test_filter_merges_across_chunks():
+    near = NearDuplicateFilter(report_limit=2)
+    first = near(pd.DataFrame({"name": ["Anvi Singh", "anvi singh.", "Rahul Verma"],
+                               "city": ["Pune", "pune", "Delhi"]}))
+    second = near(pd.DataFrame({"name": ["ANVI SINGH", "Priya Nair", "Rahul  Verma!", ""],
+                                "city": ["Pune", "Kochi", "Delhi", ""]}, index=[3, 4, 5, 6]))
+    assert first.index.tolist() == [0, 2]
+    assert second.index.tolist() == [4, 6]  # empty rows are never merged
+    assert near.merged == 3
+    report = near.report()
+    assert list(report.columns) == ["group", "kept_row", "duplicate_row", "similarity", "kept", "duplicate"]
+    assert report[["kept_row", "duplicate_row"]].values.tolist() == [[0, 1], [0, 3]]  # capped at report_limit
+    assert (report["group"] == report["kept_row"]).all()
+
+
+def test_filter_keeps_distinct_rows_and_empty_chunks():
+    near = NearDuplicateFilter()
+    assert near(pd.DataFrame({"a": []})).empty
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), 12)) for _ in range(200)]})
+    assert len(near(df)) == 200
+    assert near(df.set_axis(range(200, 400))).empty
+    assert near.merged == 200
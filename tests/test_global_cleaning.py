@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import global_cleaning
+from correction_cache import CorrectionCache
+from fx_rates import TableRateProvider
+from global_cleaning import convert_column_to_usd, normalize_time_column, rule_based_address
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("221B Baker St., London", "221B Baker Street, London"),
+    ("12  Oak Ave ,Springfield", "12 Oak Avenue, Springfield"),
+    ("St Marks Rd, Bangalore", "Saint Marks Road, Bangalore"),
+    ("5 N Main St", "5 North Main Street"),
+    ("Flat 2, Block N", "Flat 2, Block N"),
+    ("40 Elm Ct, Hartford", "40 Elm Court, Hartford"),
+    ("1 Mt Pleasant Rd", "1 Mount Pleasant Road"),
+])
+def test_expands_abbreviations(address, expected):
+    assert rule_based_address(address) == expected
+
+
+@pytest.mark.parametrize("address", [
+    "Hartford, CT 06103",
+    "Miami, FL 33101-1234",
+    "Helena, MT",
+    "Omaha, NE 68102",
+    "10 Pine St, Omaha, NE",
+])
+def test_keeps_state_codes(address):
+    assert rule_based_address(address).split(", ")[-1] == address.split(", ")[-1]
+
+
+def test_leading_dr_is_a_title():
+    assert rule_based_address("Dr. Ambedkar Rd, Pune") == "Dr. Ambedkar Road, Pune"
+    assert rule_based_address("9 Ocean Dr") == "9 Ocean Drive"
+
+
+def test_ambiguous_words_only_expand_in_the_street_part():
+    assert rule_based_address("3 Main St, Fl 2") == "3 Main Street, Fl 2"
+
+
+def test_normalize_time_column():
+    series = pd.Series(["12/25/2025", "03/04/2025", "3rd Dec 2025", " 2024-01-05 ", "soon", None],
+                       index=list("abcdef"), name="when")
+    result = normalize_time_column(series)
+    assert result.tolist() == ["2025-12-25", "2025-03-04", "2025-12-03", "2024-01-05", "soon", None]
+    assert result.index.tolist() == list("abcdef") and result.name == "when"
+
+
+def test_normalize_time_column_copies_non_string_cells():
+    series = pd.Series(["2024-01-05", 1.0, True, False, np.nan, "5 Jan 2024"], dtype=object)
+    result = normalize_time_column(series)
+    assert [type(v) for v in result[1:4]] == [float, bool, bool]
+    assert result.tolist()[:4] == ["2024-01-05", 1.0, True, False]
+    assert np.isnan(result[4]) and result[5] == "2024-01-05"
+
+
+@pytest.mark.parametrize("series", [pd.Series([None, None]), pd.Series([], dtype=object), pd.Series([1.5, 2.0])])
+def test_normalize_time_column_without_text(series):
+    assert normalize_time_column(series).equals(series)
+
+
+@pytest.fixture
+def rates(tmp_path):
+    path = tmp_path / "fx_rates.csv"
+    path.write_text("date,currency,usd_rate\n2024-01-01,EUR,1.10\n2024-06-01,EUR,1.20\n2024-01-01,INR,0.012\n")
+    return TableRateProvider(str(path))
+
+
+def test_convert_column_to_usd(rates):
+    series = pd.Series(["€10", "₹1,000", "$5", "£2", "n/a", None], name="price")
+    result = convert_column_to_usd(series, provider=rates)
+    # No GBP rate: the amount comes back unconverted
+    assert result.tolist() == [12.0, 12.0, 5.0, 2.0, "n/a", None]
+    assert result.name == "price"
+
+
+def test_convert_column_to_usd_at_historical_rates(rates):
+    series = pd.Series(["€10", "€10", "€10", "€10"])
+    dates = ["2024-03-01", "1st Jul 2024", "2023-12-31", None]
+    assert convert_column_to_usd(series, dates, rates).tolist() == [11.0, 12.0, 10.0, 12.0]
+    assert convert_column_to_usd(series, [None] * 4, rates).tolist() == [12.0] * 4
+
+
+@pytest.mark.parametrize("series", [pd.Series([None, None], dtype=object), pd.Series([1, 2], dtype=object),
+                                    pd.Series([], dtype=object), pd.Series([1.5, 2.0])])
+def test_convert_column_to_usd_without_text(series, rates):
+    assert convert_column_to_usd(series, provider=rates).equals(series)
+
+
+def test_convert_column_to_usd_copies_non_string_cells(rates):
+    result = convert_column_to_usd(pd.Series(["€10", 3, True, 1.0], dtype=object), provider=rates)
+    assert result.tolist() == [12.0, 3, True, 1.0]
+    assert [type(v) for v in result[1:]] == [int, bool, float]
+
+
+@pytest.fixture
+def fake_libpostal(tmp_path, monkeypatch):
+    """libpostal stand-in that keeps the input's case, and fails on 'boom'."""
+    calls = []
+
+    def expand_address(address):
+        calls.append(address)
+        if "boom" in address:
+            raise RuntimeError("libpostal failed")
+        return [address.replace("St", "Street").replace("ST", "STREET")]
+
+    cache = CorrectionCache(str(tmp_path / "corrections.db"))
+    monkeypatch.setattr(global_cleaning, "POSTAL_AVAILABLE", True)
+    monkeypatch.setattr(global_cleaning, "expand_address", expand_address, raising=False)
+    monkeypatch.setattr(global_cleaning, "get_correction_cache", lambda: cache)
+    return calls
+
+
+def test_address_cache_keeps_case_apart(fake_libpostal):
+    series = pd.Series(["1 Main St", "1 MAIN ST", "1 Main St", None])
+    expected = ["1 Main Street", "1 MAIN STREET", "1 Main Street", None]
+    assert global_cleaning.standardize_address_column(series, workers=1).tolist() == expected
+    assert global_cleaning.standardize_address_column(series, workers=1).tolist() == expected
+    assert fake_libpostal == ["1 Main St", "1 MAIN ST"]  # second run served from the cache
+
+
+def test_rule_based_fallback_is_not_cached_as_libpostal(fake_libpostal):
+    series = pd.Series(["2 boom St"])
+    assert global_cleaning.standardize_address_column(series, workers=1).tolist() == ["2 boom Street"]
+    global_cleaning.standardize_address_column(series, workers=1)
+    assert fake_libpostal == ["2 boom St", "2 boom St"]
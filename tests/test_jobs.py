@@ -0,0 +1,172 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from jobs import DONE, FAILED, RUNNING, JobQueue, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "jobs"))
+
+
+def rows(job, progress):
+    with open(job["input_path"], "rb") as f:
+        return {"lines": f.read().count(b"\n"), "thread": threading.current_thread().name}
+
+
+def test_run_now_runs_in_the_calling_thread(store):
+    queue = JobQueue({"count": rows}, store)
+    job = queue.run_now("count", io.BytesIO(b"a\nb\n"), "in.csv", {"profile": False})
+    assert job["status"] == DONE
+    assert '"lines": 2' in job["result"]
+    assert '"timings"' in job["result"]
+
+
+def test_run_now_is_never_claimed_by_idle_workers(store):
+    queue = JobQueue({"count": rows}, store, concurrency=4, poll_interval=0.001)
+    queue.start()
+    try:
+        jobs = [queue.run_now("count", io.BytesIO(b"a\n"), "in.csv") for _ in range(50)]
+    finally:
+        queue.stop()
+    assert {job["status"] for job in jobs} == {DONE}
+    assert all('"thread": "MainThread"' in job["result"] for job in jobs)
+
+
+def test_inline_jobs_are_created_running(store):
+    job_id = store.create("count", io.BytesIO(b""), "in.csv", status=RUNNING)
+    assert store.get(job_id)["worker_pid"] == os.getpid()
+    assert store.claim(["count"]) is None
+
+
+def test_failed_jobs_keep_the_error(store):
+    def boom(job, progress):
+        raise ValueError("bad file")
+
+    job = JobQueue({"boom": boom}, store).run_now("boom", io.BytesIO(b""), "in.csv")
+    assert job["status"] == FAILED and job["error"] == "bad file"
+
+
+def test_workers_purge_expired_jobs_periodically(store):
+    queue = JobQueue({"count": rows}, store, poll_interval=0.01, ttl=60, purge_interval=0.01)
+    queue.start()
+    try:
+        job = queue.run_now("count", io.BytesIO(b"a\n"), "in.csv")
+        store.update(job["id"], finished=time.time() - 120)
+        for _ in range(200):
+            if store.get(job["id"]) is None:
+                break
+            time.sleep(0.01)
+    finally:
+        queue.stop()
+    assert store.get(job["id"]) is None
+    assert not os.path.exists(os.path.dirname(job["input_path"]))
+
+
+def test_orphans_are_requeued_until_max_attempts(store):
+    job_id = store.create("count", io.BytesIO(b""), "in.csv")
+    for attempt in range(1, 4):
+        job = store.claim(["count"])
+        assert job["id"] == job_id and job["attempts"] == attempt
+        store.update(job_id, worker_pid=0)  # the worker died mid-job
+        store.requeue_orphans(max_attempts=3)
+    job = store.get(job_id)
+    assert job["status"] == FAILED and "3 times" in job["error"] and job["finished"]
+    assert store.claim(["count"]) is None
+
+
+def test_live_workers_keep_their_jobs(store):
+    job_id = store.create("count", io.BytesIO(b""), "in.csv", status=RUNNING)
+    store.requeue_orphans(max_attempts=1)
+    assert store.get(job_id)["status"] == RUNNING
+
+
+def test_old_databases_get_the_attempts_column(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                 "progress REAL NOT NULL DEFAULT 0, filename TEXT, input_path TEXT, output_path TEXT, "
+                 "params TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT, worker_pid INTEGER, "
+                 "created REAL NOT NULL, started REAL, finished REAL)")
+    conn.execute("INSERT INTO jobs (id, kind, status, created) VALUES ('old', 'count', 'queued', 0)")
+    conn.commit()
+    conn.close()
+    store = JobStore(path, str(tmp_path / "jobs"))
+    assert store.claim(["count"])["attempts"] == 1
+
+
+# ==================== 🌐 HTTP endpoints ====================
+@pytest.fixture
+def client(store, monkeypatch):
+    import main
+    monkeypatch.setattr(main.jobs, "store", store)  # the routes read the queue's store on every request
+    return TestClient(main.app)  # no startup: queued jobs stay queued until the test runs them
+
+
+CSV = b"a,b\n1,2\n1,2\n3,4\n"
+
+
+def test_clean_runs_inline_and_keeps_the_result(client):
+    response = client.post("/clean", files={"file": ("in.csv", CSV)})
+    assert response.status_code == 200 and response.json()["cleaned_rows"] == 2
+    download = client.get(response.json()["download_url"])
+    assert download.status_code == 200 and download.text.splitlines() == ["a,b", "1,2", "3,4"]
+
+
+@pytest.mark.parametrize("name, content", [("empty.csv", b""), ("bad.xlsx", b"PK\x03\x04not a workbook"),
+                                           ("bad.parquet", b"nope")])
+def test_unreadable_uploads_are_bad_requests(client, name, content):
+    response = client.post("/clean", files={"file": (name, content)})
+    assert response.status_code == 400 and name in response.json()["detail"]
+    assert client.post("/clean/stream", files={"file": (name, content)}).status_code == 400
+
+
+def test_job_endpoints(client, store):
+    import main
+    response = client.post("/jobs/clean", files={"file": ("in.csv", CSV)})
+    assert response.status_code == 202
+    status = response.json()
+    assert status["status"] == "queued" and status["download_url"] is None
+
+    assert client.get(status["status_url"]).json()["status"] == "queued"
+    assert client.get(f"{status['status_url']}/download").status_code == 409
+
+    main.jobs._run(store.claim(["clean"], status["job_id"]))
+    done = client.get(status["status_url"]).json()
+    assert done["status"] == "done" and done["result"]["rows"] == 2
+    assert client.get(done["download_url"]).status_code == 200
+
+
+def test_unknown_jobs_are_not_found(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/download").status_code == 404
+
+
+def test_near_duplicates_are_opt_in_and_reported(client, store):
+    import main
+    csv = b"name,city\nAnvi Singh,Pune\nRahul Verma,Delhi\nanvi singh.,pune\n"
+    plain = client.post("/clean", files={"file": ("in.csv", csv)}).json()
+    assert plain["cleaned_rows"] == 3 and "near_duplicates" not in plain
+
+    merged = client.post("/clean?near_duplicates=true&threshold=0.8", files={"file": ("in.csv", csv)}).json()
+    assert merged["cleaned_rows"] == 2
+    assert merged["near_duplicates"]["merged"] == 1 and merged["near_duplicates"]["threshold"] == 0.8
+    assert merged["near_duplicates"]["report"][0]["duplicate_row"] == 2
+
+    status = client.post("/jobs/clean?near_duplicates=true", files={"file": ("in.csv", csv)}).json()
+    main.jobs._run(store.claim(["clean"], status["job_id"]))
+    assert client.get(status["status_url"]).json()["result"]["near_duplicates"]["merged"] == 1
+
+    assert client.post("/clean?near_duplicates=true&threshold=2", files={"file": ("in.csv", csv)}).status_code == 422
+
+
+def test_stream_drops_near_duplicates(client):
+    csv = b"name,city\nAnvi Singh,Pune\nanvi singh.,pune\n"
+    response = client.post("/clean/stream?near_duplicates=true", files={"file": ("in.csv", csv)})
+    assert response.status_code == 200 and len(response.text.splitlines()) == 2
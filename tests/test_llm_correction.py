@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import httpx
+from openai import AsyncOpenAI
+
+import llm_correction
+from llm_correction import correct_values_batched_async, pack_batches, parse_batch_response
+from llm_dispatch import LLMDispatcher
+from stubs import openai_stub
+
+
+def stub_client(rewrite=None):
+    """AsyncOpenAI talking to stubs/openai_stub.py in-process; `rewrite` edits batch replies."""
+    async def handler(request):
+        transport = httpx.ASGITransport(app=openai_stub.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stub") as stub:
+            response = await stub.send(stub.build_request(request.method, request.url, headers=request.headers,
+                                                          content=request.content))
+        body = response.json()
+        if rewrite is not None and json.loads(request.content).get("response_format"):
+            message = body["choices"][0]["message"]
+            message["content"] = rewrite(message["content"])
+        return httpx.Response(response.status_code, json=body)
+
+    return AsyncOpenAI(api_key="stub", base_url="http://stub/v1", max_retries=0,
+                       http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+def correct(monkeypatch, values, rewrite=None):
+    """Batched correction through the stub; also returns the values retried one by one."""
+    dispatcher = LLMDispatcher(client_factory=lambda: stub_client(rewrite), max_retries=0)
+    calls = []
+    single = llm_correction.correct_value_async
+
+    async def tracked(dispatcher, value, *args, **kwargs):
+        calls.append(value)
+        return await single(dispatcher, value, *args, **kwargs)
+
+    monkeypatch.setattr(llm_correction, "correct_value_async", tracked)
+    result = asyncio.run(correct_values_batched_async(dispatcher, values, "city", token_budget=40))
+    return result, sorted(calls), dispatcher
+
+
+def test_pack_batches_respects_budget_and_item_cap():
+    values = [f"city {i}" for i in range(25)]
+    batches = pack_batches(values, token_budget=60, max_items=4)
+    assert [v for b in batches for v in b] == values
+    assert all(len(b) <= 4 for b in batches)
+    assert all(sum(llm_correction.count_tokens(v) + llm_correction.ITEM_OVERHEAD_TOKENS for v in b) <= 60
+               for b in batches)
+    assert pack_batches(["x" * 1000], token_budget=10) == [["x" * 1000]]  # oversized values still go out
+
+
+def test_parse_batch_response_validates_ids():
+    batch = ["a", "b", "c"]
+    reply = {"corrections": [{"id": 2, "value": " C "}, {"id": 2, "value": "dup"}, {"id": 7, "value": "x"},
+                             {"id": "0", "value": "s"}, {"id": 1, "value": ""}, "junk"]}
+    assert parse_batch_response(json.dumps(reply), batch) == {2: "C"}
+    assert parse_batch_response("not json", batch) == {}
+    assert parse_batch_response("[1, 2]", batch) == {}
+    assert parse_batch_response('{"corrections": {"id": 0}}', batch) == {}
+
+
+def test_batch_round_trip(monkeypatch):
+    values = ["new  york", "pune", "pune", "san francisco", None, " ", "delhi", "mumbai", "goa"]
+    result, retried, dispatcher = correct(monkeypatch, values)
+    assert result == {"new  york": "New York", "pune": "Pune", "san francisco": "San Francisco",
+                      "delhi": "Delhi", "mumbai": "Mumbai", "goa": "Goa"}
+    assert retried == []
+    assert 1 < dispatcher.stats["requests"] < 6  # several values per request
+
+
+def test_missing_and_misaligned_ids_are_retried_one_by_one(monkeypatch):
+    def drop_and_shift(content):
+        items = json.loads(content)["corrections"]
+        # First item dropped, the rest answered under the wrong id (one past the end)
+        return json.dumps({"corrections": [{"id": len(items), "value": it["value"]} for it in items[1:]]})
+
+    values = ["pune", "delhi"]
+    result, retried, _ = correct(monkeypatch, values, drop_and_shift)
+    assert result == {"pune": "Pune", "delhi": "Delhi"}
+    assert retried == ["delhi", "pune"]
+
+
+def test_malformed_json_falls_back_to_single_values(monkeypatch):
+    result, retried, _ = correct(monkeypatch, ["goa", "agra"], lambda content: content[:-5])
+    assert result == {"goa": "Goa", "agra": "Agra"}
+    assert retried == ["agra", "goa"]
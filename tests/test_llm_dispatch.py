@@ -0,0 +1,140 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import llm_dispatch
+from llm_dispatch import AIMDLimiter, LLMDispatcher, TokenBucket
+from usage import UsageMeter
+
+REQUEST = httpx.Request("POST", "http://stub/v1/chat/completions")
+OK = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+                     usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2))
+
+
+def rate_limited(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    return openai.RateLimitError("slow down", response=httpx.Response(429, headers=headers, request=REQUEST),
+                                 body=None)
+
+
+class ScriptedClient:
+    """chat.completions.create that plays back a list of outcomes (exceptions or responses)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if outcome == "hang":
+            await asyncio.Event().wait()
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting them out."""
+    delays, real_sleep = [], asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(llm_dispatch.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def run(dispatcher, **kwargs):
+    return asyncio.run(dispatcher.create(model="gpt-4o-mini", messages=[], max_tokens=20, **kwargs))
+
+
+def test_rate_limit_honours_retry_after_and_halves_concurrency(sleeps):
+    dispatcher = LLMDispatcher(ScriptedClient(rate_limited("1.5"), OK), initial_concurrency=8)
+    assert run(dispatcher) is OK
+    assert sleeps == [1.5]
+    assert dispatcher.limiter.limit == 4.25  # 8 halved by the 429, then +1/4 for the success
+    assert dispatcher.stats == {"requests": 2, "retries": 1, "rate_limited": 1, "timeouts": 0, "failures": 0}
+
+
+def test_timeout_halves_concurrency_and_retries(sleeps):
+    dispatcher = LLMDispatcher(ScriptedClient("hang", OK), initial_concurrency=8, timeout=0.01)
+    assert run(dispatcher) is OK
+    assert dispatcher.stats["timeouts"] == 1 and dispatcher.limiter.limit == 4.25
+    assert 0 <= sleeps[0] <= dispatcher.base_delay  # no Retry-After: jittered exponential backoff
+
+
+def test_gives_up_after_max_retries(sleeps):
+    dispatcher = LLMDispatcher(ScriptedClient(*[rate_limited()] * 3), max_retries=2)
+    with pytest.raises(openai.RateLimitError):
+        run(dispatcher)
+    assert dispatcher.stats["failures"] == 1 and len(sleeps) == 2
+
+
+def test_backoff():
+    dispatcher = LLMDispatcher(base_delay=1.0, max_delay=5.0)
+    assert dispatcher._backoff(0, rate_limited("2")) == 2.0
+    assert dispatcher._backoff(0, rate_limited("120")) == 5.0
+    assert 0 <= dispatcher._backoff(0, rate_limited("soon")) <= 1.0
+    assert all(0 <= dispatcher._backoff(10) <= 5.0 for _ in range(20))
+
+
+def test_aimd_limiter():
+    async def scenario():
+        limiter = AIMDLimiter(initial=8, target_latency=1.0)
+        await limiter.acquire()
+        await limiter.release(ok=False)
+        assert limiter.limit == 4
+        await limiter.acquire()
+        await limiter.release(ok=False)  # same window: a burst of 429s backs off once
+        assert limiter.limit == 4
+        await limiter.acquire()
+        await limiter.release(ok=True)
+        assert limiter.limit == 4.25  # additive increase, +1 per window of `limit` responses
+        limiter._last_decrease = 0.0
+        await limiter.acquire()
+        await limiter.release(ok=True, latency=2.0)  # slow responses count as overload
+        assert limiter.limit == 2.125
+
+        # Never more than int(limit) requests in flight
+        limiter.limit = 2
+        await limiter.acquire()
+        await limiter.acquire()
+        third = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not third.done()
+        await limiter.release(ok=True)
+        await asyncio.wait_for(third, 1)
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_limits_rate():
+    async def scenario():
+        bucket = TokenBucket(per_minute=6000, capacity=5)  # 100 per second
+        start = time.monotonic()
+        await bucket.acquire(5)
+        assert time.monotonic() - start < 0.01
+        await bucket.acquire(5)
+        assert time.monotonic() - start >= 0.04
+        await bucket.acquire(1000)  # oversized requests are capped at the capacity, not stuck forever
+        assert bucket.tokens < 1
+
+    asyncio.run(scenario())
+
+
+def test_usage_reservation_released_on_failure(sleeps):
+    usage = UsageMeter(budget_usd=1.0)
+    dispatcher = LLMDispatcher(ScriptedClient(rate_limited(), OK), max_retries=0)
+    with pytest.raises(openai.RateLimitError):
+        run(dispatcher, estimated_tokens=100, usage=usage)
+    assert usage.reserved_usd == 0.0 and usage.cost_usd == 0.0
+
+    assert run(dispatcher, estimated_tokens=100, usage=usage) is OK
+    assert usage.reserved_usd == 0.0 and usage.requests == 1 and usage.cost_usd > 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from local_cleaning import clean_frame, clean_text_column, locally_clean_header
+
+
+def reference(series):
+    return series.map(lambda x: x.strip().title() if isinstance(x, str) else x)
+
+
+def assert_same_cells(left, right):
+    assert len(left) == len(right)
+    for a, b in zip(left, right):
+        if isinstance(b, float) and np.isnan(b):
+            assert isinstance(a, float) and np.isnan(a)
+        else:
+            assert type(a) is type(b) and a == b
+
+
+def test_matches_map_on_text():
+    series = pd.Series([" pune ", "PUNE", "new delhi", " pune ", None, np.nan, ""])
+    result = clean_text_column(series)
+    assert_same_cells(result, reference(series))
+    assert result.index.equals(series.index)
+
+
+def test_keeps_non_string_cells_as_they_were():
+    series = pd.Series([1, 1.0, True, "mumbai", 0, False, 0.0, "1", None], dtype=object)
+    assert_same_cells(clean_text_column(series), reference(series))
+
+
+def test_categorical_categories_are_cleaned_and_merged():
+    series = pd.Series(["pune ", "Pune", "goa", None], dtype="category")
+    result = clean_text_column(series)
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert list(result.cat.categories) == ["Pune", "Goa"]
+    assert result.tolist()[:3] == ["Pune", "Pune", "Goa"]
+
+
+def test_clean_frame_leaves_numbers_alone():
+    df = pd.DataFrame({"city": [" goa", "GOA"], "n": [1, 2]})
+    cleaned = clean_frame(df)
+    assert cleaned["city"].tolist() == ["Goa", "Goa"]
+    assert cleaned["n"].tolist() == [1, 2]
+    assert df["city"].tolist() == [" goa", "GOA"]
+
+
+def test_locally_clean_header():
+    assert locally_clean_header(" First_Name ") == "first name"
+    assert locally_clean_header("FNAME") == "first name"
+    assert locally_clean_header("Emp-ID") == "employee id"
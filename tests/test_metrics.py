@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import metrics
+import parallel
+
+
+def counted_upper(value):
+    metrics.inc("test_pool_values_total", kind="pool")
+    return value.upper()
+
+
+def series_value(text, series):
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.split()[-1])
+    return None
+
+
+@pytest.fixture
+def no_logs(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_LOG_DIR", "")
+
+
+def test_job_trace_collects_stages_and_counters(no_logs):
+    with metrics.job("test", "job-1") as trace:
+        with metrics.stage("correct", column="city"):
+            metrics.inc("test_trace_total", 2, engine="x")
+    assert trace.status == "done"
+    assert set(trace.timings()) == {"correct", "correct[column=city]"}
+    assert trace.counters == {'test_trace_total{engine="x"}': 2}
+
+
+def test_prometheus_text(no_logs):
+    metrics.inc("test_render_total", 3, engine="fuzzy")
+    metrics.record("test_render_stage", 0.02)
+    text = metrics.render_prometheus()
+    assert series_value(text, 'test_render_total{engine="fuzzy"}') == 3
+    assert series_value(text, 'cleanchain_stage_seconds_bucket{stage="test_render_stage",le="0.05"}') == 1
+    assert series_value(text, 'cleanchain_stage_seconds_count{stage="test_render_stage"}') == 1
+
+
+def test_counts_from_pool_workers_reach_the_parent_and_the_job(no_logs):
+    values = [f"v{i}" for i in range(40)]
+    try:
+        with metrics.job("test") as trace:
+            parallel.map_unique(counted_upper, values, workers=2, min_parallel=1)
+    finally:
+        parallel.shutdown()
+    assert trace.counters['test_pool_values_total{kind="pool"}'] == 40
+    assert series_value(metrics.render_prometheus(), 'test_pool_values_total{kind="pool"}') >= 40
+
+
+def test_metrics_dir_sums_every_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    other = {"counters": [["test_multi_total", [["engine", "x"]], 5]],
+             "histograms": [["test_multi_seconds", [], [1] * (len(metrics.STAGE_BUCKETS) + 2)]]}
+    (tmp_path / "999999.json").write_text(json.dumps(other))
+    metrics.inc("test_multi_total", 2, engine="x")
+
+    text = metrics.render_prometheus()
+    assert series_value(text, 'test_multi_total{engine="x"}') == 7
+    assert series_value(text, "test_multi_seconds_count") == 1
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    metrics.inc("test_multi_total", 1, engine="x")
+    assert series_value(metrics.render_prometheus(), 'test_multi_total{engine="x"}') == 8
@@ -0,0 +1,96 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+import parallel
+import resources
+from parallel import map_column, map_unique
+
+
+def shout(value):
+    return value.upper() + "!"
+
+
+def test_map_column_keeps_non_string_cells():
+    series = pd.Series([1, 1.0, True, "goa", 0, False, "goa", None], dtype=object)
+    result = map_column(shout, series, workers=1)
+    assert [type(v) for v in result] == [int, float, bool, str, int, bool, str, type(None)]
+    assert result.tolist() == [1, 1.0, True, "GOA!", 0, False, "GOA!", None]
+
+
+def test_map_column_without_only_strings_maps_every_cell():
+    series = pd.Series([1, True, "a"], dtype=object)
+    assert map_column(repr, series, workers=1, only_strings=False).tolist() == ["1", "True", "'a'"]
+
+
+def test_map_column_categorical_merges_categories():
+    series = pd.Series(["a", "A", "b", None], dtype="category")
+    result = map_column(str.upper, series, workers=1)
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert list(result.cat.categories) == ["A", "B"]
+
+
+def loader_pid(value):
+    """Pid of the process that loaded the resource."""
+    return resources.get_or_load("parallel_test_pid", os.getpid)
+
+
+@pytest.fixture
+def pid_resource():
+    yield
+    resources._values.pop("parallel_test_pid", None)
+    parallel.shutdown()
+
+
+def test_map_unique_from_a_threaded_process_uses_forkserver(pid_resource):
+    values = [f"city {i % 50}" for i in range(500)]
+    busy = threading.Event()
+    thread = threading.Thread(target=busy.wait)
+    thread.start()
+    try:
+        assert parallel._context().get_start_method() in ("forkserver", "spawn")
+        result = map_unique(shout, values, workers=2, min_parallel=1)
+        pids = set(map_unique(loader_pid, range(20), workers=2, min_parallel=1).values())
+    finally:
+        busy.set()
+        thread.join()
+    assert result == {v: shout(v) for v in dict.fromkeys(values)}
+    assert os.getpid() not in pids  # each worker loaded the resource itself
+
+
+PRESTART_SCRIPT = """
+import os, threading
+import parallel
+from tests.test_parallel import loader_pid
+
+assert threading.active_count() == 1
+loader_pid(None)
+pool = parallel.prestart(2)
+assert pool._mp_context.get_start_method() == "fork" and len(pool._processes) == 2
+
+# Later calls from a threaded process reuse the forked workers
+busy = threading.Event()
+threading.Thread(target=busy.wait, daemon=True).start()
+pids = set(parallel.map_unique(loader_pid, range(20), workers=2, min_parallel=1).values())
+assert pids == {os.getpid()}, pids
+assert parallel.get_executor(2) is pool
+busy.set()
+"""
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+def test_prestarted_pool_shares_loaded_resources():
+    # A fresh interpreter: this one may be running other tests' threads
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    done = subprocess.run([sys.executable, "-c", PRESTART_SCRIPT], cwd=root, capture_output=True, text=True,
+                          timeout=120)
+    assert done.returncode == 0, done.stderr
+
+
+def test_prestart_without_workers():
+    assert parallel.prestart(1) is None
@@ -0,0 +1,88 @@
+import gc
+import os
+import threading
+import time
+
+import pytest
+
+import resources
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty resource registry for the test."""
+    for attr in ("_loaders", "_values", "_locks"):
+        monkeypatch.setattr(resources, attr, {})
+    return resources
+
+
+def test_concurrent_get_loads_once(registry):
+    calls = []
+
+    def load():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    registry.register("slow", load)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(registry.get("slow"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+
+def test_get_or_load_and_decorator(registry):
+    @registry.resource("answer")
+    def get_answer():
+        """The answer."""
+        return 42
+
+    assert not registry.is_loaded("answer")
+    assert get_answer() == 42 and get_answer.__doc__ == "The answer."
+    assert registry.get_or_load("answer", lambda: 0) == 42
+    assert registry.get_or_load("other", lambda: 7) == 7
+    assert registry.registered() == ["answer", "other"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_warm_up_skips_failures(registry, capsys):
+    registry.register("ok", lambda: 1)
+    registry.register("broken", lambda: 1 / 0)
+    timings = registry.warm_up()
+    assert list(timings) == ["ok"] and registry.is_loaded("ok")
+    assert "Warm-up failed for broken" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_preload_for_fork_shares_loaded_values(registry):
+    calls = []
+    registry.register("big", lambda: calls.append(1) or list(range(1000)))
+    try:
+        assert list(registry.preload_for_fork("big")) == ["big"]
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child: the value is already there, no loader call
+        os.close(read)
+        ok = registry.is_loaded("big") and registry.get("big")[-1] == 999 and len(calls) == 1
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+    os.close(write)
+    assert os.read(read, 1) == b"1"
+    os.close(read)
+    os.waitpid(pid, 0)
+    assert len(calls) == 1
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from streaming import RowDeduplicator
+
+
+def test_drops_duplicates_within_and_across_chunks():
+    dedupe = RowDeduplicator()
+    first = dedupe(pd.DataFrame({"city": ["Pune", "Delhi", "Pune"], "n": [1, 2, 1]}))
+    second = dedupe(pd.DataFrame({"city": ["Delhi", "Goa", "Goa"], "n": [2, 3, 3]}))
+    assert first.to_dict("list") == {"city": ["Pune", "Delhi"], "n": [1, 2]}
+    assert second.to_dict("list") == {"city": ["Goa"], "n": [3]}
+    assert second.index.tolist() == [1]
+    assert len(dedupe) == 3 and dedupe.seen.dtype == np.uint64
+    assert np.all(np.diff(dedupe.seen.astype(object)) > 0)
+
+
+def test_rows_match_whatever_dtype_each_chunk_was_parsed_as():
+    dedupe = RowDeduplicator()
+    dedupe(pd.DataFrame({"id": [1, 2], "city": ["Pune", None]}))
+    # A missing id makes the column float, a category makes the text categorical
+    later = pd.DataFrame({"id": [1.0, 2.0, np.nan, 2.5], "city": pd.Categorical(["Pune", None, None, "Pune"])})
+    assert dedupe(later).index.tolist() == [2, 3]
+
+
+def test_missing_is_not_the_text_none():
+    dedupe = RowDeduplicator()
+    dedupe(pd.DataFrame({"city": [None]}))
+    assert dedupe(pd.DataFrame({"city": ["None", "nan", ""]}))["city"].tolist() == ["None", "nan", ""]
+
+
+def test_empty_chunk():
+    dedupe = RowDeduplicator()
+    assert dedupe(pd.DataFrame({"a": []})).empty
+    assert len(dedupe) == 0
@@ -0,0 +1,49 @@
+import pytest
+
+import translation
+from correction_cache import CorrectionCache
+from translation import StubBackend, translate_values
+
+LANGUAGES = {"hola mundo": "es", "HOLA MUNDO": "es", "Hola Mundo": "es",
+             "hello world, how are you today": "en", "HELLO WORLD, HOW ARE YOU TODAY": "en"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = CorrectionCache(str(tmp_path / "corrections.db"))
+    monkeypatch.setattr(translation, "get_correction_cache", lambda: cache)
+    monkeypatch.setattr(translation, "detect_languages", lambda texts: {t: LANGUAGES.get(t) for t in texts})
+    return cache
+
+
+def test_translates_and_caches(cache):
+    backend = StubBackend({"hola mundo": "hello world"})
+    assert translate_values(["hola mundo", "hola mundo"], backend=backend) == {"hola mundo": "hello world"}
+    assert translate_values(["hola mundo"], backend=backend) == {"hola mundo": "hello world"}
+    assert backend.calls == 1
+
+
+def test_cache_keys_keep_case(cache):
+    backend = StubBackend({"hola mundo": "hello world", "HOLA MUNDO": "HELLO WORLD"})
+    translate_values(["hola mundo"], backend=backend)
+    assert translate_values(["HOLA MUNDO"], backend=backend) == {"HOLA MUNDO": "HELLO WORLD"}
+    assert backend.calls == 2
+
+
+def test_text_in_target_language_comes_back_as_given(cache):
+    backend = StubBackend()
+    translate_values(["hello world, how are you today"], backend=backend)
+    shouted = "HELLO WORLD, HOW ARE YOU TODAY"
+    assert translate_values([shouted], backend=backend) == {shouted: shouted}
+    assert translate_values([shouted], backend=backend) == {shouted: shouted}
+    assert backend.calls == 0
+
+
+def test_failed_batches_are_not_cached(cache):
+    class Failing(StubBackend):
+        def translate_batch(self, texts, source, target):
+            raise RuntimeError("quota")
+
+    assert translate_values(["Hola Mundo"], backend=Failing()) == {}
+    assert translate_values(["Hola Mundo"], backend=StubBackend({"Hola Mundo": "Hello World"})) == {
+        "Hola Mundo": "Hello World"}
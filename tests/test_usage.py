@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+from usage import BudgetExceeded, UsageMeter, cost_of
+
+
+def test_reservations_block_past_the_budget():
+    meter = UsageMeter(budget_usd=cost_of("gpt-4o-mini", 1000, 100) * 2.5)
+    first = meter.reserve("gpt-4o-mini", 1000, 100)
+    meter.reserve("gpt-4o-mini", 1000, 100)
+    with pytest.raises(BudgetExceeded):
+        meter.reserve("gpt-4o-mini", 1000, 100)
+    assert meter.exhausted and meter.blocked == 1
+
+    meter.release(first)
+    meter.reserve("gpt-4o-mini", 1000, 100)
+
+
+def test_record_replaces_the_reservation_with_actual_cost():
+    meter = UsageMeter(budget_usd=1.0)
+    reservation = meter.reserve("gpt-4o-mini", 1000, 100)
+    meter.record("gpt-4o-mini", SimpleNamespace(prompt_tokens=800, completion_tokens=5), reservation)
+    assert meter.reserved_usd == 0.0
+    assert meter.cost_usd == pytest.approx(cost_of("gpt-4o-mini", 800, 5))
+    assert meter.summary()["requests"] == 1
+
+
+def test_failed_requests_release_their_reservation():
+    from llm_correction import correct_value
+
+    class Failing:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    raise TimeoutError("slow")
+
+    meter = UsageMeter(budget_usd=1.0)
+    with pytest.raises(TimeoutError):
+        correct_value(Failing, "Mumbay", "city", usage=meter)
+    assert meter.reserved_usd == 0.0
+
+
+def test_no_budget_never_blocks():
+    meter = UsageMeter()
+    for _ in range(100):
+        meter.reserve("gpt-4o", 100_000, 4_000)
+    assert not meter.exhausted
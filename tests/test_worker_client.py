@@ -0,0 +1,61 @@
+import json
+import os
+
+import httpx
+import pytest
+import requests
+
+import worker_client
+from worker_client import CircuitBreaker, WorkerClient, WorkerUnavailable
+
+
+def mock_async_client(monkeypatch, handler):
+    real = httpx.AsyncClient
+    monkeypatch.setattr(worker_client.httpx, "AsyncClient",
+                        lambda **kwargs: real(transport=httpx.MockTransport(handler), **kwargs))
+
+
+def test_bad_batch_replies_dont_drop_the_other_batches(monkeypatch):
+    def handler(request):
+        names = json.loads(request.content)["names"]
+        if "html" in names:
+            return httpx.Response(200, text="<html>Cloudflare error</html>")
+        if "list" in names:
+            return httpx.Response(200, json=["not", "a", "dict"])
+        return httpx.Response(200, json={"cleaned_names": [n.upper() for n in names]})
+
+    mock_async_client(monkeypatch, handler)
+    client = WorkerClient("http://worker", batch_size=1, max_retries=0)
+    assert client.clean_many(["goa", "html", "list", "pune"]) == {"goa": "GOA", "pune": "PUNE"}
+
+
+class BrokenSession:
+    def __init__(self, error):
+        self.error = error
+
+    def post(self, *args, **kwargs):
+        raise self.error
+
+
+def test_any_request_error_resolves_the_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0)
+    client = WorkerClient("http://worker", max_retries=0, breaker=breaker, base_delay=0)
+    client._session, client._session_pid = BrokenSession(requests.exceptions.ChunkedEncodingError("cut")), os.getpid()
+
+    for _ in range(3):
+        with pytest.raises(WorkerUnavailable):
+            client.clean("goa")
+    assert not breaker._trial
+    assert breaker.allow()  # still gets a trial call once reset_after has passed
+
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    breaker.opened_at -= 60
+    assert breaker.allow() and not breaker.allow()  # one trial call only
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
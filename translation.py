@@ -0,0 +1,163 @@
+import random
+from functools import lru_cache
+
+import resources
+from config import TRANSLATION_BACKEND
+from correction_cache import get_correction_cache
+
+# 🌍 Optional libraries
+try:
+    from langdetect import DetectorFactory, detect
+    DetectorFactory.seed = 0  # langdetect is randomized; make detection repeatable
+    LANGDETECT_AVAILABLE = True
+except ImportError:
+    LANGDETECT_AVAILABLE = False
+
+try:
+    from deep_translator import GoogleTranslator
+    GOOGLE_AVAILABLE = True
+except ImportError:
+    GOOGLE_AVAILABLE = False
+
+TRANSLATOR_AVAILABLE = LANGDETECT_AVAILABLE and (GOOGLE_AVAILABLE or TRANSLATION_BACKEND != "google")
+
+TRANSLATE_BATCH_SIZE = 50
+DETECT_SAMPLE_SIZE = 200
+DOMINANT_LANGUAGE_SHARE = 0.95
+CACHE_KEYS = "exact"  # part of the cache version: entries are keyed case-sensitively
+
+# langdetect codes that Google spells differently
+GOOGLE_LANGUAGE_CODES = {"zh-cn": "zh-CN", "zh-tw": "zh-TW"}
+
+
+# ==================== 🔌 Backends ====================
+class TranslatorBackend:
+    """Bulk translator: one call per (source language, batch of texts)."""
+    name = "base"
+    version = "1"  # part of the cache key; bump when output would change
+
+    def translate_batch(self, texts, source: str, target: str):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslatorBackend):
+    """deep_translator's GoogleTranslator, one instance per language pair."""
+    name = "google"
+
+    def __init__(self):
+        if not GOOGLE_AVAILABLE:
+            raise ImportError("deep_translator is not installed")
+        self._translators = {}
+
+    def translate_batch(self, texts, source: str, target: str):
+        key = (source, target)
+        if key not in self._translators:
+            self._translators[key] = GoogleTranslator(source=GOOGLE_LANGUAGE_CODES.get(source, source),
+                                                      target=target)
+        return self._translators[key].translate_batch(list(texts))
+
+
+class StubBackend(TranslatorBackend):
+    """
+    Offline stand-in for tests and benchmarks: looks texts up in a small
+    {text: translation} dictionary and returns anything else unchanged.
+    """
+    name = "stub"
+
+    def __init__(self, dictionary: dict = None):
+        self.dictionary = dictionary or {}
+        self.calls = 0
+
+    def translate_batch(self, texts, source: str, target: str):
+        self.calls += 1
+        return [self.dictionary.get(text, text) for text in texts]
+
+
+BACKENDS = {"google": GoogleBackend, "stub": StubBackend}
+
+
+def get_translator(name: str = TRANSLATION_BACKEND):
+    """Shared backend instance by name (built once per process)."""
+    return resources.get_or_load(f"translator:{name}", BACKENDS[name])
+
+
+# ==================== 🔎 Language detection ====================
+@lru_cache(maxsize=100_000)
+def detect_language(text: str):
+    """Language code of one text, or None when it can't be told."""
+    try:
+        return detect(text)
+    except Exception:
+        return None
+
+
+def detect_languages(texts, sample_size: int = DETECT_SAMPLE_SIZE, dominant_share: float = DOMINANT_LANGUAGE_SHARE):
+    """
+    {text: language} for distinct texts. A seeded sample is detected first; when one
+    language covers `dominant_share` of it, the rest of the column is assumed to be
+    in that language instead of being detected value by value.
+    """
+    texts = list(dict.fromkeys(texts))
+    if not LANGDETECT_AVAILABLE:
+        return {}
+    if len(texts) <= sample_size:
+        return {text: detect_language(text) for text in texts}
+
+    sample = random.Random(0).sample(texts, sample_size)
+    detected = {text: detect_language(text) for text in sample}
+    counts = {}
+    for lang in detected.values():
+        counts[lang] = counts.get(lang, 0) + 1
+    top, top_count = max(counts.items(), key=lambda item: item[1])
+    if top is not None and top_count / sample_size >= dominant_share:
+        return {text: detected.get(text, top) for text in texts}
+    return {text: detected[text] if text in detected else detect_language(text) for text in texts}
+
+
+# ==================== 🌐 Translation ====================
+def translate_values(values, target: str = "en", backend: TranslatorBackend = None,
+                     batch_size: int = TRANSLATE_BATCH_SIZE):
+    """
+    Translate distinct values into `target`. Returns {value: translation}.
+    Cached translations are reused; the rest are grouped by detected source language
+    and sent to the backend in batches. Values that fail keep their original text
+    (and aren't cached). The cache is keyed case-sensitively, and text already in
+    `target` is cached as None, so the caller always gets its own text back for it.
+    """
+    try:
+        backend = backend or get_translator()
+    except ImportError as e:
+        print("⚠️ Translator backend unavailable:", e)
+        return {}
+    values = list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+    if not values:
+        return {}
+
+    cache = get_correction_cache()
+    scope, engine = f"translate:{target}", f"translate:{backend.name}"
+    version = f"{backend.version}:{CACHE_KEYS}"
+    hits = cache.get_many(scope, values, engine, version, exact=True)
+    results = {v: v if hits[v] is None else hits[v] for v in values if v in hits}
+    missing = [v for v in values if v not in results]
+
+    by_language = {}
+    for value, lang in detect_languages(missing).items():
+        if lang is not None:
+            by_language.setdefault(lang, []).append(value)
+
+    unchanged = by_language.pop(target, [])  # already in the target language
+    fresh = {}
+    for lang, texts in by_language.items():
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            try:
+                translated = backend.translate_batch(batch, lang, target)
+            except Exception as e:
+                print(f"⚠️ Translation failed ({lang} → {target}):", e)
+                continue
+            fresh.update({text: out for text, out in zip(batch, translated) if isinstance(out, str) and out})
+
+    cache.set_many(scope, {**fresh, **dict.fromkeys(unchanged)}, engine, version, exact=True)
+    results.update(fresh)
+    results.update({v: v for v in unchanged})
+    return results
@@ -0,0 +1,75 @@
+import threading
+
+# USD per token (input, output); keep in sync with OpenAI's price list
+PRICES = {
+    "gpt-4o-mini": (0.15 / 1_000_000, 0.60 / 1_000_000),
+    "gpt-4o": (2.50 / 1_000_000, 10.00 / 1_000_000),
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+class BudgetExceeded(Exception):
+    """Raised instead of sending a request that could push spend past the budget."""
+
+
+def cost_of(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = PRICES.get(model, PRICES[DEFAULT_MODEL])
+    return prompt_tokens * input_price + completion_tokens * output_price
+
+
+class UsageMeter:
+    """
+    Spend for one job, from the `usage` block of every completion.
+    With a budget, each request first reserves its worst case (prompt + max_tokens);
+    once spent + reserved would pass the budget, reserve() raises BudgetExceeded so
+    nothing more is dispatched. Thread- and task-safe.
+    """
+
+    def __init__(self, budget_usd: float = None):
+        self.budget_usd = budget_usd or None
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.reserved_usd = 0.0
+        self.blocked = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, model: str, prompt_tokens: int, max_tokens: int) -> float:
+        """Hold the worst-case cost of a request; returns the amount to pass to record()/release()."""
+        amount = cost_of(model, prompt_tokens, max_tokens)
+        with self._lock:
+            if self.budget_usd is not None and self.cost_usd + self.reserved_usd + amount > self.budget_usd:
+                self.blocked += 1
+                raise BudgetExceeded(f"budget of ${self.budget_usd:.4f} reached (spent ${self.cost_usd:.4f})")
+            self.reserved_usd += amount
+        return amount
+
+    def release(self, reservation: float):
+        with self._lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reservation)
+
+    def record(self, model: str, usage, reservation: float = 0.0):
+        """Add a completion's actual usage (response.usage) and drop its reservation."""
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.cost_usd += cost_of(model, prompt, completion)
+            self.reserved_usd = max(0.0, self.reserved_usd - reservation)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.blocked > 0
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "budget_usd": self.budget_usd,
+            "blocked_requests": self.blocked,
+        }
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from config import (WORKER_BATCH_SIZE, WORKER_BREAKER_FAILURES, WORKER_BREAKER_RESET, WORKER_CONCURRENCY,
+                    WORKER_MAX_RETRIES, WORKER_TIMEOUT, WORKER_URL)
+
+# Worker answers worth retrying; other 4xx are the request's fault and fail immediately
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class WorkerUnavailable(Exception):
+    """The worker failed after every retry, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream. After `failure_threshold` consecutive failures the
+    circuit opens and calls are refused for `reset_after` seconds; then one trial call is
+    let through (half-open): success closes the circuit, failure opens it again.
+    Thread-safe, so sync and async callers can share one breaker.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = WORKER_BREAKER_FAILURES, reset_after: float = WORKER_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        return self.HALF_OPEN if time.monotonic() - self.opened_at >= self.reset_after else self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class WorkerClient:
+    """
+    Client for the Cloudflare name-correction worker (ai_name_correction).
+    Sync calls share a pooled keep-alive requests.Session; `clean_many` packs names
+    into /clean/batch requests and sends them concurrently over one pooled httpx
+    AsyncClient. Every request gets a timeout and is retried with exponential backoff
+    + full jitter (honouring Retry-After); all of them go through one circuit breaker.
+    """
+
+    def __init__(self, base_url: str = WORKER_URL, timeout: float = WORKER_TIMEOUT,
+                 max_retries: int = WORKER_MAX_RETRIES, batch_size: int = WORKER_BATCH_SIZE,
+                 concurrency: int = WORKER_CONCURRENCY, breaker: CircuitBreaker = None,
+                 base_delay: float = 0.25, max_delay: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+        self._session, self._session_pid = None, None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # One pool per process: connections must not be shared across a fork
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session, self._session_pid = session, os.getpid()
+            return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            metrics.inc("cleanchain_engine_calls_total", engine="worker", outcome="rejected")
+            raise WorkerUnavailable("circuit open: worker failing, not sending")
+
+    def _give_up(self, attempt: int, error) -> bool:
+        """Record a failed attempt; True when it was the last one."""
+        self.breaker.record_failure()
+        metrics.inc("cleanchain_engine_calls_total", engine="worker", outcome="error")
+        if attempt == self.max_retries:
+            self.stats["failures"] += 1
+            return True
+        self.stats["retries"] += 1
+        return False
+
+    # ---------- sync ----------
+    def _post(self, path: str, payload: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._admit()
+            response = None
+            try:
+                self.stats["requests"] += 1
+                response = self.session.post(self.base_url + path, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                # Any transport failure (incl. a body cut short) must resolve a half-open trial
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()  # the worker answered, even if it rejected the request
+                    metrics.inc("cleanchain_engine_calls_total", engine="worker", outcome="ok")
+                    response.raise_for_status()
+                    return response.json()
+                error = WorkerUnavailable(f"worker answered {response.status_code}")
+            if self._give_up(attempt, error):
+                raise WorkerUnavailable(str(error)) from error
+            time.sleep(self._backoff(attempt, response))
+
+    def clean(self, name: str) -> str:
+        """Correct one name (POST /clean)."""
+        return self._post("/clean", {"name": name}).get("cleaned_name", name)
+
+    def clean_batch(self, names) -> list:
+        """Correct a list of names in one request (POST /clean/batch); results keep the input order."""
+        cleaned = self._post("/clean/batch", {"names": list(names)}).get("cleaned_names")
+        if not isinstance(cleaned, list) or len(cleaned) != len(names):
+            raise WorkerUnavailable("worker batch reply doesn't match the request")
+        return cleaned
+
+    def clean_many(self, names) -> dict:
+        """Sync entry point for clean_many_async. Returns {name: cleaned}."""
+        return asyncio.run(self.clean_many_async(names))
+
+    # ---------- async ----------
+    async def _post_async(self, client, path: str, payload: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._admit()
+            response = None
+            try:
+                self.stats["requests"] += 1
+                response = await client.post(path, json=payload)
+            except (httpx.RequestError, asyncio.TimeoutError) as e:
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    metrics.inc("cleanchain_engine_calls_total", engine="worker", outcome="ok")
+                    response.raise_for_status()
+                    return response.json()
+                error = WorkerUnavailable(f"worker answered {response.status_code}")
+            if self._give_up(attempt, error):
+                raise WorkerUnavailable(str(error)) from error
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def clean_many_async(self, names) -> dict:
+        """
+        Correct many names with batched requests, `concurrency` in flight at a time.
+        Names whose batch failed (or was refused by the open circuit, or got a reply that
+        isn't the expected JSON) are left out of the result, so callers keep the original;
+        the other batches' results are kept. Returns {name: cleaned}.
+        """
+        names = list(dict.fromkeys(n for n in names if isinstance(n, str) and n.strip()))
+        batches = [names[i:i + self.batch_size] for i in range(0, len(names), self.batch_size)]
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            async def run(batch):
+                async with semaphore:
+                    try:
+                        data = await self._post_async(client, "/clean/batch", {"names": batch})
+                    except (WorkerUnavailable, httpx.HTTPStatusError, ValueError) as e:
+                        # ValueError: a 200 with a body that isn't JSON (e.g. an HTML error page)
+                        print("⚠️ Worker batch error:", e)
+                        return {}
+                cleaned = data.get("cleaned_names") if isinstance(data, dict) else None
+                if not isinstance(cleaned, list) or len(cleaned) != len(batch):
+                    print("⚠️ Worker batch reply doesn't match the request; skipping", len(batch), "names")
+                    return {}
+                return dict(zip(batch, cleaned))
+
+            results = {}
+            for found in await asyncio.gather(*(run(b) for b in batches), return_exceptions=True):
+                if isinstance(found, Exception):
+                    print("⚠️ Worker batch error:", found)
+                    continue
+                results.update(found)
+        return results